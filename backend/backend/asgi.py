@@ -13,4 +13,46 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+import time  # noqa: E402
+
+from django.conf import settings  # noqa: E402
+from licenses.asgi import is_fast_path, license_validation_app  # noqa: E402
+from system.metrics import request_metrics  # noqa: E402
+from licenses.bloom import license_key_filter  # noqa: E402
+
+# 启动时在后台构建授权码过滤器
+license_key_filter.warm_up()
+
+FAST_PATH_VIEW = 'license-validate-license-fast-path'
+
+
+async def _measured_fast_path(scope, receive, send):
+    # 快速通道不经过 MetricsMiddleware，这里单独记录请求数、耗时和响应大小（数据库查询不计）
+    response = {'status': 500, 'size': 0}
+
+    async def measured_send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['size'] += len(message.get('body', b''))
+        await send(message)
+
+    started = time.perf_counter()
+    try:
+        await license_validation_app(scope, receive, measured_send)
+    finally:
+        request_metrics.observe(
+            scope['method'], FAST_PATH_VIEW, response['status'],
+            time.perf_counter() - started, size=response['size'],
+        )
+
+
+async def application(scope, receive, send):
+    # 授权码验证走轻量快速通道，不经过 Django 中间件和 DRF
+    if settings.LICENSE_FAST_PATH['ENABLED'] and is_fast_path(scope):
+        if request_metrics.enabled:
+            return await _measured_fast_path(scope, receive, send)
+        return await license_validation_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,129 @@
+"""
+进程内缓存工具
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class LRUTTLCache:
+    """线程安全的 LRU + TTL 进程内缓存
+
+    on_remove(key, value) 在条目因容量淘汰、过期或 delete() 被移除后调用（不持有缓存的锁），
+    供调用方维护按值建立的反向索引。
+    """
+
+    def __init__(self, maxsize=1024, ttl=30, on_remove=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_remove = on_remove
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+            self.misses += 1
+        if self.on_remove is not None:
+            self.on_remove(key, value)
+        return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        removed = []
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                removed.append((old_key, old_value))
+                self.evictions += 1
+        if self.on_remove is not None:
+            for old_key, old_value in removed:
+                self.on_remove(old_key, old_value)
+
+    def delete(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+        if item is not None and self.on_remove is not None:
+            self.on_remove(key, item[1])
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """命中统计"""
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+_MISSING = object()
+
+
+class SingleFlightCache:
+    """带 single-flight 的计算结果缓存
+
+    缓存未命中时同一个 key 只有一个线程执行计算，其他线程等待后直接读取结果，
+    避免缓存过期瞬间的并发请求同时打到数据库。
+    """
+
+    def __init__(self, maxsize=256, ttl=10):
+        self.cache = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.computations = 0
+
+    def get_or_compute(self, key, compute, ttl=None):
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            # 等锁期间可能已有其他线程算好
+            value = self.cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = compute()
+                self.computations += 1
+                self.cache.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['computations'] = self.computations
+        return stats
+
+
+# 各统计接口共用的短 TTL 缓存
+stats_cache = SingleFlightCache(ttl=settings.STATS_CACHE_TTL)
@@ -0,0 +1,124 @@
+"""
+键集（keyset）分页
+
+按 (时间字段, id) 排序，游标记录上一页边界行的这两个值，下一页取 (时间, id) < (边界时间, 边界 id)
+的行。Django 没有行值比较，条件写成
+    时间 <= 边界时间 AND (时间 < 边界时间 OR (时间 = 边界时间 AND id < 边界 id))
+其中第一项与后面的 OR 重复，但数据库可以据此在 (时间字段, id) 复合索引上从边界处开始一次范围扫描
+（只有 OR 时 PostgreSQL 无法确定扫描起点）。任意深度的翻页代价与第一页相同，也不需要 COUNT(*)。
+时间相同的行按 id 区分，不会重复或遗漏。
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """按 (时间字段, id) 的键集分页，视图可通过 keyset_ordering 或 get_keyset_ordering() 指定排序"""
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = '无效的游标'
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, view):
+        if hasattr(view, 'get_keyset_ordering'):
+            return view.get_keyset_ordering()
+        return getattr(view, 'keyset_ordering', self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, row, reverse):
+        value = getattr(row, self.field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        data = json.dumps([value, row.pk, int(reverse)], separators=(',', ':'))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, base64.urlsafe_b64encode(data.encode()).decode())
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk, reverse = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            value = model._meta.get_field(self.field).to_python(value)
+            pk = model._meta.pk.to_python(pk)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk, bool(reverse)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(view)
+        self.field = ordering[0].lstrip('-')
+        descending = ordering[0].startswith('-')
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = cursor is not None and cursor[2]
+        if cursor is not None:
+            value, pk, _ = cursor
+            # 向后翻页时边界方向与排序方向相同，向前翻页时相反
+            before = descending != reverse
+            lookup = 'lt' if before else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}e': value}),
+                Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'pk__{lookup}': pk}),
+            )
+
+        if reverse:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # 向前翻页时后面一定还有数据；向后翻页时只要带了游标前面就有数据
+        has_next = True if reverse else has_more
+        has_previous = has_more if reverse else cursor is not None
+
+        self.next_url = None
+        self.previous_url = None
+        if rows:
+            if has_next:
+                self.next_url = self.encode_cursor(rows[-1], reverse=False)
+            if has_previous:
+                self.previous_url = self.encode_cursor(rows[0], reverse=True)
+        elif cursor is not None:
+            # 越过边界的空页：保留回到第一页的入口
+            self.previous_url = remove_query_param(request.build_absolute_uri(), self.cursor_query_param)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_url,
+            'previous': self.previous_url,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,98 @@
+"""
+列表接口的 search= 搜索
+
+- 包含匹配仍使用 __icontains，在 PostgreSQL 上由 UPPER(列) 的 pg_trgm GIN 索引支持
+  （见 trigram_indexes()），SQLite 等其他数据库按原方式扫描；
+- 关联字段（如 customer__name）先在关联表上用索引查出主键，再按外键过滤，
+  避免 OR 条件跨 JOIN 导致全表扫描；
+- 授权码等前缀字段用 __startswith 匹配，走 Django 在 PostgreSQL 上为唯一 CharField
+  自动创建的 varchar_pattern_ops（_like）索引；
+- 结果按匹配程度排序：完全匹配 > 前缀匹配 > 包含匹配。
+"""
+from django.db import migrations
+from django.db.models import Case, IntegerField, Q, Value, When
+
+# 关联字段先查出的主键个数上限，超过时改用子查询（说明搜索词区分度很低）
+RELATED_IDS_LIMIT = 500
+
+RANK_EXACT = 3
+RANK_PREFIX = 2
+RANK_CONTAINS = 1
+
+
+def _related_filter(model, field, term):
+    """关联字段的搜索条件：relation__field 转换为 relation__in=[主键...]"""
+    relation, related_field = field.split('__', 1)
+    related_model = model._meta.get_field(relation).related_model
+    matches = related_model._default_manager.filter(**{f'{related_field}__icontains': term}).values('pk')
+    ids = list(matches.values_list('pk', flat=True)[:RELATED_IDS_LIMIT + 1])
+    if len(ids) > RELATED_IDS_LIMIT:
+        return Q(**{f'{relation}__in': matches})
+    return Q(**{f'{relation}__in': ids})
+
+
+def search_queryset(queryset, term, fields=(), prefix_fields=(), normalize_prefix=None, rank=True):
+    """按 search= 过滤并排序 queryset
+
+    fields 做包含匹配（可含一层关联，如 customer__name），prefix_fields 做前缀匹配，
+    normalize_prefix 用于前缀匹配前规范化搜索词（例如授权码转大写）。
+    """
+    term = (term or '').strip()
+    if not term:
+        return queryset
+
+    model = queryset.model
+    prefix_term = normalize_prefix(term) if normalize_prefix else term
+    condition = Q()
+    for field in fields:
+        if '__' in field:
+            condition |= _related_filter(model, field, term)
+        else:
+            condition |= Q(**{f'{field}__icontains': term})
+    for field in prefix_fields:
+        condition |= Q(**{f'{field}__startswith': prefix_term})
+    queryset = queryset.filter(condition)
+    if not rank:
+        return queryset
+
+    whens = []
+    for field in prefix_fields:
+        whens.append(When(**{field: prefix_term, 'then': Value(RANK_EXACT)}))
+    for field in fields:
+        if '__' not in field:
+            whens.append(When(**{f'{field}__iexact': term, 'then': Value(RANK_EXACT)}))
+    for field in prefix_fields:
+        whens.append(When(**{f'{field}__startswith': prefix_term, 'then': Value(RANK_PREFIX)}))
+    for field in fields:
+        if '__' not in field:
+            whens.append(When(**{f'{field}__istartswith': term, 'then': Value(RANK_PREFIX)}))
+    search_rank = Case(*whens, default=Value(RANK_CONTAINS), output_field=IntegerField())
+    ordering = queryset.query.order_by or model._meta.ordering or ['pk']
+    return queryset.annotate(search_rank=search_rank).order_by('-search_rank', *ordering, '-pk')
+
+
+def trigram_indexes(table, columns):
+    """只在 PostgreSQL 上创建 UPPER(列) pg_trgm GIN 索引的迁移操作
+
+    索引表达式与 __icontains 生成的 UPPER("列"::text) 一致，其他数据库跳过。
+    使用 CREATE INDEX CONCURRENTLY，所在迁移需要设置 atomic = False。
+    """
+    names = [f'{table}_{column}_trgm' for column in columns]
+
+    def create(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, column in zip(names, columns):
+            schema_editor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+                f'ON "{table}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+            )
+
+    def drop(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for name in names:
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+    return migrations.RunPython(create, drop, elidable=False)
@@ -0,0 +1,71 @@
+"""
+稀疏字段集
+
+读请求可以用 ?fields=a,b 只返回指定字段，或用 ?omit=c,d 去掉指定字段。
+get_only_fields() 把当前字段集换算成需要读取的模型字段，视图据此调用
+QuerySet.only()，数据库也不必返回未用到的列（例如大的 JSON 列）。
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_QUERY_PARAM = 'fields'
+OMIT_QUERY_PARAM = 'omit'
+
+
+def parse_field_list(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fields(request):
+    """返回请求中的 (fields, omit)，未指定时为 None"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+    fields = request.query_params.get(FIELDS_QUERY_PARAM)
+    omit = request.query_params.get(OMIT_QUERY_PARAM)
+    return (
+        parse_field_list(fields) if fields is not None else None,
+        parse_field_list(omit) if omit is not None else None,
+    )
+
+
+class SparseFieldsetMixin:
+    """按 ?fields= / ?omit= 裁剪 ModelSerializer 的输出字段，只作用于读请求
+
+    Meta.field_dependencies 声明非模型字段（属性等）依赖的模型字段，
+    例如 {'access_url': ['domain', 'tls_enabled']}，供 get_only_fields() 使用。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, omit = requested_fields(self.context.get('request'))
+        if fields is None and omit is None:
+            return
+
+        available = set(self.fields)
+        unknown = sorted((set(fields or []) | set(omit or [])) - available)
+        if unknown:
+            raise serializers.ValidationError({'fields': f"未知字段: {', '.join(unknown)}"})
+
+        keep = set(fields) if fields is not None else set(available)
+        keep -= set(omit or [])
+        for name in available - keep:
+            self.fields.pop(name)
+
+    def get_only_fields(self):
+        """当前字段集需要读取的模型字段列表，无法确定时返回 None（读取全部字段）"""
+        opts = self.Meta.model._meta
+        dependencies = getattr(self.Meta, 'field_dependencies', {})
+        names = {opts.pk.name}
+        for name, field in self.fields.items():
+            if name in dependencies:
+                names.update(dependencies[name])
+                continue
+            if field.source == '*':
+                return None
+            try:
+                opts.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                return None
+            names.add('__'.join(field.source_attrs))
+        return sorted(names)
@@ -21,7 +21,73 @@ env = environ.Env(
     # 设置默认值和类型
     DEBUG=(bool, False),
     API_PAGE_SIZE=(int, 50),
+    API_MAX_PAGE_SIZE=(int, 500),
+    STATS_CACHE_TTL=(int, 10),
+    AUTH_TOKEN_TTL=(int, 7 * 24 * 3600),
+    AUTH_TOKEN_RENEW_INTERVAL=(int, 3600),
+    AUTH_TOKEN_MAX_PER_USER=(int, 10),
+    AUTH_TOKEN_CACHE_ENABLED=(bool, True),
+    AUTH_TOKEN_CACHE_TTL=(int, 60),
+    AUTH_TOKEN_CACHE_MAXSIZE=(int, 10000),
+    SEARCH_INDEX_ENABLED=(bool, True),
+    SEARCH_INDEX_NGRAM=(int, 3),
+    SEARCH_INDEX_REBUILD_INTERVAL=(int, 900),
+    SEARCH_MAX_RESULTS=(int, 50),
+    SYSTEM_SETTINGS_CACHE_ENABLED=(bool, True),
+    SYSTEM_SETTINGS_CACHE_CHECK_INTERVAL=(float, 1.0),
+    SYSTEM_SETTINGS_CACHE_MAX_AGE=(int, 300),
+    SYSTEM_SETTINGS_CACHE_BACKEND=(str, ''),
+    SYSTEM_SETTINGS_VERSION_FILE=(str, ''),
+    MAINTENANCE_RETRY_AFTER=(int, 300),
+    METRICS_ENABLED=(bool, True),
+    METRICS_DIR=(str, ''),
+    METRICS_FLUSH_INTERVAL=(float, 5.0),
+    METRICS_TOKEN=(str, ''),
+    MAINTENANCE_EXEMPT_PATHS=(list, [
+        '/api/health/',
+        '/api/licenses/validate_license/',
+        '/api/licenses/validate_batch/',
+        '/api/login/',
+        '/api/system/settings/',
+        '/api/metrics',
+        '/admin/',
+    ]),
+    LICENSE_USAGE_ROLLUP_LAG=(int, 900),
+    LICENSE_USAGE_ROLLUP_RAW_RETENTION_DAYS=(int, 0),
+    CLEAN_LOGS_MAX_BATCHES=(int, 20),
     CORS_ALLOW_CREDENTIALS=(bool, True),
+    LICENSE_CACHE_ENABLED=(bool, True),
+    LICENSE_CACHE_MAXSIZE=(int, 10000),
+    LICENSE_CACHE_TTL=(int, 30),
+    LICENSE_CACHE_BACKEND=(str, ''),
+    LICENSE_WRITE_BEHIND_ENABLED=(bool, True),
+    LICENSE_WRITE_BEHIND_MAX_BATCH=(int, 500),
+    LICENSE_WRITE_BEHIND_FLUSH_INTERVAL=(float, 2.0),
+    LICENSE_WRITE_BEHIND_MAX_PENDING=(int, 20000),
+    LICENSE_WRITE_BEHIND_SPOOL_DIR=(str, ''),
+    LICENSE_WRITE_BEHIND_SPOOL_FSYNC=(bool, False),
+    LICENSE_LAST_CHECK_COALESCE=(bool, True),
+    LICENSE_LAST_CHECK_FLUSH_INTERVAL=(float, 5.0),
+    LICENSE_LAST_CHECK_GRANULARITY=(int, 60),
+    LICENSE_BATCH_MAX_SIZE=(int, 1000),
+    LICENSE_BATCH_STREAM_CHUNK_SIZE=(int, 500),
+    LICENSE_KEY_FILTER_ENABLED=(bool, True),
+    LICENSE_KEY_FILTER_ERROR_RATE=(float, 0.001),
+    LICENSE_KEY_FILTER_REBUILD_INTERVAL=(int, 600),
+    LICENSE_FAST_PATH_ENABLED=(bool, True),
+    LICENSE_FAST_PATH_MAX_BODY_SIZE=(int, 65536),
+    LICENSE_LEASE_ENABLED=(bool, True),
+    LICENSE_LEASE_INTERVAL_TRIAL=(int, 3600),
+    LICENSE_LEASE_INTERVAL_STANDARD=(int, 6 * 3600),
+    LICENSE_LEASE_INTERVAL_PROFESSIONAL=(int, 12 * 3600),
+    LICENSE_LEASE_INTERVAL_ENTERPRISE=(int, 24 * 3600),
+    LICENSE_LEASE_MIN_INTERVAL=(int, 300),
+    LICENSE_LEASE_MAX_INTERVAL=(int, 24 * 3600),
+    LICENSE_LEASE_NEAR_EXPIRY_DAYS=(int, 7),
+    LICENSE_LEASE_NEAR_EXPIRY_INTERVAL=(int, 3600),
+    LICENSE_LEASE_GRACE_FACTOR=(float, 2.0),
+    LICENSE_LEASE_LOAD_TARGET=(float, 200.0),
+    LICENSE_LEASE_MAX_LOAD_STRETCH=(float, 4.0),
 )
 
 # 读取.env文件
@@ -50,6 +116,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    # 登录认证已改用 users.AuthToken；保留此应用是因为 users 的 0004 迁移需要从它的表中复制旧 Token
     'rest_framework.authtoken',
     'corsheaders',
     'customers',
@@ -60,8 +127,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'system.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'system.middleware.MaintenanceModeMiddleware',
+    'system.middleware.UploadSizeLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -152,14 +222,146 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': env('API_PAGE_SIZE')
 }
 
+# 登录 Token：按客户端签发，TTL 秒未使用即过期，使用中每 RENEW_INTERVAL 秒最多续期一次
+AUTH_TOKEN = {
+    'TTL': env('AUTH_TOKEN_TTL'),
+    'RENEW_INTERVAL': env('AUTH_TOKEN_RENEW_INTERVAL'),
+    'MAX_PER_USER': env('AUTH_TOKEN_MAX_PER_USER'),
+}
+
+# Token 认证缓存：Token 解析为用户和用户资料快照，命中时认证不查询数据库（见 users/authentication.py）
+AUTH_TOKEN_CACHE = {
+    'ENABLED': env('AUTH_TOKEN_CACHE_ENABLED'),
+    'TTL': env('AUTH_TOKEN_CACHE_TTL'),
+    'MAXSIZE': env('AUTH_TOKEN_CACHE_MAXSIZE'),
+}
+
+# 日志和使用记录的键集分页允许通过 page_size 参数指定的最大值
+API_MAX_PAGE_SIZE = env('API_MAX_PAGE_SIZE')
+
+# 统计接口缓存时间(秒)，缓存过期时并发请求只计算一次
+STATS_CACHE_TTL = env('STATS_CACHE_TTL')
+
+# 全局搜索（/api/search/）的进程内 n-gram 倒排索引，见 system/search_index.py
+SEARCH_INDEX = {
+    'ENABLED': env('SEARCH_INDEX_ENABLED'),
+    'NGRAM': env('SEARCH_INDEX_NGRAM'),
+    'REBUILD_INTERVAL': env('SEARCH_INDEX_REBUILD_INTERVAL'),
+    'MAX_RESULTS': env('SEARCH_MAX_RESULTS'),
+}
+
+# 系统设置进程内快照：每 CHECK_INTERVAL 秒检查一次共享版本号，变化时才重新读取
+# BACKEND 为 CACHES 中的别名，留空则通过 VERSION_FILE 的修改时间通知同一主机上的其他进程
+# （多主机部署必须配置 BACKEND，或把 VERSION_FILE 设为各主机共享的路径）
+SYSTEM_SETTINGS_CACHE = {
+    'ENABLED': env('SYSTEM_SETTINGS_CACHE_ENABLED'),
+    'CHECK_INTERVAL': env('SYSTEM_SETTINGS_CACHE_CHECK_INTERVAL'),
+    'MAX_AGE': env('SYSTEM_SETTINGS_CACHE_MAX_AGE'),
+    'BACKEND': env('SYSTEM_SETTINGS_CACHE_BACKEND'),
+    'VERSION_FILE': env('SYSTEM_SETTINGS_VERSION_FILE'),
+}
+
+# 维护模式（系统设置中开启）：除 EXEMPT_PATHS 前缀外的请求返回 503，Retry-After 为 RETRY_AFTER 秒
+MAINTENANCE_MODE = {
+    'RETRY_AFTER': env('MAINTENANCE_RETRY_AFTER'),
+    'EXEMPT_PATHS': env('MAINTENANCE_EXEMPT_PATHS'),
+}
+
+# 请求指标（/api/metrics，Prometheus 文本格式）
+# 多进程部署时 DIR 设为各进程共享的目录，每个进程每 FLUSH_INTERVAL 秒写入一次；
+# 抓取需带 Bearer TOKEN，TOKEN 为空时只在 DEBUG 下开放
+METRICS = {
+    'ENABLED': env('METRICS_ENABLED'),
+    'DIR': env('METRICS_DIR'),
+    'FLUSH_INTERVAL': env('METRICS_FLUSH_INTERVAL'),
+    'TOKEN': env('METRICS_TOKEN'),
+}
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = env.list('CORS_ALLOWED_ORIGINS')
 
 CORS_ALLOW_CREDENTIALS = env('CORS_ALLOW_CREDENTIALS')
+
+# 授权码验证缓存
+# BACKEND 为 CACHES 中的别名，用于多进程共享；留空则只使用进程内缓存
+LICENSE_CACHE = {
+    'ENABLED': env('LICENSE_CACHE_ENABLED'),
+    'MAXSIZE': env('LICENSE_CACHE_MAXSIZE'),
+    'TTL': env('LICENSE_CACHE_TTL'),
+    'BACKEND': env('LICENSE_CACHE_BACKEND'),
+}
+
+# 验证路径的使用记录/检查日志写后缓冲
+# SPOOL_DIR 非空时启用落盘模式，进程崩溃后未入库的记录可在重启时恢复
+LICENSE_WRITE_BEHIND = {
+    'ENABLED': env('LICENSE_WRITE_BEHIND_ENABLED'),
+    'MAX_BATCH': env('LICENSE_WRITE_BEHIND_MAX_BATCH'),
+    'FLUSH_INTERVAL': env('LICENSE_WRITE_BEHIND_FLUSH_INTERVAL'),
+    'MAX_PENDING': env('LICENSE_WRITE_BEHIND_MAX_PENDING'),
+    'SPOOL_DIR': env('LICENSE_WRITE_BEHIND_SPOOL_DIR'),
+    'SPOOL_FSYNC': env('LICENSE_WRITE_BEHIND_SPOOL_FSYNC'),
+}
+
+# License.last_check 合并更新
+# GRANULARITY 秒内的重复检查不再写库，last_check 的精度即为该值
+LICENSE_LAST_CHECK = {
+    'COALESCE': env('LICENSE_LAST_CHECK_COALESCE'),
+    'FLUSH_INTERVAL': env('LICENSE_LAST_CHECK_FLUSH_INTERVAL'),
+    'GRANULARITY': env('LICENSE_LAST_CHECK_GRANULARITY'),
+}
+
+# 批量验证接口
+# JSON 模式单次最多 MAX_SIZE 个授权码；NDJSON 流式模式每 STREAM_CHUNK_SIZE 行查询一次
+LICENSE_BATCH = {
+    'MAX_SIZE': env('LICENSE_BATCH_MAX_SIZE'),
+    'STREAM_CHUNK_SIZE': env('LICENSE_BATCH_STREAM_CHUNK_SIZE'),
+}
+
+# 授权码负向查找过滤器（布隆过滤器），一定不存在的授权码不访问数据库
+# 只在配置了 LICENSE_CACHE_BACKEND 时生效，否则其他进程新建的授权码会在重建前被误拒
+LICENSE_KEY_FILTER = {
+    'ENABLED': env('LICENSE_KEY_FILTER_ENABLED'),
+    'ERROR_RATE': env('LICENSE_KEY_FILTER_ERROR_RATE'),
+    'REBUILD_INTERVAL': env('LICENSE_KEY_FILTER_REBUILD_INTERVAL'),
+}
+
+# ASGI 部署时授权码验证的快速通道（见 licenses/asgi.py），WSGI 部署不受影响
+LICENSE_FAST_PATH = {
+    'ENABLED': env('LICENSE_FAST_PATH_ENABLED'),
+    'MAX_BODY_SIZE': env('LICENSE_FAST_PATH_MAX_BODY_SIZE'),
+}
+
+# 验证响应中的签名租约：按授权类型给出检查间隔，临近到期缩短，本进程负载超过 LOAD_TARGET（次/秒）时拉长；
+# 租约有效期不超过 MAX_INTERVAL，撤销最迟在 MAX_INTERVAL 秒后生效
+LICENSE_LEASE = {
+    'ENABLED': env('LICENSE_LEASE_ENABLED'),
+    'INTERVALS': {
+        'trial': env('LICENSE_LEASE_INTERVAL_TRIAL'),
+        'standard': env('LICENSE_LEASE_INTERVAL_STANDARD'),
+        'professional': env('LICENSE_LEASE_INTERVAL_PROFESSIONAL'),
+        'enterprise': env('LICENSE_LEASE_INTERVAL_ENTERPRISE'),
+    },
+    'MIN_INTERVAL': env('LICENSE_LEASE_MIN_INTERVAL'),
+    'MAX_INTERVAL': env('LICENSE_LEASE_MAX_INTERVAL'),
+    'NEAR_EXPIRY_DAYS': env('LICENSE_LEASE_NEAR_EXPIRY_DAYS'),
+    'NEAR_EXPIRY_INTERVAL': env('LICENSE_LEASE_NEAR_EXPIRY_INTERVAL'),
+    'GRACE_FACTOR': env('LICENSE_LEASE_GRACE_FACTOR'),
+    'LOAD_TARGET': env('LICENSE_LEASE_LOAD_TARGET'),
+    'MAX_LOAD_STRETCH': env('LICENSE_LEASE_MAX_LOAD_STRETCH'),
+}
+
+# 使用记录小时/日汇总：时间段结束 LAG 秒后才汇总；RAW_RETENTION_DAYS 大于 0 时已汇总的原始记录提前清理
+LICENSE_USAGE_ROLLUP = {
+    'LAG': env('LICENSE_USAGE_ROLLUP_LAG'),
+    'RAW_RETENTION_DAYS': env('LICENSE_USAGE_ROLLUP_RAW_RETENTION_DAYS'),
+}
+
+# 系统设置中“清理日志”每次请求最多删除的批数（每批 5000 个主键区间），未删完时响应 has_more 为 true
+CLEAN_LOGS_MAX_BATCHES = env('CLEAN_LOGS_MAX_BATCHES')
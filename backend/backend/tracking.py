@@ -0,0 +1,24 @@
+"""
+记录模型实例从数据库加载时的字段值
+"""
+
+
+class LoadedValuesMixin:
+    """从数据库加载时把 tracked_fields 的值记在 _loaded_values 中，保存后据此判断字段变化
+
+    在 from_db 中记录，只有从数据库加载的实例才有这点开销，也不经过 post_init 信号；
+    新建或手动构造的实例没有 _loaded_values，延迟加载的字段不在其中。
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = instance.__dict__
+        instance._loaded_values = {name: loaded[name] for name in cls.tracked_fields if name in loaded}
+        return instance
+
+    def remember_loaded_values(self):
+        """保存后调用：以当前值作为下一次比较的基准"""
+        self._loaded_values = {name: getattr(self, name) for name in self.tracked_fields}
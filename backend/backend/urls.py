@@ -7,16 +7,16 @@ from rest_framework.routers import DefaultRouter
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
-from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from rest_framework import status
 
 # 导入视图集
-from customers.views import CustomerViewSet
+from customers.views import CustomerViewSet, LicenseKeyViewSet
 from environments.views import EnvironmentViewSet, EnvironmentLogViewSet
 from users.views import UserViewSet, UserActivityLogViewSet
+from users.tokens import issue_token
 from licenses.views import LicenseViewSet, LicenseUsageViewSet, LicenseLogViewSet
-from system.views import get_settings, update_settings, get_system_info, backup_database, clean_logs
+from system.views import get_settings, update_settings, get_system_info, backup_database, clean_logs, dashboard_summary, global_search, metrics
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -42,7 +42,9 @@ def login_view(request):
     
     user = authenticate(username=username, password=password)
     if user:
-        token, created = Token.objects.get_or_create(user=user)
+        # 每个客户端单独签发 Token，登出只影响当前客户端
+        client = request.data.get('client') or request.META.get('HTTP_USER_AGENT', '')
+        token = issue_token(user, client=str(client))
         
         # 获取用户资料
         profile_data = {}
@@ -63,6 +65,7 @@ def login_view(request):
         
         return Response({
             'token': token.key,
+            'expires_at': token.expires_at,
             'user': {
                 'id': user.id,
                 'username': user.username,
@@ -81,7 +84,7 @@ def login_view(request):
 def logout_view(request):
     """用户登出API"""
     try:
-        request.user.auth_token.delete()
+        request.auth.delete()
     except:
         pass
     return Response({'message': '登出成功'})
@@ -89,6 +92,7 @@ def logout_view(request):
 # 配置DRF路由
 router = DefaultRouter()
 router.register(r'customers', CustomerViewSet)
+router.register(r'license-keys', LicenseKeyViewSet)
 router.register(r'environments', EnvironmentViewSet)
 router.register(r'environment-logs', EnvironmentLogViewSet)
 router.register(r'users', UserViewSet)
@@ -108,5 +112,8 @@ urlpatterns = [
     path('api/system/info/', get_system_info, name='system_info'),
     path('api/system/backup/', backup_database, name='backup_database'),
     path('api/system/clean-logs/', clean_logs, name='clean_logs'),
+    path('api/dashboard/summary/', dashboard_summary, name='dashboard_summary'),
+    path('api/search/', global_search, name='global_search'),
+    path('api/metrics', metrics, name='metrics'),
     path('api-auth/', include('rest_framework.urls')),  # DRF登录界面
 ]
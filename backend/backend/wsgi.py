@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+from licenses.bloom import license_key_filter  # noqa: E402
+
+# 启动时在后台构建授权码过滤器
+license_key_filter.warm_up()
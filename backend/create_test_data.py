@@ -179,7 +179,7 @@ def create_test_data():
         print(f"创建操作日志: {data['action']}")
     
     # 创建系统设置
-    settings = SystemSettings.get_settings()
+    settings = SystemSettings.load()
     settings.admin_email = 'admin@example.com'
     settings.site_name = 'Odoo SaaS 管理平台'
     settings.site_description = '用于管理 Odoo SaaS 部署的综合管理平台'
@@ -1,7 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
+from backend.tracking import LoadedValuesMixin
 
-class Customer(models.Model):
+class Customer(LoadedValuesMixin, models.Model):
     DEPLOYMENT_TYPES = [
         ('online', '在线部署'),
         ('offline', '离线部署'),
@@ -14,6 +15,9 @@ class Customer(models.Model):
         ('trial', '试用'),
     ]
     
+    # 影响平台计数器的字段，加载时记下原值（见 system/counters.py）
+    tracked_fields = ('status', 'deployment_type')
+    
     # 基本信息
     customer_id = models.CharField(max_length=50, unique=True, verbose_name='客户ID')
     name = models.CharField(max_length=100, verbose_name='客户名称')
@@ -63,12 +67,30 @@ class Customer(models.Model):
     def is_active(self):
         return self.status == 'active'
 
+    # 列表/详情查询会注解 num_* 计数（见 CustomerViewSet.get_queryset），未注解时再单独统计
     @property
     def environments_count(self):
+        if hasattr(self, 'num_environments'):
+            return self.num_environments
         return self.environments.count()
 
-class LicenseKey(models.Model):
+    @property
+    def licenses_count(self):
+        if hasattr(self, 'num_licenses'):
+            return self.num_licenses
+        return self.licenses.count()
+
+    @property
+    def active_license_keys_count(self):
+        if hasattr(self, 'num_active_license_keys'):
+            return self.num_active_license_keys
+        return self.license_keys.filter(is_active=True).count()
+
+class LicenseKey(LoadedValuesMixin, models.Model):
     """离线授权码管理"""
+    # 影响平台计数器的字段，加载时记下原值（见 system/counters.py）
+    tracked_fields = ('is_active',)
+
     customer = models.ForeignKey(
         Customer, 
         on_delete=models.CASCADE, 
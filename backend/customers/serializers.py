@@ -3,6 +3,8 @@ from .models import Customer, LicenseKey
 
 class CustomerSerializer(serializers.ModelSerializer):
     environments_count = serializers.ReadOnlyField()
+    licenses_count = serializers.ReadOnlyField()
+    active_license_keys_count = serializers.ReadOnlyField()
     is_active = serializers.ReadOnlyField()
     
     class Meta:
@@ -10,7 +12,8 @@ class CustomerSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'customer_id', 'name', 'company', 'contact_email', 'contact_phone',
             'deployment_type', 'status', 'contract_start_date', 'contract_end_date',
-            'notes', 'created_at', 'updated_at', 'environments_count', 'is_active'
+            'notes', 'created_at', 'updated_at', 'environments_count', 'licenses_count',
+            'active_license_keys_count', 'is_active'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
@@ -40,8 +43,8 @@ class LicenseKeySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'usage_count']
 
 class CustomerDetailSerializer(CustomerSerializer):
-    """客户详情序列化器，包含关联的授权码和环境信息"""
-    license_keys = LicenseKeySerializer(many=True, read_only=True)
+    """客户详情序列化器，包含最近的离线授权码（数量有上限，完整列表见 /api/license-keys/?customer=）"""
+    license_keys = LicenseKeySerializer(source='recent_license_keys', many=True, read_only=True)
     
     class Meta(CustomerSerializer.Meta):
         fields = CustomerSerializer.Meta.fields + ['license_keys']
@@ -1,3 +1,77 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+
+from backend.caching import stats_cache
+from environments.models import Environment
+from licenses.models import License
+from system.counters import reconcile
+from system.settings_cache import system_settings
+from .models import Customer, LicenseKey
+
+
+class CustomerStatsQueryTests(TestCase):
+    """客户统计接口的查询次数：缓存未命中时只读取一次计数器行，命中时不查询数据库"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='tester')
+        reconcile()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        stats_cache.clear()
+        # 预热系统设置快照，中间件不再查询
+        system_settings.get()
+
+    def test_stats_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/customers/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_customers'], 0)
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/customers/stats/')
+        self.assertEqual(cached.data, response.data)
+
+
+class CustomerListQueryTests(TestCase):
+    """客户列表的查询次数不随每页条数变化（关联计数由子查询注解）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='tester')
+        expire_date = timezone.now().date() + timedelta(days=30)
+        for i in range(6):
+            customer = Customer.objects.create(
+                customer_id=f'C{i}', name=f'客户{i}', contact_email=f'c{i}@example.com',
+            )
+            Environment.objects.create(customer=customer, release_name=f'odoo-{i}', admin_password='admin')
+            License.objects.create(
+                customer=customer, license_type='standard',
+                valid_from=timezone.now(), valid_until=timezone.now() + timedelta(days=30),
+            )
+            LicenseKey.objects.create(customer=customer, license_code=f'KEY-{i}', expire_date=expire_date)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        system_settings.get()
+
+    def test_list_queries_constant(self):
+        for page_size in (2, 6):
+            with mock.patch.object(PageNumberPagination, 'page_size', page_size):
+                # 总数查询 + 当前页查询
+                with self.assertNumQueries(2):
+                    response = self.client.get('/api/customers/')
+            self.assertEqual(len(response.data['results']), page_size)
+            first = response.data['results'][0]
+            self.assertEqual(first['environments_count'], 1)
+            self.assertEqual(first['licenses_count'], 1)
+            self.assertEqual(first['active_license_keys_count'], 1)
 
-# Create your tests here.
@@ -1,13 +1,44 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from backend.caching import stats_cache
+from backend.search import search_queryset
+from system.counters import customer_stats
+from environments.models import Environment
+from licenses.models import License
 from .models import Customer, LicenseKey
 from .serializers import (
     CustomerSerializer, CustomerCreateSerializer, CustomerDetailSerializer,
     LicenseKeySerializer
 )
 
+# 客户详情中内嵌的离线授权码数量上限
+DETAIL_LICENSE_KEYS_LIMIT = 50
+
+
+def count_subquery(queryset):
+    """按客户统计关联行数的相关子查询，避免多个 Count 连接相乘"""
+    counts = (
+        queryset.filter(customer=OuterRef('pk'))
+        .order_by()
+        .values('customer')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def annotate_counts(queryset):
+    """注解 CustomerSerializer 用到的关联计数（environments_count 等），序列化时不再逐个客户查询"""
+    return queryset.annotate(
+        num_environments=count_subquery(Environment.objects.all()),
+        num_licenses=count_subquery(License.objects.all()),
+        num_active_license_keys=count_subquery(LicenseKey.objects.filter(is_active=True)),
+    )
+
+
 class CustomerViewSet(viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     permission_classes = [permissions.IsAuthenticated]
@@ -20,16 +51,19 @@ class CustomerViewSet(viewsets.ModelViewSet):
         return CustomerSerializer
     
     def get_queryset(self):
-        queryset = Customer.objects.all()
+        queryset = annotate_counts(Customer.objects.all())
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(Prefetch(
+                'license_keys',
+                queryset=LicenseKey.objects.order_by('-created_at')[:DETAIL_LICENSE_KEYS_LIMIT],
+                to_attr='recent_license_keys',
+            ))
         
         # 搜索功能
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(customer_id__icontains=search) |
-                Q(name__icontains=search) |
-                Q(company__icontains=search) |
-                Q(contact_email__icontains=search)
+            queryset = search_queryset(
+                queryset, search, fields=['customer_id', 'name', 'company', 'contact_email'],
             )
         
         # 状态过滤
@@ -83,19 +117,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """获取客户统计信息"""
-        total_customers = Customer.objects.count()
-        active_customers = Customer.objects.filter(status='active').count()
-        online_customers = Customer.objects.filter(deployment_type='online').count()
-        offline_customers = Customer.objects.filter(deployment_type='offline').count()
-        
-        return Response({
-            'total_customers': total_customers,
-            'active_customers': active_customers,
-            'online_customers': online_customers,
-            'offline_customers': offline_customers,
-            'trial_customers': Customer.objects.filter(status='trial').count(),
-            'expired_customers': Customer.objects.filter(status='expired').count(),
-        })
+        return Response(stats_cache.get_or_compute('customers', customer_stats))
 
 class LicenseKeyViewSet(viewsets.ModelViewSet):
     queryset = LicenseKey.objects.all()
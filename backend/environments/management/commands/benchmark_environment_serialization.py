@@ -0,0 +1,87 @@
+"""
+环境列表序列化基准测试
+运行命令：python manage.py benchmark_environment_serialization --count 1000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from customers.models import Customer
+from environments.models import Environment
+from environments.serializers import EnvironmentSerializer
+from environments.views import EnvironmentViewSet
+
+
+class Command(BaseCommand):
+    help = '对比环境列表完整字段、精简字段和 ?fields= 的响应大小与查询+序列化耗时（测试数据会回滚）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help='测试环境个数')
+        parser.add_argument('--rounds', type=int, default=5, help='每种方式的重复次数，取最快一次')
+        parser.add_argument('--fields', default='id,release_name,status,domain', help='?fields= 方式使用的字段')
+
+    def handle(self, *args, **options):
+        self.factory = APIRequestFactory()
+        self.rounds = options['rounds']
+        count = options['count']
+
+        with transaction.atomic():
+            ids = self.create_environments(count)
+            cases = [
+                ('完整字段(改动前)', None, {}),
+                ('精简列表(默认)', EnvironmentViewSet, {}),
+                (f"?fields={options['fields']}", EnvironmentViewSet, {'fields': options['fields']}),
+            ]
+            baseline = None
+            for label, viewset, params in cases:
+                size, elapsed = self.measure(viewset, params, ids)
+                baseline = baseline or (size, elapsed)
+                self.stdout.write(
+                    f'{label}: {count} 个环境, {size / 1024:.1f} KiB '
+                    f'({size / baseline[0]:.0%}), {elapsed * 1000:.1f}ms ({elapsed / baseline[1]:.0%})'
+                )
+            transaction.set_rollback(True)
+
+    def create_environments(self, count):
+        customer = Customer.objects.create(
+            customer_id='benchmark-customer', name='基准测试客户', contact_email='benchmark@example.com',
+        )
+        environments = []
+        for index in range(count):
+            environment = Environment(
+                customer=customer,
+                release_name=f'benchmark-{index}',
+                namespace='benchmark',
+                domain=f'benchmark-{index}.example.com',
+                admin_password='benchmark',
+                git_customer_addons=[{'name': 'addons', 'repository': 'git@example.com:addons.git', 'ref': '18.0'}],
+            )
+            environment.generate_helm_values()
+            environments.append(environment)
+        Environment.objects.bulk_create(environments, batch_size=500)
+        return list(Environment.objects.filter(customer=customer).values_list('id', flat=True))
+
+    def build_serializer(self, viewset, params, ids):
+        if viewset is None:
+            # 改动前的列表：完整序列化器 + 读取全部列
+            queryset = Environment.objects.select_related('customer').filter(id__in=ids)
+            return EnvironmentSerializer(queryset, many=True)
+        request = self.factory.get('/api/environments/', params)
+        view = viewset(action='list', format_kwarg=None, kwargs={}, request=Request(request))
+        queryset = view.get_queryset().filter(id__in=ids)
+        return view.get_serializer(queryset, many=True)
+
+    def measure(self, viewset, params, ids):
+        best = None
+        size = 0
+        for _ in range(self.rounds):
+            started = time.perf_counter()
+            serializer = self.build_serializer(viewset, params, ids)
+            size = len(JSONRenderer().render(serializer.data))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return size, best
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('environments', '0002_remove_environment_git_repositories_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='environmentlog',
+            index=models.Index(fields=['created_at', 'id'], name='env_log_created_id_idx'),
+        ),
+    ]
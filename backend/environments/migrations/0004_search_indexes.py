@@ -0,0 +1,19 @@
+"""
+PostgreSQL 上为 search= 用到的列创建 pg_trgm GIN 索引，其他数据库为空操作
+"""
+from django.db import migrations
+
+from backend.search import trigram_indexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY 不能在事务中执行
+    atomic = False
+
+    dependencies = [
+        ('environments', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        trigram_indexes('environments_environment', ['release_name', 'domain']),
+    ]
@@ -1,8 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
+from backend.tracking import LoadedValuesMixin
 from customers.models import Customer
 
-class Environment(models.Model):
+class Environment(LoadedValuesMixin, models.Model):
     STATUS_CHOICES = [
         ('running', '运行中'),
         ('stopped', '已停止'),
@@ -11,6 +12,9 @@ class Environment(models.Model):
         ('unknown', '未知'),
     ]
     
+    # 影响平台计数器的字段，加载时记下原值（见 system/counters.py）
+    tracked_fields = ('status',)
+    
     # 关联信息
     customer = models.ForeignKey(
         Customer, 
@@ -286,6 +290,10 @@ class EnvironmentLog(models.Model):
         verbose_name = '环境日志'
         verbose_name_plural = '环境日志'
         ordering = ['-created_at']
+        indexes = [
+            # 键集分页
+            models.Index(fields=['created_at', 'id'], name='env_log_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.environment.release_name} - {self.get_log_type_display()}"
@@ -1,8 +1,16 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from backend.serializers import SparseFieldsetMixin
 from .models import Environment, EnvironmentLog
 from customers.serializers import CustomerSerializer
 
-class EnvironmentSerializer(serializers.ModelSerializer):
+# 属性字段依赖的模型字段，用于按字段集计算 QuerySet.only()
+ENVIRONMENT_FIELD_DEPENDENCIES = {
+    'is_running': ['status'],
+    'access_url': ['domain', 'tls_enabled'],
+}
+
+class EnvironmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     customer_name = serializers.CharField(source='customer.name', read_only=True)
     is_running = serializers.ReadOnlyField()
     access_url = serializers.ReadOnlyField()
@@ -50,6 +58,7 @@ class EnvironmentSerializer(serializers.ModelSerializer):
             'is_running', 'access_url', 'helm_values'
         ]
         read_only_fields = ['created_at', 'updated_at', 'last_health_check', 'deployed_at', 'helm_values']
+        field_dependencies = ENVIRONMENT_FIELD_DEPENDENCIES
 
     def validate_release_name(self, value):
         """验证Release名称格式"""
@@ -89,6 +98,24 @@ class EnvironmentSerializer(serializers.ModelSerializer):
         
         return data
 
+class EnvironmentListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """环境列表序列化器，只包含列表页展示的字段；需要其他字段时用 ?fields= 指定"""
+    customer_name = serializers.CharField(source='customer.name', read_only=True)
+    is_running = serializers.ReadOnlyField()
+    access_url = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = Environment
+        fields = [
+            'id', 'customer', 'customer_name',
+            'release_name', 'namespace', 'domain', 'odoo_version',
+            'cpu_limit', 'memory_limit', 'storage_size',
+            'status', 'last_health_check', 'created_at', 'updated_at',
+            'is_running', 'access_url'
+        ]
+        read_only_fields = fields
+        field_dependencies = ENVIRONMENT_FIELD_DEPENDENCIES
+
 class EnvironmentCreateSerializer(EnvironmentSerializer):
     """创建环境时的序列化器"""
     
@@ -115,9 +142,14 @@ class EnvironmentLogSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
 
 class EnvironmentDetailSerializer(EnvironmentSerializer):
-    """环境详情序列化器，包含客户信息和操作日志"""
+    """环境详情序列化器，包含客户信息和最近的操作日志（完整日志见 logs_url）"""
     customer_detail = CustomerSerializer(source='customer', read_only=True)
-    logs = EnvironmentLogSerializer(many=True, read_only=True)
+    logs = EnvironmentLogSerializer(source='recent_logs', many=True, read_only=True)
+    logs_url = serializers.SerializerMethodField()
     
     class Meta(EnvironmentSerializer.Meta):
-        fields = EnvironmentSerializer.Meta.fields + ['customer_detail', 'logs']
+        fields = EnvironmentSerializer.Meta.fields + ['customer_detail', 'logs', 'logs_url']
+    
+    def get_logs_url(self, obj):
+        url = reverse('environmentlog-list', request=self.context.get('request'))
+        return f'{url}?environment={obj.pk}'
@@ -1,3 +1,66 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from backend.caching import stats_cache
+from system.counters import reconcile
+from system.settings_cache import system_settings
+from customers.models import Customer
+from .models import Environment, EnvironmentLog
+
+
+class EnvironmentStatsQueryTests(TestCase):
+    """环境统计接口的查询次数：缓存未命中时只读取一次计数器行，命中时不查询数据库"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='tester')
+        reconcile()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        stats_cache.clear()
+        # 预热系统设置快照，中间件不再查询
+        system_settings.get()
+
+    def test_stats_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/environments/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_environments'], 0)
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/environments/stats/')
+        self.assertEqual(cached.data, response.data)
+
+
+class EnvironmentDetailQueryTests(TestCase):
+    """环境详情的查询次数不随日志条数变化（带关联计数的客户和最近日志各预取一次）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='tester')
+        customer = Customer.objects.create(customer_id='C1', name='客户', contact_email='c@example.com')
+        cls.environment = Environment.objects.create(
+            customer=customer, release_name='odoo-1', admin_password='admin',
+        )
+        EnvironmentLog.objects.bulk_create(
+            EnvironmentLog(
+                environment=cls.environment, log_type='deploy', message=f'日志{i}',
+                status='success', created_by=cls.user,
+            )
+            for i in range(30)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        system_settings.get()
+
+    def test_detail_queries(self):
+        # 环境 + 客户（含关联计数）+ 最近日志
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/environments/{self.environment.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['logs']), 20)
+        self.assertEqual(response.data['customer_detail']['environments_count'], 1)
@@ -1,13 +1,24 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Prefetch
+from backend.caching import stats_cache
+from backend.pagination import KeysetPagination
+from backend.search import search_queryset
+from backend.serializers import FIELDS_QUERY_PARAM
+from customers.models import Customer
+from customers.views import annotate_counts
+from system.counters import environment_stats
 from .models import Environment, EnvironmentLog
 from .serializers import (
-    EnvironmentSerializer, EnvironmentCreateSerializer, EnvironmentDetailSerializer,
-    EnvironmentLogSerializer
+    EnvironmentSerializer, EnvironmentListSerializer, EnvironmentCreateSerializer,
+    EnvironmentDetailSerializer, EnvironmentLogSerializer
 )
 
+# 环境详情中内嵌的最近日志条数，完整日志通过 logs_url 分页获取
+DETAIL_LOGS_LIMIT = 20
+
+
 class EnvironmentViewSet(viewsets.ModelViewSet):
     queryset = Environment.objects.all()
     permission_classes = [permissions.IsAuthenticated]
@@ -17,18 +28,36 @@ class EnvironmentViewSet(viewsets.ModelViewSet):
             return EnvironmentCreateSerializer
         elif self.action == 'retrieve':
             return EnvironmentDetailSerializer
+        elif self.action == 'list' and FIELDS_QUERY_PARAM not in self.request.query_params:
+            # 列表默认使用精简字段集，?fields= 可从完整字段中任选
+            return EnvironmentListSerializer
         return EnvironmentSerializer
     
     def get_queryset(self):
         queryset = Environment.objects.select_related('customer').all()
+        if self.action in ('list', 'retrieve'):
+            # 只读取当前字段集用到的列，列表默认不再读取 helm_values 等大字段
+            only_fields = self.get_serializer().get_only_fields()
+            if only_fields is not None:
+                queryset = queryset.only('customer', *only_fields)
+        if self.action == 'retrieve':
+            # 详情内嵌的客户信息带关联计数，改为预取注解过的客户；
+            # 切片 Prefetch 由数据库窗口函数按环境各取最近 N 条
+            queryset = queryset.select_related(None).prefetch_related(
+                Prefetch('customer', queryset=annotate_counts(Customer.objects.all())),
+                Prefetch(
+                    'logs',
+                    queryset=EnvironmentLog.objects.select_related('created_by')
+                    .order_by('-created_at', '-id')[:DETAIL_LOGS_LIMIT],
+                    to_attr='recent_logs',
+                ),
+            )
         
         # 搜索功能
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(release_name__icontains=search) |
-                Q(domain__icontains=search) |
-                Q(customer__name__icontains=search)
+            queryset = search_queryset(
+                queryset, search, fields=['release_name', 'domain', 'customer__name'],
             )
         
         # 状态过滤
@@ -139,23 +168,14 @@ class EnvironmentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """获取环境统计信息"""
-        total_environments = Environment.objects.count()
-        running_environments = Environment.objects.filter(status='running').count()
-        stopped_environments = Environment.objects.filter(status='stopped').count()
-        error_environments = Environment.objects.filter(status='error').count()
-        
-        return Response({
-            'total_environments': total_environments,
-            'running_environments': running_environments,
-            'stopped_environments': stopped_environments,
-            'error_environments': error_environments,
-            'pending_environments': Environment.objects.filter(status='pending').count(),
-        })
+        return Response(stats_cache.get_or_compute('environments', environment_stats))
 
 class EnvironmentLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = EnvironmentLog.objects.all()
     serializer_class = EnvironmentLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         queryset = EnvironmentLog.objects.select_related('environment', 'created_by').all()
@@ -9,7 +9,8 @@ class LicenseAdmin(admin.ModelAdmin):
     ]
     list_filter = ['license_type', 'status', 'issued_at']
     search_fields = ['license_key', 'customer__name', 'deployment_domain']
-    readonly_fields = ['license_key', 'issued_at', 'activated_at', 'last_check']
+    readonly_fields = ['license_key', 'issued_at', 'activated_at', 'last_check', 'leases_revoked_at']
+    actions = ['revoke_leases']
     
     fieldsets = (
         ('基本信息', {
@@ -19,7 +20,7 @@ class LicenseAdmin(admin.ModelAdmin):
             'fields': ('max_users', 'max_companies', 'max_storage_gb', 'modules_enabled')
         }),
         ('时间设置', {
-            'fields': ('valid_from', 'valid_until', 'issued_at', 'activated_at', 'last_check')
+            'fields': ('valid_from', 'valid_until', 'issued_at', 'activated_at', 'last_check', 'leases_revoked_at')
         }),
         ('部署信息', {
             'fields': ('hardware_fingerprint', 'deployment_domain', 'deployment_ip'),
@@ -31,6 +32,12 @@ class LicenseAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='撤销已签发的验证租约')
+    def revoke_leases(self, request, queryset):
+        for license in queryset:
+            license.revoke_leases()
+        self.message_user(request, f'已撤销 {len(queryset)} 个授权码的验证租约')
+
 @admin.register(LicenseUsage)
 class LicenseUsageAdmin(admin.ModelAdmin):
     list_display = [
@@ -5,3 +5,6 @@ class LicensesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'licenses'
     verbose_name = '授权码管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,166 @@
+"""
+授权码验证的轻量 ASGI 快速通道
+
+validate_license 的调用方是 Odoo 实例，不需要会话、CSRF、消息等中间件，也不需要
+DRF 的内容协商。这里用一个最小的 ASGI 应用直接处理 POST /api/licenses/validate_license/：
+快速 JSON 解码、Token 认证缓存（与 DRF 认证共用，见 users/authentication.py）、授权码读穿缓存、写后缓冲，
+响应内容与 DRF 版本完全一致。其他请求交给 Django 处理（见 backend/asgi.py）。
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from users.authentication import cached_principal, check_token
+from .cache import license_cache
+from .serializers import LicenseValidateSerializer
+from .validation import validation_payload, record_checks
+from .writebehind import write_behind, last_check_updater
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选依赖
+    orjson = None
+
+VALIDATE_PATH = '/api/licenses/validate_license/'
+
+
+def _loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def _isoformat(value):
+    # 与 DRF JSONEncoder 的日期时间格式保持一致
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _parse(data):
+    """用 LicenseValidateSerializer 校验请求（规则与 DRF 接口完全一致），返回 (数据, 错误)"""
+    serializer = LicenseValidateSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    return serializer.validated_data, None
+
+
+def _database(func):
+    """在线程池中执行涉及数据库的操作。
+
+    快速通道不发送 request_started / request_finished，这里在前后各调用一次
+    close_old_connections，与 Django 请求生命周期一样关闭超过 CONN_MAX_AGE 或出错的连接。
+    """
+    def call(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(call)
+
+
+async def _read_body(receive, max_size):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if len(body) > max_size:
+            return False
+        if not message.get('more_body'):
+            return bytes(body)
+
+
+async def _respond(send, status, data, headers=()):
+    body = _dumps(data)
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+# 与 DRF TokenAuthentication.authenticate_header 一致
+UNAUTHORIZED_HEADERS = [(b'www-authenticate', b'Token')]
+
+
+async def license_validation_app(scope, receive, send):
+    """POST /api/licenses/validate_license/ 的 ASGI 应用"""
+    headers = dict(scope['headers'])
+
+    authorization = headers.get(b'authorization', b'').decode('latin-1').split()
+    if len(authorization) != 2 or authorization[0].lower() != 'token':
+        return await _respond(
+            send, 401, {'detail': 'Authentication credentials were not provided.'}, UNAUTHORIZED_HEADERS,
+        )
+    token_key = authorization[1]
+    # 与 DRF 认证相同的判断（存在、未停用、未过期，需要时续期）；缓存可直接使用时不切换线程
+    if cached_principal(token_key) is None:
+        _, error = await _database(check_token)(token_key)
+        if error is not None:
+            return await _respond(send, 401, {'detail': str(error)}, UNAUTHORIZED_HEADERS)
+
+    body = await _read_body(receive, settings.LICENSE_FAST_PATH['MAX_BODY_SIZE'])
+    if body is None:
+        return
+    if body is False:
+        return await _respond(send, 413, {'detail': 'Request body too large.'})
+    try:
+        data, errors = _parse(_loads(body))
+    except ValueError:
+        return await _respond(send, 400, {'detail': 'JSON parse error.'})
+    if errors:
+        return await _respond(send, 400, errors)
+
+    # 进程内缓存命中时不切换线程
+    license_key = data['license_key']
+    snapshot = license_cache.local.get(license_key) if license_cache.enabled else None
+    if snapshot is None:
+        snapshot = await _database(license_cache.get)(license_key)
+    if snapshot is None:
+        return await _respond(send, 404, {'valid': False, 'error': '授权码不存在'})
+
+    now = timezone.now()
+    client = scope.get('client')
+    ip_address = client[0] if client else None
+    user_agent = headers.get(b'user-agent', b'').decode('latin-1')
+    checks = [(snapshot['id'], data)]
+    # 每次验证写入使用记录和检查日志各一条
+    if write_behind.can_enqueue_nonblocking(2 * len(checks)) and last_check_updater.enabled:
+        # 只写内存队列：不做文件 I/O，队列满了也不在事件循环中同步刷新
+        record_checks(checks, ip_address, user_agent, now, flush_when_full=False)
+    else:
+        # 落盘模式、尚未启动（需要崩溃恢复）或队列将满时，在线程池中执行
+        await _database(record_checks)(checks, ip_address, user_agent, now)
+
+    payload = validation_payload(snapshot, now, data.get('lease_token'))
+    payload['valid_until'] = _isoformat(payload['valid_until'])
+    lease = payload.get('lease')
+    if lease and lease['expires_at'] is not None:
+        lease['expires_at'] = _isoformat(lease['expires_at'])
+    await _respond(send, 200, payload)
+
+
+def is_fast_path(scope):
+    return (
+        scope['type'] == 'http'
+        and scope['method'] == 'POST'
+        and scope['path'] == VALIDATE_PATH
+    )
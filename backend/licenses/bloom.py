@@ -0,0 +1,226 @@
+"""
+授权码负向查找过滤器
+
+用布隆过滤器保存全部 License.license_key，过滤器判定"一定不存在"的授权码直接拒绝，
+不再访问数据库。过滤器在服务启动时（backend/wsgi.py、backend/asgi.py）于后台构建，
+构建完成前所有授权码都放行；新建授权码通过 post_save 信号加入，并按 REBUILD_INTERVAL
+定期重建以清除已删除的授权码。
+
+其他进程新建的授权码要等到本进程下一次重建才会加入过滤器，因此过滤器只在配置了共享缓存
+（LICENSE_CACHE_BACKEND）时生效：新建信号同时在共享缓存中写入标记，被过滤器拒绝的授权码
+会再查一次该标记，不会误拒其他进程刚创建的授权码。未配置共享缓存时过滤器不拒绝任何授权码。
+"""
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """定长位数组的布隆过滤器"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def false_positive_rate(self):
+        """按当前元素数估算的误判率"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class LicenseKeyFilter:
+    """授权码负向查找过滤器"""
+
+    marker_prefix = 'license:new:'
+
+    def __init__(self, enabled=True, error_rate=0.001, rebuild_interval=600, headroom=2.0):
+        self.enabled = enabled
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        # 容量按当前授权码数的倍数预留，给重建间隔内新增的授权码留出空间
+        self.headroom = headroom
+
+        self.bloom = None
+        self.built_at = None
+        self.build_seconds = None
+        self.rebuilds = 0
+        self.rejected = 0
+        self.passed = 0
+        self.rescued = 0
+        self._lock = threading.Lock()
+        self._building = False
+        # 构建期间新增的授权码，构建完成后补入新过滤器
+        self._added_during_build = None
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'LICENSE_KEY_FILTER', {})
+        return cls(
+            enabled=options.get('ENABLED', True),
+            error_rate=options.get('ERROR_RATE', 0.001),
+            rebuild_interval=options.get('REBUILD_INTERVAL', 600),
+        )
+
+    @property
+    def active(self):
+        """启用且配置了共享缓存时才拒绝授权码"""
+        return self.enabled and self._backend() is not None
+
+    def warm_up(self):
+        """服务启动时在后台构建过滤器"""
+        if not self.enabled:
+            return
+        if not self.active:
+            logger.warning('未配置 LICENSE_CACHE_BACKEND，授权码过滤器不生效（多进程下无法同步新建的授权码）')
+            return
+        self._ensure_fresh()
+
+    def after_fork_in_child(self):
+        # 父进程中的构建线程不会出现在子进程里，继承的 _building 需要清除
+        self._lock = threading.Lock()
+        self._building = False
+        self._added_during_build = None
+
+    def rebuild(self):
+        """从数据库重建过滤器"""
+        from .models import License
+
+        started = time.perf_counter()
+        with self._lock:
+            self._added_during_build = []
+        count = License.objects.count()
+        bloom = BloomFilter(int(count * self.headroom) + 1000, self.error_rate)
+        keys = License.objects.order_by().values_list('license_key', flat=True)
+        for license_key in keys.iterator(chunk_size=5000):
+            bloom.add(license_key)
+        with self._lock:
+            for license_key in self._added_during_build:
+                bloom.add(license_key)
+            self._added_during_build = None
+            self.bloom = bloom
+            self.built_at = time.time()
+            self.build_seconds = time.perf_counter() - started
+            self.rebuilds += 1
+        return bloom
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('授权码过滤器重建失败')
+        finally:
+            self._building = False
+            close_old_connections()
+
+    def _ensure_fresh(self):
+        stale = self.bloom is None or time.time() - self.built_at > self.rebuild_interval
+        if not stale or self._building:
+            return
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(
+            target=self._rebuild_in_background, name='license-key-filter', daemon=True
+        ).start()
+
+    def might_exist(self, license_key):
+        """过滤器判定授权码可能存在时返回 True；返回 False 表示一定不存在"""
+        if not self.active:
+            return True
+        self._ensure_fresh()
+        bloom = self.bloom
+        if bloom is None or license_key in bloom:
+            self.passed += 1
+            return True
+        if self._recently_added(license_key):
+            self.rescued += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def add(self, license_key):
+        """新建授权码后加入过滤器"""
+        with self._lock:
+            if self.bloom is not None:
+                self.bloom.add(license_key)
+            if self._added_during_build is not None:
+                self._added_during_build.append(license_key)
+        backend = self._backend()
+        if backend is not None:
+            backend.set(self._marker_key(license_key), True, self.rebuild_interval)
+
+    def _backend(self):
+        from .cache import license_cache
+        return license_cache.backend
+
+    def _marker_key(self, license_key):
+        return self.marker_prefix + hashlib.sha1(license_key.encode()).hexdigest()
+
+    def _recently_added(self, license_key):
+        backend = self._backend()
+        if backend is None:
+            return False
+        return bool(backend.get(self._marker_key(license_key)))
+
+    def stats(self):
+        bloom = self.bloom
+        stats = {
+            'enabled': self.enabled,
+            'active': self.active,
+            'built': bloom is not None,
+            'rejected': self.rejected,
+            'passed': self.passed,
+            'rescued': self.rescued,
+            'rebuilds': self.rebuilds,
+            'rebuild_interval': self.rebuild_interval,
+            'built_at': self.built_at,
+            'build_seconds': self.build_seconds,
+        }
+        if bloom is not None:
+            stats.update({
+                'keys': bloom.count,
+                'capacity': bloom.capacity,
+                'size_bytes': len(bloom.bits),
+                'num_hashes': bloom.num_hashes,
+                'target_false_positive_rate': bloom.error_rate,
+                'false_positive_rate': bloom.false_positive_rate,
+            })
+        return stats
+
+
+license_key_filter = LicenseKeyFilter.from_settings()
+
+os.register_at_fork(after_in_child=license_key_filter.after_fork_in_child)
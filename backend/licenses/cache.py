@@ -0,0 +1,170 @@
+"""
+授权码验证缓存
+
+验证接口只需要授权码的少量字段，这里以授权码为键缓存这些字段：
+先查进程内 LRU+TTL 缓存，再查可选的共享缓存（Django 缓存别名），最后才查数据库；
+查库前先经过布隆过滤器，一定不存在的授权码不会访问数据库。
+License 保存/删除时通过信号失效（activate()/revoke() 都会调用 save()），
+其他进程内的本地副本最多在一个 TTL 内过期，因此撤销最迟一个 TTL 后生效。
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from backend.caching import LRUTTLCache
+from .bloom import license_key_filter
+
+# 验证接口需要的字段
+SNAPSHOT_FIELDS = (
+    'id', 'license_key', 'license_type', 'status',
+    'max_users', 'max_companies', 'max_storage_gb', 'modules_enabled',
+    'valid_from', 'valid_until', 'leases_revoked_at',
+)
+
+
+class LicenseCache:
+    """授权码读穿缓存"""
+
+    key_prefix = 'license:v2:'
+
+    def __init__(self, enabled=True, maxsize=10000, ttl=30, backend=None):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.backend_alias = backend or None
+        self.local = LRUTTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared_hits = 0
+        self.db_queries = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'LICENSE_CACHE', {})
+        return cls(
+            enabled=options.get('ENABLED', True),
+            maxsize=options.get('MAXSIZE', 10000),
+            ttl=options.get('TTL', 30),
+            backend=options.get('BACKEND'),
+        )
+
+    @property
+    def backend(self):
+        if self.backend_alias:
+            return caches[self.backend_alias]
+        return None
+
+    def _shared_key(self, license_key):
+        return self.key_prefix + hashlib.sha1(license_key.encode()).hexdigest()
+
+    def get(self, license_key):
+        """获取授权码快照，不存在时返回 None"""
+        if not self.enabled:
+            if not license_key_filter.might_exist(license_key):
+                return None
+            return self.load(license_key)
+
+        snapshot = self.local.get(license_key)
+        if snapshot is not None:
+            return snapshot
+
+        backend = self.backend
+        if backend is not None:
+            snapshot = backend.get(self._shared_key(license_key))
+            if snapshot is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                self.local.set(license_key, snapshot)
+                return snapshot
+
+        if not license_key_filter.might_exist(license_key):
+            return None
+        snapshot = self.load(license_key)
+        if snapshot is not None:
+            self.set(license_key, snapshot)
+        return snapshot
+
+    def get_many(self, license_keys):
+        """批量获取授权码快照，返回 {授权码: 快照}，不存在的授权码不出现在结果中"""
+        missing = set(license_keys)
+        found = {}
+        if self.enabled:
+            for license_key in list(missing):
+                snapshot = self.local.get(license_key)
+                if snapshot is not None:
+                    found[license_key] = snapshot
+                    missing.discard(license_key)
+
+            backend = self.backend
+            if backend is not None and missing:
+                shared_keys = {self._shared_key(k): k for k in missing}
+                for shared_key, snapshot in backend.get_many(list(shared_keys)).items():
+                    license_key = shared_keys[shared_key]
+                    found[license_key] = snapshot
+                    missing.discard(license_key)
+                    self.local.set(license_key, snapshot)
+                    with self._lock:
+                        self.shared_hits += 1
+
+        missing = {k for k in missing if license_key_filter.might_exist(k)}
+        if missing:
+            loaded = self.load_many(missing)
+            if self.enabled:
+                for license_key, snapshot in loaded.items():
+                    self.set(license_key, snapshot)
+            found.update(loaded)
+        return found
+
+    def set(self, license_key, snapshot):
+        self.local.set(license_key, snapshot)
+        backend = self.backend
+        if backend is not None:
+            backend.set(self._shared_key(license_key), snapshot, self.ttl)
+
+    def load(self, license_key):
+        """从数据库读取授权码快照"""
+        from .models import License
+
+        with self._lock:
+            self.db_queries += 1
+        rows = list(
+            License.objects.filter(license_key=license_key)
+            .order_by()
+            .values(*SNAPSHOT_FIELDS)[:1]
+        )
+        return rows[0] if rows else None
+
+    def load_many(self, license_keys):
+        """用一条 license_key__in 查询读取多个授权码快照"""
+        from .models import License
+
+        with self._lock:
+            self.db_queries += 1
+        rows = (
+            License.objects.filter(license_key__in=list(license_keys))
+            .order_by()
+            .values(*SNAPSHOT_FIELDS)
+        )
+        return {row['license_key']: row for row in rows}
+
+    def invalidate(self, license_key):
+        self.local.delete(license_key)
+        backend = self.backend
+        if backend is not None:
+            backend.delete(self._shared_key(license_key))
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self):
+        stats = self.local.stats()
+        stats.update({
+            'enabled': self.enabled,
+            'backend': self.backend_alias,
+            'shared_hits': self.shared_hits,
+            'db_queries': self.db_queries,
+        })
+        return stats
+
+
+license_cache = LicenseCache.from_settings()
@@ -0,0 +1,75 @@
+"""
+授权码过期扫描
+
+把已过到期时间的 active 授权码批量改为 expired，并写入对应的 expire 日志。
+按主键区间分块：每块一条 UPDATE 加一次 bulk_create，不加载模型实例，
+百万级授权码表也只占用与块大小相当的内存。
+"""
+import time
+
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from system.counters import apply_delta
+from .cache import license_cache
+from .models import License, LicenseLog
+
+EXPIRE_MESSAGE = '授权码已过期'
+
+
+def _candidates(now):
+    return License.objects.order_by().filter(status='active', valid_until__lt=now)
+
+
+def expire_licenses(now=None, chunk_size=5000, dry_run=False, on_chunk=None):
+    """过期扫描，返回 {'expired', 'chunks', 'seconds', 'dry_run'}
+
+    dry_run 时只统计将被过期的授权码，不修改数据库。
+    on_chunk(起始主键, 结束主键, 本块数量) 在每块处理后调用，用于输出进度。
+    """
+    now = now or timezone.now()
+    started = time.perf_counter()
+    result = {'expired': 0, 'chunks': 0, 'seconds': 0.0, 'dry_run': dry_run}
+
+    bounds = _candidates(now).aggregate(lo=Min('pk'), hi=Max('pk'))
+    if bounds['lo'] is None:
+        return result
+
+    for start in range(bounds['lo'], bounds['hi'] + 1, chunk_size):
+        end = start + chunk_size
+        chunk = _candidates(now).filter(pk__gte=start, pk__lt=end)
+        if dry_run:
+            count = chunk.count()
+        else:
+            count = _expire_chunk(chunk, now)
+        result['expired'] += count
+        result['chunks'] += 1
+        if on_chunk is not None:
+            on_chunk(start, end, count)
+
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def _expire_chunk(chunk, now):
+    with transaction.atomic():
+        rows = list(chunk.select_for_update().values_list('id', 'license_key'))
+        if not rows:
+            return 0
+        ids = [license_id for license_id, _ in rows]
+        License.objects.filter(pk__in=ids).update(status='expired')
+        # update() 不触发 post_save，手动调整计数器并在提交后失效验证缓存
+        apply_delta({'licenses_active': -len(ids), 'licenses_expired': len(ids)})
+        LicenseLog.objects.bulk_create([
+            LicenseLog(license_id=license_id, action='expire', message=EXPIRE_MESSAGE, created_at=now)
+            for license_id in ids
+        ])
+        license_keys = [license_key for _, license_key in rows]
+        transaction.on_commit(lambda: _invalidate(license_keys))
+    return len(rows)
+
+
+def _invalidate(license_keys):
+    for license_key in license_keys:
+        license_cache.invalidate(license_key)
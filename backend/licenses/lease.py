@@ -0,0 +1,141 @@
+"""
+授权码验证租约
+
+验证响应附带一个签名租约：租约令牌、到期时间和 next_check_after（建议的下次检查间隔，秒）。
+客户端在租约有效期内可以不再调用验证接口。检查间隔按授权类型给出基准值，
+临近到期时缩短，服务器负载高时按比例拉长；租约有效期（检查间隔加宽限期）不超过 MAX_INTERVAL，
+因此即使客户端一直不再检查，撤销也最迟在 MAX_INTERVAL 秒后生效。
+
+租约令牌绑定授权码的版本指纹（状态、有效期、限制）和签发时间。授权码被撤销（revoke()）
+或管理员撤销租约（revoke_leases()）时记录 leases_revoked_at，此前签发的令牌全部失效。
+客户端验证时可以出示持有的令牌（lease_token），响应中的 lease_status 为 revoked 时客户端应
+立即丢弃旧租约；网关等持有相同 SECRET_KEY 的组件也可以用 verify_lease() 在转发前校验。
+授权码无效时不签发令牌，只给出最短的检查间隔。
+
+负载按进程统计（load_meter），LOAD_TARGET 是单个进程的验证速率目标。
+"""
+import hashlib
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+
+SALT = 'licenses.lease'
+
+
+class LoadMeter:
+    """按秒分桶统计本进程最近一段时间的验证速率（不汇总其他进程）"""
+
+    def __init__(self, window=10):
+        self.window = window
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def hit(self, count=1):
+        second = int(time.monotonic())
+        with self._lock:
+            self._buckets[second] = self._buckets.get(second, 0) + count
+            if len(self._buckets) > self.window * 2:
+                cutoff = second - self.window
+                for key in [key for key in self._buckets if key < cutoff]:
+                    del self._buckets[key]
+
+    def rate(self):
+        """最近 window 秒内每秒的平均验证次数"""
+        cutoff = int(time.monotonic()) - self.window
+        with self._lock:
+            total = sum(count for second, count in self._buckets.items() if second > cutoff)
+        return total / self.window
+
+
+load_meter = LoadMeter()
+
+
+def _options():
+    return settings.LICENSE_LEASE
+
+
+def license_fingerprint(snapshot):
+    """授权码版本指纹，状态、有效期或限制变化后随之改变"""
+    data = '|'.join(str(snapshot[field]) for field in (
+        'id', 'status', 'license_type', 'valid_from', 'valid_until',
+        'max_users', 'max_companies', 'max_storage_gb', 'modules_enabled',
+    ))
+    return hashlib.sha1(data.encode()).hexdigest()[:16]
+
+
+def check_interval(snapshot, valid, days_remaining):
+    """计算建议的下次检查间隔（秒）"""
+    options = _options()
+    if not valid:
+        return options['MIN_INTERVAL']
+
+    interval = options['INTERVALS'].get(snapshot['license_type'], options['MIN_INTERVAL'])
+    if days_remaining < options['NEAR_EXPIRY_DAYS']:
+        interval = min(interval, options['NEAR_EXPIRY_INTERVAL'])
+
+    # 负载超过目标速率时按比例拉长间隔
+    stretch = load_meter.rate() / options['LOAD_TARGET'] if options['LOAD_TARGET'] else 0
+    interval *= min(max(stretch, 1), options['MAX_LOAD_STRETCH'])
+
+    return int(min(max(interval, options['MIN_INTERVAL']), options['MAX_INTERVAL']))
+
+
+def issue_lease(snapshot, valid, days_remaining, now):
+    """签发租约，授权码无效时不签发令牌，只给出最短的检查间隔"""
+    interval = check_interval(snapshot, valid, days_remaining)
+    if not valid:
+        return {'token': None, 'expires_at': None, 'next_check_after': interval}
+
+    # 租约比检查间隔多留一个宽限期，客户端偶尔检查失败时不会立即失去授权；
+    # 但不超过 MAX_INTERVAL，撤销的最长生效时间由它决定
+    options = _options()
+    expires_at = min(
+        now + timedelta(seconds=interval * options['GRACE_FACTOR']),
+        now + timedelta(seconds=options['MAX_INTERVAL']),
+        snapshot['valid_until'],
+    )
+    token = signing.dumps(
+        {
+            'l': snapshot['id'],
+            'f': license_fingerprint(snapshot),
+            'i': _millis(now),
+            'x': int(expires_at.timestamp()),
+        },
+        salt=SALT,
+        compress=True,
+    )
+    return {'token': token, 'expires_at': expires_at, 'next_check_after': interval}
+
+
+def _millis(value):
+    return int(value.timestamp() * 1000)
+
+
+def lease_status(token, snapshot, now):
+    """客户端出示的租约令牌状态：valid、expired、revoked（撤销或授权码已变化）或 invalid"""
+    try:
+        data = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        return 'invalid'
+    if not isinstance(data, dict) or data.get('l') != snapshot['id']:
+        return 'invalid'
+    revoked_at = snapshot.get('leases_revoked_at')
+    if data.get('f') != license_fingerprint(snapshot) or (
+        revoked_at is not None and data.get('i', 0) < _millis(revoked_at)
+    ):
+        return 'revoked'
+    if data.get('x', 0) < now.timestamp():
+        return 'expired'
+    return 'valid'
+
+
+def verify_lease(token, snapshot, now):
+    """租约令牌签名有效、未过期、未被撤销且授权码未发生变化时返回 True
+
+    供持有相同 SECRET_KEY 的网关等组件在转发前校验客户端出示的租约。
+    """
+    return bool(token) and lease_status(token, snapshot, now) == 'valid'
+
@@ -0,0 +1,114 @@
+"""
+授权码验证 ASGI 快速通道基准测试
+运行命令：python manage.py benchmark_asgi_validation --requests 2000 --concurrency 20
+"""
+import asyncio
+import json
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+
+from licenses.asgi import VALIDATE_PATH, license_validation_app
+from licenses.models import License
+from licenses.writebehind import flusher
+from users.tokens import issue_token
+
+
+class Command(BaseCommand):
+    help = '在进程内对比 ASGI 快速通道与 Django/DRF 路径的每秒请求数和 p99 延迟（不写入使用记录）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000, help='每个路径的请求数')
+        parser.add_argument('--concurrency', type=int, default=10, help='并发请求数')
+        parser.add_argument('--license-key', help='使用的授权码，默认取第一个有效授权码')
+
+    def handle(self, *args, **options):
+        license_key = options['license_key'] or (
+            License.objects.filter(status='active')
+            .values_list('license_key', flat=True).first()
+        )
+        if not license_key:
+            raise CommandError('没有可用于测试的授权码，请通过 --license-key 指定')
+
+        user = User.objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:8]}')
+        token = issue_token(user, client='benchmark')
+        body = json.dumps({'license_key': license_key, 'current_users': 1}).encode()
+        headers = [
+            (b'host', b'localhost'),
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'authorization', f'Token {token.key}'.encode()),
+        ]
+
+        for target in flusher.targets:
+            target.autoflush = False
+        try:
+            for label, app in (('Django/DRF', get_asgi_application()), ('快速通道', license_validation_app)):
+                latencies, elapsed = asyncio.run(
+                    self.run(app, body, headers, options['requests'], options['concurrency'])
+                )
+                latencies.sort()
+                p50 = latencies[len(latencies) // 2] * 1000
+                p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000
+                self.stdout.write(
+                    f'{label}: {len(latencies) / elapsed:.0f} 请求/秒, '
+                    f'p50 {p50:.2f}ms, p99 {p99:.2f}ms'
+                )
+        finally:
+            for target in flusher.targets:
+                target.discard()
+                target.autoflush = True
+            user.delete()
+
+    async def run(self, app, body, headers, total, concurrency):
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                status, content = await self.call(app, body, headers)
+                latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    raise CommandError(f'验证失败: {status} {content[:200]!r}')
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return latencies, time.perf_counter() - started
+
+    async def call(self, app, body, headers):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'POST',
+            'scheme': 'http',
+            'path': VALIDATE_PATH,
+            'raw_path': VALIDATE_PATH.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': headers,
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        status = []
+        content = bytearray()
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            # 请求体读完后保持连接，避免 Django 判定客户端断开
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            else:
+                content.extend(message.get('body', b''))
+
+        await app(scope, receive, send)
+        return status[0], bytes(content)
@@ -0,0 +1,95 @@
+"""
+授权码验证吞吐量基准测试
+运行命令：python manage.py benchmark_validation --iterations 2000 --batch-size 500
+"""
+import itertools
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from licenses.cache import license_cache
+from licenses.models import License
+from licenses.views import LicenseViewSet
+from licenses.writebehind import flusher
+
+
+class Command(BaseCommand):
+    help = '对 validate_license 做基准测试：对比开启和关闭缓存、N 次单个验证和 1 次批量验证（数据改动会回滚）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000, help='每轮验证次数')
+        parser.add_argument('--batch-size', type=int, default=200, help='批量验证对比的授权码个数，0 为跳过')
+        parser.add_argument('--license-key', help='使用的授权码，默认取第一个有效授权码')
+
+    def handle(self, *args, **options):
+        license_key = options['license_key']
+        if not license_key:
+            license_key = (
+                License.objects.filter(status='active')
+                .values_list('license_key', flat=True).first()
+            )
+        if not license_key:
+            raise CommandError('没有可用于测试的授权码，请通过 --license-key 指定')
+
+        self.factory = APIRequestFactory()
+        self.user = User(username='benchmark')
+        iterations = options['iterations']
+        batch_size = options['batch_size']
+
+        enabled = license_cache.enabled
+        # 写后缓冲和 last_check 在本事务内刷新，随事务一起回滚
+        for target in flusher.targets:
+            target.autoflush = False
+        try:
+            with transaction.atomic():
+                for label, cache_enabled in (('缓存关闭', False), ('缓存开启', True)):
+                    license_cache.enabled = cache_enabled
+                    license_cache.clear()
+                    elapsed = self.run_single([license_key] * iterations)
+                    self.report(label, iterations, elapsed)
+
+                if batch_size:
+                    keys = list(License.objects.values_list('license_key', flat=True)[:batch_size])
+                    keys = list(itertools.islice(itertools.cycle(keys), batch_size))
+                    for label, run in (('单个验证', self.run_single), ('批量验证', self.run_batch)):
+                        license_cache.clear()
+                        elapsed = run(keys)
+                        self.report(f'{label}({batch_size}个授权码)', batch_size, elapsed)
+
+                for target in flusher.targets:
+                    target.flush()
+                transaction.set_rollback(True)
+        finally:
+            license_cache.enabled = enabled
+            for target in flusher.targets:
+                target.autoflush = True
+
+        self.stdout.write(f'缓存统计: {license_cache.stats()}')
+
+    def report(self, label, count, elapsed):
+        self.stdout.write(f'{label}: {count} 次, {elapsed:.3f}s, {count / elapsed:.0f} 次/秒')
+
+    def call(self, action, payload):
+        view = LicenseViewSet.as_view({'post': action})
+        request = self.factory.post(f'/api/licenses/{action}/', payload, format='json')
+        force_authenticate(request, user=self.user)
+        response = view(request)
+        if response.status_code != 200:
+            raise CommandError(f'验证失败: {response.status_code} {response.data}')
+        return response
+
+    def run_single(self, keys):
+        started = time.perf_counter()
+        for key in keys:
+            self.call('validate_license', {'license_key': key, 'current_users': 1})
+        return time.perf_counter() - started
+
+    def run_batch(self, keys):
+        started = time.perf_counter()
+        self.call('validate_batch', {
+            'licenses': [{'license_key': key, 'current_users': 1} for key in keys],
+        })
+        return time.perf_counter() - started
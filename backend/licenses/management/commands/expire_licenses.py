@@ -0,0 +1,35 @@
+"""
+授权码过期扫描
+运行命令：python manage.py expire_licenses [--dry-run] [--chunk-size 5000]
+建议由 cron 或 systemd timer 定期执行
+"""
+from django.core.management.base import BaseCommand
+
+from licenses.expiry import expire_licenses
+
+
+class Command(BaseCommand):
+    help = '把已过到期时间的 active 授权码批量改为 expired 并写入过期日志'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只统计将被过期的授权码，不修改数据库')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='每个主键区间的大小')
+
+    def handle(self, *args, **options):
+        verbose = options['verbosity'] > 1
+
+        def on_chunk(start, end, count):
+            if verbose:
+                self.stdout.write(f'  主键 [{start}, {end}): {count}')
+
+        result = expire_licenses(
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            on_chunk=on_chunk,
+        )
+
+        action = '将过期' if result['dry_run'] else '已过期'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {result['expired']} 个授权码"
+            f"（{result['chunks']} 个区间，耗时 {result['seconds']:.2f}s）"
+        ))
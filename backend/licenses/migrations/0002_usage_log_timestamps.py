@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licenses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='licenselog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='操作时间'),
+        ),
+        migrations.AlterField(
+            model_name='licenseusage',
+            name='checked_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='检查时间'),
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licenses', '0003_license_status_valid_until_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LicenseUsageDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='时间段开始')),
+                ('checks', models.IntegerField(default=0, verbose_name='检查次数')),
+                ('distinct_ips', models.IntegerField(default=0, verbose_name='访问IP数')),
+                ('last_checked_at', models.DateTimeField(verbose_name='最后检查时间')),
+                ('users_min', models.IntegerField(default=0, verbose_name='最少用户数')),
+                ('users_max', models.IntegerField(default=0, verbose_name='最多用户数')),
+                ('users_avg', models.FloatField(default=0, verbose_name='平均用户数')),
+                ('users_last', models.IntegerField(default=0, verbose_name='最后用户数')),
+                ('companies_min', models.IntegerField(default=0, verbose_name='最少公司数')),
+                ('companies_max', models.IntegerField(default=0, verbose_name='最多公司数')),
+                ('companies_avg', models.FloatField(default=0, verbose_name='平均公司数')),
+                ('companies_last', models.IntegerField(default=0, verbose_name='最后公司数')),
+                ('storage_gb_min', models.FloatField(default=0, verbose_name='最小存储GB')),
+                ('storage_gb_max', models.FloatField(default=0, verbose_name='最大存储GB')),
+                ('storage_gb_avg', models.FloatField(default=0, verbose_name='平均存储GB')),
+                ('storage_gb_last', models.FloatField(default=0, verbose_name='最后存储GB')),
+            ],
+            options={
+                'verbose_name': '授权使用日汇总',
+                'verbose_name_plural': '授权使用日汇总',
+                'ordering': ['-bucket'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='LicenseUsageHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='时间段开始')),
+                ('checks', models.IntegerField(default=0, verbose_name='检查次数')),
+                ('distinct_ips', models.IntegerField(default=0, verbose_name='访问IP数')),
+                ('last_checked_at', models.DateTimeField(verbose_name='最后检查时间')),
+                ('users_min', models.IntegerField(default=0, verbose_name='最少用户数')),
+                ('users_max', models.IntegerField(default=0, verbose_name='最多用户数')),
+                ('users_avg', models.FloatField(default=0, verbose_name='平均用户数')),
+                ('users_last', models.IntegerField(default=0, verbose_name='最后用户数')),
+                ('companies_min', models.IntegerField(default=0, verbose_name='最少公司数')),
+                ('companies_max', models.IntegerField(default=0, verbose_name='最多公司数')),
+                ('companies_avg', models.FloatField(default=0, verbose_name='平均公司数')),
+                ('companies_last', models.IntegerField(default=0, verbose_name='最后公司数')),
+                ('storage_gb_min', models.FloatField(default=0, verbose_name='最小存储GB')),
+                ('storage_gb_max', models.FloatField(default=0, verbose_name='最大存储GB')),
+                ('storage_gb_avg', models.FloatField(default=0, verbose_name='平均存储GB')),
+                ('storage_gb_last', models.FloatField(default=0, verbose_name='最后存储GB')),
+            ],
+            options={
+                'verbose_name': '授权使用小时汇总',
+                'verbose_name_plural': '授权使用小时汇总',
+                'ordering': ['-bucket'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UsageRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(max_length=10, unique=True, verbose_name='汇总粒度')),
+                ('high_water_mark', models.DateTimeField(verbose_name='已汇总至')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '使用记录汇总进度',
+                'verbose_name_plural': '使用记录汇总进度',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='licenseusage',
+            index=models.Index(fields=['license', 'checked_at'], name='usage_license_checked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='licenseusage',
+            index=models.Index(fields=['checked_at'], name='usage_checked_idx'),
+        ),
+        migrations.AddField(
+            model_name='licenseusagedaily',
+            name='license',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='licenses.license', verbose_name='授权码'),
+        ),
+        migrations.AddField(
+            model_name='licenseusagehourly',
+            name='license',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='licenses.license', verbose_name='授权码'),
+        ),
+        migrations.AddConstraint(
+            model_name='licenseusagedaily',
+            constraint=models.UniqueConstraint(fields=('license', 'bucket'), name='usage_daily_license_bucket_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='licenseusagehourly',
+            constraint=models.UniqueConstraint(fields=('license', 'bucket'), name='usage_hourly_license_bucket_uniq'),
+        ),
+    ]
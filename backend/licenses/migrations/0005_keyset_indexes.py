@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licenses', '0004_usage_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='licenseusage',
+            name='usage_checked_idx',
+        ),
+        migrations.AddIndex(
+            model_name='licenselog',
+            index=models.Index(fields=['created_at', 'id'], name='license_log_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='licenseusage',
+            index=models.Index(fields=['checked_at', 'id'], name='usage_checked_id_idx'),
+        ),
+    ]
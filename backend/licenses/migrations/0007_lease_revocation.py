@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licenses', '0006_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='license',
+            name='leases_revoked_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='租约撤销时间'),
+        ),
+    ]
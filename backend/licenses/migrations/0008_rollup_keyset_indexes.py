@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licenses', '0007_lease_revocation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='licenseusagedaily',
+            index=models.Index(fields=['-bucket', '-id'], name='usage_daily_bucket_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='licenseusagehourly',
+            index=models.Index(fields=['-bucket', '-id'], name='usage_hourly_bucket_id_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('licenses', '0008_rollup_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='licenseusage',
+            name='usage_license_checked_idx',
+        ),
+        migrations.AddIndex(
+            model_name='licenselog',
+            index=models.Index(fields=['license', 'created_at', 'id'], name='license_log_lic_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='licenseusage',
+            index=models.Index(fields=['license', 'checked_at', 'id'], name='usage_license_checked_id_idx'),
+        ),
+    ]
@@ -1,11 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+from backend.tracking import LoadedValuesMixin
 from customers.models import Customer
 import uuid
 import hashlib
 from datetime import datetime, timedelta
 
-class License(models.Model):
+class License(LoadedValuesMixin, models.Model):
     """授权码"""
     STATUS_CHOICES = [
         ('active', '有效'),
@@ -21,6 +23,9 @@ class License(models.Model):
         ('enterprise', '企业版'),
     ]
     
+    # 影响平台计数器的字段，加载时记下原值（见 system/counters.py）
+    tracked_fields = ('status', 'license_type')
+    
     # 基本信息
     license_key = models.CharField(max_length=200, unique=True, verbose_name='授权码')
     license_type = models.CharField(
@@ -60,6 +65,8 @@ class License(models.Model):
     )
     activated_at = models.DateTimeField(blank=True, null=True, verbose_name='激活时间')
     last_check = models.DateTimeField(blank=True, null=True, verbose_name='最后检查时间')
+    # 此时间之前签发的验证租约全部失效（见 licenses/lease.py）
+    leases_revoked_at = models.DateTimeField(blank=True, null=True, verbose_name='租约撤销时间')
     
     # 硬件指纹
     hardware_fingerprint = models.CharField(
@@ -93,6 +100,10 @@ class License(models.Model):
         verbose_name = '授权码'
         verbose_name_plural = '授权码管理'
         ordering = ['-issued_at']
+        indexes = [
+            # 过期扫描按状态和到期时间查找
+            models.Index(fields=['status', 'valid_until'], name='license_status_until_idx'),
+        ]
 
     def __str__(self):
         return f"{self.customer.name} - {self.license_key}"
@@ -148,10 +159,18 @@ class License(models.Model):
         self.save()
 
     def revoke(self):
-        """撤销授权码"""
+        """撤销授权码，已签发的租约同时失效"""
+        from django.utils import timezone
         self.status = 'revoked'
+        self.leases_revoked_at = timezone.now()
         self.save()
 
+    def revoke_leases(self):
+        """使已签发的租约失效，客户端下次出示租约时会被要求立即重新验证"""
+        from django.utils import timezone
+        self.leases_revoked_at = timezone.now()
+        self.save(update_fields=['leases_revoked_at'])
+
 class LicenseUsage(models.Model):
     """授权码使用记录"""
     license = models.ForeignKey(
@@ -171,16 +190,95 @@ class LicenseUsage(models.Model):
     user_agent = models.TextField(blank=True, verbose_name='用户代理')
     
     # 时间戳
-    checked_at = models.DateTimeField(auto_now_add=True, verbose_name='检查时间')
+    # 写后缓冲会延迟入库，因此时间戳由调用方在产生记录时指定
+    checked_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name='检查时间')
 
     class Meta:
         verbose_name = '授权使用记录'
         verbose_name_plural = '授权使用记录'
         ordering = ['-checked_at']
+        indexes = [
+            # 汇总时按时间段扫描，并按授权码取时间段内的最后一条；也用于 ?license= 过滤后的键集分页
+            models.Index(fields=['license', 'checked_at', 'id'], name='usage_license_checked_id_idx'),
+            # 键集分页
+            models.Index(fields=['checked_at', 'id'], name='usage_checked_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.license.license_key} - {self.checked_at}"
 
+class LicenseUsageRollup(models.Model):
+    """授权码使用记录汇总（按时间段），由 licenses/rollup.py 生成"""
+    license = models.ForeignKey(License, on_delete=models.CASCADE, verbose_name='授权码')
+    bucket = models.DateTimeField(verbose_name='时间段开始')
+    
+    checks = models.IntegerField(default=0, verbose_name='检查次数')
+    distinct_ips = models.IntegerField(default=0, verbose_name='访问IP数')
+    last_checked_at = models.DateTimeField(verbose_name='最后检查时间')
+    
+    users_min = models.IntegerField(default=0, verbose_name='最少用户数')
+    users_max = models.IntegerField(default=0, verbose_name='最多用户数')
+    users_avg = models.FloatField(default=0, verbose_name='平均用户数')
+    users_last = models.IntegerField(default=0, verbose_name='最后用户数')
+    
+    companies_min = models.IntegerField(default=0, verbose_name='最少公司数')
+    companies_max = models.IntegerField(default=0, verbose_name='最多公司数')
+    companies_avg = models.FloatField(default=0, verbose_name='平均公司数')
+    companies_last = models.IntegerField(default=0, verbose_name='最后公司数')
+    
+    storage_gb_min = models.FloatField(default=0, verbose_name='最小存储GB')
+    storage_gb_max = models.FloatField(default=0, verbose_name='最大存储GB')
+    storage_gb_avg = models.FloatField(default=0, verbose_name='平均存储GB')
+    storage_gb_last = models.FloatField(default=0, verbose_name='最后存储GB')
+
+    class Meta:
+        abstract = True
+        ordering = ['-bucket']
+
+    def __str__(self):
+        return f"{self.license_id} - {self.bucket}"
+
+class LicenseUsageHourly(LicenseUsageRollup):
+    """授权码使用记录小时汇总"""
+
+    class Meta(LicenseUsageRollup.Meta):
+        verbose_name = '授权使用小时汇总'
+        verbose_name_plural = '授权使用小时汇总'
+        constraints = [
+            models.UniqueConstraint(fields=['license', 'bucket'], name='usage_hourly_license_bucket_uniq'),
+        ]
+        indexes = [
+            # 键集分页（LicenseUsageViewSet 按 -bucket, -id 排序）
+            models.Index(fields=['-bucket', '-id'], name='usage_hourly_bucket_id_idx'),
+        ]
+
+class LicenseUsageDaily(LicenseUsageRollup):
+    """授权码使用记录日汇总"""
+
+    class Meta(LicenseUsageRollup.Meta):
+        verbose_name = '授权使用日汇总'
+        verbose_name_plural = '授权使用日汇总'
+        constraints = [
+            models.UniqueConstraint(fields=['license', 'bucket'], name='usage_daily_license_bucket_uniq'),
+        ]
+        indexes = [
+            # 键集分页（LicenseUsageViewSet 按 -bucket, -id 排序）
+            models.Index(fields=['-bucket', '-id'], name='usage_daily_bucket_id_idx'),
+        ]
+
+class UsageRollupState(models.Model):
+    """使用记录汇总进度：high_water_mark 之前的完整时间段均已汇总"""
+    resolution = models.CharField(max_length=10, unique=True, verbose_name='汇总粒度')
+    high_water_mark = models.DateTimeField(verbose_name='已汇总至')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '使用记录汇总进度'
+        verbose_name_plural = '使用记录汇总进度'
+
+    def __str__(self):
+        return f"{self.resolution} - {self.high_water_mark}"
+
 class LicenseLog(models.Model):
     """授权码操作日志"""
     ACTION_CHOICES = [
@@ -200,7 +298,7 @@ class LicenseLog(models.Model):
     action = models.CharField(max_length=20, choices=ACTION_CHOICES, verbose_name='操作类型')
     message = models.TextField(verbose_name='操作信息')
     ip_address = models.GenericIPAddressField(blank=True, null=True, verbose_name='IP地址')
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name='操作时间')
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name='操作时间')
     created_by = models.ForeignKey(
         User, 
         on_delete=models.SET_NULL, 
@@ -212,6 +310,11 @@ class LicenseLog(models.Model):
         verbose_name = '授权操作日志'
         verbose_name_plural = '授权操作日志'
         ordering = ['-created_at']
+        indexes = [
+            # 键集分页（不过滤 / 按 ?license= 过滤）
+            models.Index(fields=['created_at', 'id'], name='license_log_created_id_idx'),
+            models.Index(fields=['license', 'created_at', 'id'], name='license_log_lic_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.license.license_key} - {self.get_action_display()}"
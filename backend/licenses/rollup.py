@@ -0,0 +1,129 @@
+"""
+授权码使用记录的小时/日汇总
+
+按完整时间段从原始 LicenseUsage 生成汇总：每个时间段一条按授权码分组的聚合查询
+（最小/最大/平均值、检查次数、不同 IP 数），“最后值”用按 (license, checked_at)
+索引取一行的子查询得到。每个时间段只在结束 LAG 秒之后汇总一次，
+UsageRollupState.high_water_mark 记录已汇总到的位置，下次从这里继续。
+
+日汇总同样直接读取原始记录（不同 IP 数无法由小时汇总合并），日边界按 TIME_ZONE。
+两级汇总都完成的时间段之前的原始记录可以提前清理，见 early_purge_cutoff()。
+"""
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import LicenseUsage, LicenseUsageHourly, LicenseUsageDaily, UsageRollupState
+
+ROLLUP_MODELS = {
+    'hour': LicenseUsageHourly,
+    'day': LicenseUsageDaily,
+}
+RESOLUTIONS = list(ROLLUP_MODELS)
+
+METRICS = (
+    ('users', 'current_users'),
+    ('companies', 'current_companies'),
+    ('storage_gb', 'current_storage_gb'),
+)
+
+
+def bucket_start(value, resolution):
+    """value 所在时间段的开始时间"""
+    value = timezone.localtime(value)
+    if resolution == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_bucket(start, resolution):
+    if resolution == 'hour':
+        return start + timedelta(hours=1)
+    # 按本地日期加一天再取当天零点，跨夏令时切换也能落在零点
+    day = timezone.localtime(start).date() + timedelta(days=1)
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _initial_mark(resolution):
+    first = LicenseUsage.objects.order_by('checked_at').values_list('checked_at', flat=True).first()
+    return bucket_start(first, resolution) if first else None
+
+
+def get_high_water_mark(resolution):
+    state = UsageRollupState.objects.filter(resolution=resolution).first()
+    return state.high_water_mark if state else None
+
+
+def _aggregate_bucket(start, end):
+    """一个时间段内按授权码分组的汇总值"""
+    rows = LicenseUsage.objects.order_by().filter(checked_at__gte=start, checked_at__lt=end)
+    latest = (
+        LicenseUsage.objects.filter(license_id=OuterRef('license_id'), checked_at__gte=start, checked_at__lt=end)
+        .order_by('-checked_at', '-pk')
+    )
+    annotations = {
+        'checks': Count('pk'),
+        'distinct_ips': Count('access_ip', distinct=True),
+        'last_checked_at': Max('checked_at'),
+    }
+    for name, field in METRICS:
+        annotations[f'{name}_min'] = Min(field)
+        annotations[f'{name}_max'] = Max(field)
+        annotations[f'{name}_avg'] = Avg(field)
+        annotations[f'{name}_last'] = Subquery(latest.values(field)[:1])
+    return rows.values('license_id').annotate(**annotations)
+
+
+def rollup_bucket(resolution, start, end):
+    """（重新）生成一个时间段的汇总，返回汇总行数"""
+    model = ROLLUP_MODELS[resolution]
+    rollups = [model(bucket=start, **values) for values in _aggregate_bucket(start, end)]
+    with transaction.atomic():
+        model.objects.filter(bucket=start).delete()
+        model.objects.bulk_create(rollups, batch_size=1000)
+        UsageRollupState.objects.update_or_create(resolution=resolution, defaults={'high_water_mark': end})
+    return len(rollups)
+
+
+def build_rollups(resolution, now=None, max_buckets=None):
+    """从 high-water mark 开始汇总已结束的时间段
+
+    返回 {'resolution', 'buckets', 'rows', 'high_water_mark', 'seconds'}。
+    """
+    started = time.perf_counter()
+    now = now or timezone.now()
+    lag = timedelta(seconds=settings.LICENSE_USAGE_ROLLUP['LAG'])
+    # 只汇总结束时间早于 now - LAG 的时间段，给写后缓冲留出入库时间
+    limit = bucket_start(now - lag, resolution)
+
+    mark = get_high_water_mark(resolution) or _initial_mark(resolution)
+    result = {'resolution': resolution, 'buckets': 0, 'rows': 0, 'high_water_mark': mark, 'seconds': 0.0}
+    while mark is not None and mark < limit:
+        if max_buckets is not None and result['buckets'] >= max_buckets:
+            break
+        end = next_bucket(mark, resolution)
+        result['rows'] += rollup_bucket(resolution, mark, end)
+        result['buckets'] += 1
+        mark = end
+    result['high_water_mark'] = mark
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def early_purge_cutoff(now=None):
+    """原始使用记录可提前清理的截止时间，未启用或尚未汇总时返回 None
+
+    取 RAW_RETENTION_DAYS 与两级汇总 high-water mark 中较早者，保证只清理已汇总的记录。
+    """
+    raw_days = settings.LICENSE_USAGE_ROLLUP['RAW_RETENTION_DAYS']
+    if not raw_days:
+        return None
+    marks = [get_high_water_mark(resolution) for resolution in RESOLUTIONS]
+    if None in marks:
+        return None
+    now = now or timezone.now()
+    return min([now - timedelta(days=raw_days)] + marks)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import License, LicenseUsage, LicenseLog
+from .models import License, LicenseUsage, LicenseUsageHourly, LicenseUsageDaily, LicenseLog
 from customers.models import Customer
 
 class LicenseSerializer(serializers.ModelSerializer):
@@ -52,6 +52,20 @@ class LicenseUsageSerializer(serializers.ModelSerializer):
         model = LicenseUsage
         fields = '__all__'
 
+class LicenseUsageHourlySerializer(serializers.ModelSerializer):
+    license_key = serializers.CharField(source='license.license_key', read_only=True)
+    
+    class Meta:
+        model = LicenseUsageHourly
+        fields = '__all__'
+
+class LicenseUsageDailySerializer(serializers.ModelSerializer):
+    license_key = serializers.CharField(source='license.license_key', read_only=True)
+    
+    class Meta:
+        model = LicenseUsageDaily
+        fields = '__all__'
+
 class LicenseLogSerializer(serializers.ModelSerializer):
     license_key = serializers.CharField(source='license.license_key', read_only=True)
     customer_name = serializers.CharField(source='license.customer.name', read_only=True)
@@ -71,4 +85,6 @@ class LicenseValidateSerializer(serializers.Serializer):
     hardware_fingerprint = serializers.CharField(max_length=100, required=False)
     current_users = serializers.IntegerField(default=0)
     current_companies = serializers.IntegerField(default=0)
-    current_storage_gb = serializers.FloatField(default=0) 
\ No newline at end of file
+    current_storage_gb = serializers.FloatField(default=0)
+    # 客户端持有的租约令牌，出示时响应中给出 lease_status
+    lease_token = serializers.CharField(max_length=2000, required=False, allow_blank=True) 
\ No newline at end of file
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import License
+from .bloom import license_key_filter
+from .cache import license_cache
+
+
+@receiver(post_save, sender=License)
+@receiver(post_delete, sender=License)
+def invalidate_license_cache(sender, instance, **kwargs):
+    """授权码变更（含 activate/revoke）后失效验证缓存"""
+    license_cache.invalidate(instance.license_key)
+
+
+@receiver(post_save, sender=License)
+def add_license_key_to_filter(sender, instance, created, **kwargs):
+    """新建的授权码加入负向查找过滤器（删除的授权码在定期重建时移除）"""
+    if created:
+        license_key_filter.add(instance.license_key)
@@ -0,0 +1,243 @@
+"""
+授权码离线快照
+
+供没有数据库连接的边缘节点验证授权码。快照是一个排好序的定长二进制文件，
+读取端用 mmap 打开后按授权码哈希二分查找，不需要把文件读入内存。
+本模块只依赖标准库，可以单独拷贝到边缘节点使用。
+
+文件布局（整数均为小端序）：
+
+    文件头  HEADER_STRUCT，HEADER_SIZE 字节
+    记录区  record_count 条 RECORD_STRUCT 定长记录，按 key_hash 升序
+    模块区  各授权码启用模块列表的 JSON，相同的列表只存一份
+    元数据  JSON：状态/类型编码表、生成时间等
+
+写入时先写临时文件再 os.replace()，读取端发现文件变化后重新 mmap，实现原子热切换。
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+MAGIC = b'LICSNAP\0'
+FORMAT_VERSION = 1
+
+# magic, 版本, 记录长度, 记录数, 快照代数, 模块区偏移, 模块区长度, 元数据偏移, 元数据长度
+HEADER_STRUCT = struct.Struct('<8sHHIQQQQQQ')
+HEADER_SIZE = 128
+
+# 授权码哈希(16字节), 状态, 类型, 保留, 最大用户数, 最大公司数, 最大存储GB,
+# 生效时间(微秒), 到期时间(微秒), 模块偏移, 模块长度, 授权码ID
+RECORD_STRUCT = struct.Struct('<16sBBHiiiqqIIq')
+# 二分查找时把哈希按两个大端 64 位整数比较，避免切片拷贝
+KEY_STRUCT = struct.Struct('>QQ')
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def key_hash(license_key):
+    """授权码的 16 字节哈希，快照中不保存授权码明文"""
+    return hashlib.sha256(license_key.encode()).digest()[:16]
+
+
+def _to_micros(value):
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _from_micros(value):
+    return EPOCH + timedelta(microseconds=value)
+
+
+def write_snapshot(path, licenses, statuses, license_types, generation=None):
+    """写出快照文件并原子替换，返回写入的记录数
+
+    licenses 为字典的可迭代对象，字段与 licenses.cache.SNAPSHOT_FIELDS 相同。
+    """
+    status_codes = {value: code for code, value in enumerate(statuses)}
+    type_codes = {value: code for code, value in enumerate(license_types)}
+    generation = generation or time.time_ns() // 1000
+
+    records = []
+    blob = bytearray()
+    blob_offsets = {}
+    for item in licenses:
+        modules = json.dumps(item['modules_enabled'] or [], ensure_ascii=False,
+                             separators=(',', ':')).encode()
+        if modules not in blob_offsets:
+            blob_offsets[modules] = len(blob)
+            blob += modules
+        records.append((
+            key_hash(item['license_key']),
+            status_codes[item['status']],
+            type_codes[item['license_type']],
+            0,
+            item['max_users'],
+            item['max_companies'],
+            item['max_storage_gb'],
+            _to_micros(item['valid_from']),
+            _to_micros(item['valid_until']),
+            blob_offsets[modules],
+            len(modules),
+            item['id'],
+        ))
+    records.sort(key=lambda record: record[0])
+
+    metadata = json.dumps({
+        'statuses': list(statuses),
+        'license_types': list(license_types),
+        'generation': generation,
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+    }, ensure_ascii=False).encode()
+
+    blob_offset = HEADER_SIZE + RECORD_STRUCT.size * len(records)
+    metadata_offset = blob_offset + len(blob)
+    header = HEADER_STRUCT.pack(
+        MAGIC, FORMAT_VERSION, 0, RECORD_STRUCT.size, len(records), generation,
+        blob_offset, len(blob), metadata_offset, len(metadata),
+    )
+
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        for record in records:
+            f.write(RECORD_STRUCT.pack(*record))
+        f.write(blob)
+        f.write(metadata)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class LicenseSnapshot:
+    """只读 mmap 快照"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, _, record_size, self.record_count, self.generation,
+         self._blob_offset, _, metadata_offset, metadata_size) = HEADER_STRUCT.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f'{path} 不是授权码快照文件')
+        if version != FORMAT_VERSION or record_size != RECORD_STRUCT.size:
+            raise SnapshotError(f'不支持的快照版本: {version}')
+
+        metadata = json.loads(self._mm[metadata_offset:metadata_offset + metadata_size])
+        self.statuses = metadata['statuses']
+        self.license_types = metadata['license_types']
+        self.generated_at = metadata['generated_at']
+
+    def _find(self, license_key):
+        """二分查找记录偏移，未找到返回 None"""
+        target = KEY_STRUCT.unpack(key_hash(license_key))
+        mm = self._mm
+        size = RECORD_STRUCT.size
+        lo, hi = 0, self.record_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HEADER_SIZE + mid * size
+            current = KEY_STRUCT.unpack_from(mm, offset)
+            if current < target:
+                lo = mid + 1
+            elif current > target:
+                hi = mid
+            else:
+                return offset
+        return None
+
+    def lookup(self, license_key):
+        """返回授权码快照字典，不存在时返回 None"""
+        offset = self._find(license_key)
+        if offset is None:
+            return None
+        (_, status, license_type, _, max_users, max_companies, max_storage_gb,
+         valid_from, valid_until, modules_offset, modules_length, license_id) = \
+            RECORD_STRUCT.unpack_from(self._mm, offset)
+        start = self._blob_offset + modules_offset
+        return {
+            'id': license_id,
+            'license_key': license_key,
+            'license_type': self.license_types[license_type],
+            'status': self.statuses[status],
+            'max_users': max_users,
+            'max_companies': max_companies,
+            'max_storage_gb': max_storage_gb,
+            'modules_enabled': json.loads(self._mm[start:start + modules_length]),
+            'valid_from': _from_micros(valid_from),
+            'valid_until': _from_micros(valid_until),
+        }
+
+    def validate(self, license_key, now=None):
+        """返回与 validate_license 相同结构的响应，授权码不存在时返回 None"""
+        snapshot = self.lookup(license_key)
+        if snapshot is None:
+            return None
+        now = now or datetime.now(timezone.utc)
+        active = snapshot['status'] == 'active'
+        return {
+            'valid': active and snapshot['valid_from'] <= now <= snapshot['valid_until'],
+            'license_type': snapshot['license_type'],
+            'max_users': snapshot['max_users'],
+            'max_companies': snapshot['max_companies'],
+            'max_storage_gb': snapshot['max_storage_gb'],
+            'modules_enabled': snapshot['modules_enabled'],
+            'valid_until': snapshot['valid_until'],
+            'days_remaining': (snapshot['valid_until'] - now).days
+            if active and now <= snapshot['valid_until'] else 0,
+        }
+
+
+class SnapshotReader:
+    """自动热加载的快照读取器
+
+    每隔 check_interval 秒检查一次文件是否被替换，替换后重新 mmap；
+    旧快照在没有引用后由垃圾回收关闭，正在进行的查找不受影响。
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = LicenseSnapshot(path)
+        self._checked_at = time.monotonic()
+
+    @property
+    def snapshot(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._maybe_reload()
+        return self._snapshot
+
+    def _maybe_reload(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._snapshot.identity:
+            return
+        with self._lock:
+            try:
+                self._snapshot = LicenseSnapshot(self.path)
+            except (OSError, SnapshotError, ValueError):
+                # 保留旧快照继续服务
+                pass
+
+    def lookup(self, license_key):
+        return self.snapshot.lookup(license_key)
+
+    def validate(self, license_key, now=None):
+        return self.snapshot.validate(license_key, now)
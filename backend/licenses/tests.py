@@ -1,3 +1,360 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.caching import stats_cache
+from customers.models import Customer
+from system.counters import reconcile
+from system.settings_cache import system_settings
+from users.tokens import issue_token
+from .asgi import VALIDATE_PATH, license_validation_app
+from .bloom import license_key_filter
+from .lease import lease_status, verify_lease
+from .cache import license_cache
+from .models import License, LicenseLog
+from .snapshot import SnapshotReader
+from .validation import validation_payload
+from .writebehind import LastCheckCoalescer, WriteBehindBuffer, write_behind, last_check_updater
+
+
+class LicenseStatsQueryTests(TestCase):
+    """授权码统计接口的查询次数：缓存未命中时只读取一次计数器行，命中时不查询数据库"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='tester')
+        reconcile()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        stats_cache.clear()
+        # 预热系统设置快照，中间件不再查询
+        system_settings.get()
+
+    def test_stats_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/licenses/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_licenses'], 0)
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/licenses/stats/')
+        self.assertEqual(cached.data, response.data)
+
+
+def create_license(customer_id='C1', **fields):
+    customer, _ = Customer.objects.get_or_create(
+        customer_id=customer_id, defaults={'name': customer_id, 'contact_email': 'c@example.com'},
+    )
+    fields.setdefault('license_type', 'standard')
+    fields.setdefault('status', 'active')
+    fields.setdefault('valid_from', timezone.now() - timedelta(days=1))
+    fields.setdefault('valid_until', timezone.now() + timedelta(days=30))
+    return License.objects.create(customer=customer, **fields)
+
+
+class KeysetPaginationTests(TestCase):
+    """键集分页：按 (-created_at, -id) 逐页前后翻动，时间相同的行不重复、不遗漏"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='tester')
+        cls.license = create_license()
+        other = create_license('C2')
+        base = timezone.now().replace(microsecond=0)
+        logs = []
+        # 每 4 条共用一个时间戳，分页边界会落在时间相同的行之间
+        for i in range(22):
+            logs.append(LicenseLog(
+                license=cls.license if i % 3 else other, action='check', message=f'log {i}',
+                created_at=base - timedelta(minutes=i // 4),
+            ))
+        LicenseLog.objects.bulk_create(logs)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        system_settings.get()
+
+    def walk(self, url, link='next'):
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = [row['id'] for row in response.data['results']]
+            ids.extend(page if link == 'next' else reversed(page))
+            url = response.data[link]
+            pages += 1
+        return ids, pages, response
+
+    def expected(self, **filters):
+        return list(LicenseLog.objects.filter(**filters).order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def test_forward_walk(self):
+        first = self.client.get('/api/license-logs/?page_size=5')
+        self.assertIsNone(first.data['previous'])
+        self.assertNotIn('count', first.data)
+        ids, pages, last = self.walk('/api/license-logs/?page_size=5')
+        self.assertEqual(ids, self.expected())
+        self.assertEqual(pages, 5)
+        self.assertIsNone(last.data['next'])
+
+    def test_backward_walk(self):
+        _, _, last = self.walk('/api/license-logs/?page_size=5')
+        # 从最后一页沿 previous 走回第一页
+        ids, _, first = self.walk(last.data['previous'], link='previous')
+        last_page = [row['id'] for row in last.data['results']]
+        self.assertEqual(list(reversed(ids)) + last_page, self.expected())
+        self.assertIsNone(first.data['previous'])
+
+    def test_filtered_walk(self):
+        ids, _, _ = self.walk(f'/api/license-logs/?page_size=3&license={self.license.pk}')
+        self.assertEqual(ids, self.expected(license=self.license))
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/license-logs/?cursor=not-a-cursor').status_code, 404)
+
+
+async def call_fast_path(data, authorization=None):
+    """直接调用 ASGI 快速通道，返回 (状态码, 响应头, 响应内容)"""
+    headers = [(b'content-type', b'application/json')]
+    if authorization:
+        headers.append((b'authorization', authorization.encode()))
+    scope = {
+        'type': 'http', 'method': 'POST', 'path': VALIDATE_PATH,
+        'headers': headers, 'client': ('127.0.0.1', 50000),
+    }
+    messages = [{'type': 'http.request', 'body': json.dumps(data).encode(), 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await license_validation_app(scope, receive, send)
+    start, body = sent
+    return start['status'], dict(start['headers']), json.loads(body['body'])
+
+
+class FastPathTests(TransactionTestCase):
+    """ASGI 快速通道的认证与验证结果（快速通道会调用 close_old_connections，不能放在测试事务中）"""
+
+    def setUp(self):
+        user = User.objects.create_user('tester', password='tester')
+        self.token = issue_token(user).key
+        self.license = create_license()
+        license_cache.clear()
+        # 记录留在内存队列中，由 tearDown 丢弃，不让后台线程写库
+        write_behind.autoflush = last_check_updater.autoflush = False
+
+    def tearDown(self):
+        write_behind.discard()
+        last_check_updater.discard()
+        write_behind.autoflush = last_check_updater.autoflush = True
+
+    async def test_missing_credentials(self):
+        status, headers, body = await call_fast_path({'license_key': self.license.license_key})
+        self.assertEqual(status, 401)
+        self.assertEqual(headers[b'www-authenticate'], b'Token')
+
+    async def test_invalid_token(self):
+        status, headers, _ = await call_fast_path(
+            {'license_key': self.license.license_key}, 'Token not-a-real-token',
+        )
+        self.assertEqual(status, 401)
+        self.assertEqual(headers[b'www-authenticate'], b'Token')
+
+    async def test_valid_license(self):
+        status, headers, body = await call_fast_path(
+            {'license_key': self.license.license_key, 'current_users': 3}, f'Token {self.token}',
+        )
+        self.assertEqual(status, 200)
+        self.assertNotIn(b'www-authenticate', headers)
+        self.assertTrue(body['valid'])
+        self.assertEqual(body['license_type'], 'standard')
+        self.assertEqual(write_behind.stats()['pending'], 2)
+
+    async def test_unknown_license(self):
+        status, _, body = await call_fast_path({'license_key': 'NO-SUCH-KEY'}, f'Token {self.token}')
+        self.assertEqual(status, 404)
+        self.assertFalse(body['valid'])
+
+
+class WriteBehindTests(TestCase):
+    """写后缓冲：落盘模式下未刷新的记录在重启后恢复；last_check 合并的内存有界"""
+
+    def setUp(self):
+        self.license = create_license()
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        self.spool_dir = spool.name
+
+    def test_spool_recovery(self):
+        crashed = WriteBehindBuffer(spool_dir=self.spool_dir)
+        crashed.autoflush = False
+        crashed.add(LicenseLog, license_id=self.license.pk, action='check', message='before crash',
+                    created_at=timezone.now())
+        # 模拟进程崩溃：不刷新，只释放段文件上的锁
+        crashed._segment.close()
+        self.assertFalse(LicenseLog.objects.filter(message='before crash').exists())
+
+        restarted = WriteBehindBuffer(spool_dir=self.spool_dir)
+        restarted.autoflush = False
+        restarted._ensure_started()
+        self.assertEqual(restarted.stats()['pending'], 1)
+        self.assertEqual(restarted.flush(), 1)
+        self.assertTrue(LicenseLog.objects.filter(message='before crash').exists())
+        # 恢复的段文件在写库后删除，只剩当前段
+        self.assertEqual(len(os.listdir(self.spool_dir)), 1)
+        restarted.shutdown()
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_coalescer_forgets_stale_writes(self):
+        coalescer = LastCheckCoalescer(granularity=60)
+        now = timezone.now()
+        other = create_license('C2')
+        coalescer.record(self.license.pk, now)
+        coalescer.record(other.pk, now - timedelta(minutes=5))
+        self.assertEqual(coalescer.flush(), 2)
+        # 早于粒度范围的写回时间不再保留
+        self.assertEqual(list(coalescer._written), [self.license.pk])
+        coalescer.record(self.license.pk, now + timedelta(seconds=10))
+        self.assertEqual(coalescer.stats()['pending'], 0)
+
+
+class LicenseCacheTests(TestCase):
+    """授权码保存/删除后失效验证缓存；共享缓存下过滤器拒绝不存在的授权码、放行新建的授权码"""
+
+    def setUp(self):
+        license_cache.clear()
+        self.license = create_license()
+
+    def tearDown(self):
+        license_cache.clear()
+        license_cache.backend_alias = None
+        license_key_filter.bloom = license_key_filter.built_at = None
+        caches['default'].clear()
+
+    def test_invalidated_on_save(self):
+        key = self.license.license_key
+        self.assertEqual(license_cache.get(key)['status'], 'active')
+        with self.assertNumQueries(0):
+            license_cache.get(key)
+        self.license.revoke()
+        self.assertEqual(license_cache.get(key)['status'], 'revoked')
+
+    def test_invalidated_on_delete(self):
+        key = self.license.license_key
+        self.assertIsNotNone(license_cache.get(key))
+        self.license.delete()
+        self.assertIsNone(license_cache.get(key))
+
+    def test_key_filter(self):
+        license_cache.backend_alias = 'default'
+        license_key_filter.rebuild()
+        with self.assertNumQueries(0):
+            self.assertIsNone(license_cache.get('NO-SUCH-KEY'))
+        # 新建的授权码在保存时加入过滤器，不必等待重建
+        created = create_license('C2')
+        self.assertEqual(license_cache.get(created.license_key)['id'], created.pk)
+
+
+class LicenseSnapshotTests(TestCase):
+    """离线快照：导出后读取的内容与数据库一致，重新导出后读取端自动切换"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'licenses.snap')
+        self.license = create_license(modules_enabled=['sale', 'stock'], max_users=25)
+        create_license('C2', license_type='enterprise', modules_enabled=['sale', 'stock'])
+
+    def export(self):
+        call_command('export_license_snapshot', self.path, stdout=io.StringIO())
+
+    def test_round_trip(self):
+        self.export()
+        reader = SnapshotReader(self.path)
+        self.assertEqual(reader.snapshot.record_count, 2)
+        snapshot = reader.lookup(self.license.license_key)
+        self.assertEqual(snapshot['id'], self.license.pk)
+        self.assertEqual(snapshot['status'], 'active')
+        self.assertEqual(snapshot['max_users'], 25)
+        self.assertEqual(snapshot['modules_enabled'], ['sale', 'stock'])
+        self.assertEqual(snapshot['valid_until'], self.license.valid_until)
+        self.assertTrue(reader.validate(self.license.license_key)['valid'])
+        self.assertIsNone(reader.lookup('NO-SUCH-KEY'))
+
+    def test_hot_reload(self):
+        self.export()
+        reader = SnapshotReader(self.path, check_interval=0)
+        generation = reader.snapshot.generation
+        self.license.revoke()
+        self.export()
+        self.assertGreater(reader.snapshot.generation, generation)
+        self.assertEqual(reader.lookup(self.license.license_key)['status'], 'revoked')
+        self.assertFalse(reader.validate(self.license.license_key)['valid'])
+
+
+class LeaseTests(TestCase):
+    """签名租约：过期、撤销、授权码变化和篡改后的令牌状态"""
+
+    def setUp(self):
+        self.license = create_license()
+        self.issued_at = timezone.now() - timedelta(seconds=1)
+        self.lease = validation_payload(self.snapshot(), self.issued_at)['lease']
+
+    def snapshot(self):
+        return license_cache.load(self.license.license_key)
+
+    def test_valid(self):
+        now = timezone.now()
+        self.assertEqual(lease_status(self.lease['token'], self.snapshot(), now), 'valid')
+        self.assertTrue(verify_lease(self.lease['token'], self.snapshot(), now))
+        payload = validation_payload(self.snapshot(), now, self.lease['token'])
+        self.assertEqual(payload['lease_status'], 'valid')
+
+    def test_lifetime_capped(self):
+        max_interval = timedelta(seconds=settings.LICENSE_LEASE['MAX_INTERVAL'])
+        self.assertLessEqual(self.lease['expires_at'], self.issued_at + max_interval)
+
+    def test_expired(self):
+        after_expiry = self.lease['expires_at'] + timedelta(seconds=1)
+        self.assertEqual(lease_status(self.lease['token'], self.snapshot(), after_expiry), 'expired')
+        self.assertFalse(verify_lease(self.lease['token'], self.snapshot(), after_expiry))
+
+    def test_revoked_leases(self):
+        self.license.revoke_leases()
+        self.assertEqual(lease_status(self.lease['token'], self.snapshot(), timezone.now()), 'revoked')
+        # 撤销之后签发的租约不受影响
+        lease = validation_payload(self.snapshot(), timezone.now())['lease']
+        self.assertEqual(lease_status(lease['token'], self.snapshot(), timezone.now()), 'valid')
+
+    def test_revoked_license(self):
+        self.license.revoke()
+        snapshot = self.snapshot()
+        self.assertEqual(lease_status(self.lease['token'], snapshot, timezone.now()), 'revoked')
+        self.assertIsNone(validation_payload(snapshot)['lease']['token'])
+
+    def test_license_changed(self):
+        self.license.max_users += 10
+        self.license.save()
+        self.assertEqual(lease_status(self.lease['token'], self.snapshot(), timezone.now()), 'revoked')
+
+    def test_tampered(self):
+        self.assertEqual(lease_status(self.lease['token'] + 'x', self.snapshot(), timezone.now()), 'invalid')
+        other = license_cache.load(create_license('C2').license_key)
+        self.assertEqual(lease_status(self.lease['token'], other, timezone.now()), 'invalid')
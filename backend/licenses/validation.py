@@ -0,0 +1,145 @@
+"""
+授权码验证的公共逻辑（基于授权码快照字典，不依赖模型实例）
+"""
+import json
+
+from django.utils import timezone
+
+from django.conf import settings
+
+from .cache import license_cache
+from .lease import issue_lease, lease_status, load_meter
+from .models import LicenseUsage, LicenseLog
+from .serializers import LicenseValidateSerializer
+from .writebehind import write_behind, last_check_updater
+
+
+def snapshot_is_valid(snapshot, now=None):
+    """与 License.is_valid 相同的判断"""
+    now = now or timezone.now()
+    return (
+        snapshot['status'] == 'active' and
+        snapshot['valid_from'] <= now <= snapshot['valid_until']
+    )
+
+
+def snapshot_days_remaining(snapshot, now=None):
+    """与 License.days_remaining 相同的计算"""
+    if snapshot['status'] != 'active':
+        return 0
+    now = now or timezone.now()
+    if now > snapshot['valid_until']:
+        return 0
+    return (snapshot['valid_until'] - now).days
+
+
+def validation_payload(snapshot, now=None, lease_token=None):
+    """验证接口的响应内容；客户端出示了租约令牌时同时给出 lease_status"""
+    now = now or timezone.now()
+    valid = snapshot_is_valid(snapshot, now)
+    days_remaining = snapshot_days_remaining(snapshot, now)
+    payload = {
+        'valid': valid,
+        'license_type': snapshot['license_type'],
+        'max_users': snapshot['max_users'],
+        'max_companies': snapshot['max_companies'],
+        'max_storage_gb': snapshot['max_storage_gb'],
+        'modules_enabled': snapshot['modules_enabled'],
+        'valid_until': snapshot['valid_until'],
+        'days_remaining': days_remaining,
+    }
+    if settings.LICENSE_LEASE['ENABLED']:
+        payload['lease'] = issue_lease(snapshot, valid, days_remaining, now)
+        if lease_token:
+            payload['lease_status'] = lease_status(lease_token, snapshot, now)
+    return payload
+
+
+def record_checks(checks, ip_address, user_agent, now=None, flush_when_full=True):
+    """记录一批验证的使用记录、检查日志和最后检查时间
+
+    checks 为 (授权码ID, 已校验的请求数据) 列表，写入交给写后缓冲和 last_check 合并器。
+    flush_when_full 为 False 时队列满了也不同步刷新（见 WriteBehindBuffer.add_many）。
+    """
+    now = now or timezone.now()
+    load_meter.hit(len(checks))
+    write_behind.add_many(LicenseUsage, [
+        {
+            'license_id': license_id,
+            'current_users': data.get('current_users', 0),
+            'current_companies': data.get('current_companies', 0),
+            'current_storage_gb': data.get('current_storage_gb', 0),
+            'access_ip': ip_address or '',
+            'user_agent': user_agent,
+            'checked_at': now,
+        }
+        for license_id, data in checks
+    ], flush_when_full=flush_when_full)
+    write_behind.add_many(LicenseLog, [
+        {
+            'license_id': license_id,
+            'action': 'check',
+            'message': '授权码验证成功',
+            'ip_address': ip_address,
+            'created_at': now,
+        }
+        for license_id, _ in checks
+    ], flush_when_full=flush_when_full)
+    for license_id, _ in checks:
+        last_check_updater.record(license_id, now)
+
+
+def validate_batch(items, ip_address, user_agent):
+    """批量验证授权码，按请求顺序返回每个授权码的结果"""
+    validated = []
+    for item in items:
+        serializer = LicenseValidateSerializer(data=item)
+        if serializer.is_valid():
+            validated.append((serializer.validated_data, None))
+        else:
+            validated.append((None, serializer.errors))
+
+    snapshots = license_cache.get_many(
+        data['license_key'] for data, _ in validated if data is not None
+    )
+
+    now = timezone.now()
+    results = []
+    checks = []
+    for item, (data, errors) in zip(items, validated):
+        if data is None:
+            license_key = item.get('license_key') if isinstance(item, dict) else None
+            results.append({'license_key': license_key, 'valid': False, 'errors': errors})
+            continue
+        snapshot = snapshots.get(data['license_key'])
+        if snapshot is None:
+            results.append({'license_key': data['license_key'], 'valid': False, 'error': '授权码不存在'})
+            continue
+        checks.append((snapshot['id'], data))
+        results.append({
+            'license_key': data['license_key'],
+            **validation_payload(snapshot, now, data.get('lease_token')),
+        })
+
+    if checks:
+        record_checks(checks, ip_address, user_agent, now)
+    return results
+
+
+def iter_ndjson_batches(lines, batch_size):
+    """把 NDJSON 请求行按 batch_size 分组，无法解析的行原样保留，由校验报错"""
+    batch = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            item = line.decode(errors='replace') if isinstance(line, bytes) else line
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
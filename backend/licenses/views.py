@@ -1,15 +1,29 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Q
+from rest_framework.utils.encoders import JSONEncoder
 from django.utils import timezone
+from backend.caching import stats_cache
+from backend.pagination import KeysetPagination
+from backend.search import search_queryset
+from system.counters import license_stats
 from .models import License, LicenseUsage, LicenseLog
 from .serializers import (
     LicenseSerializer, LicenseCreateSerializer, LicenseDetailSerializer,
-    LicenseUsageSerializer, LicenseLogSerializer, LicenseActivateSerializer,
-    LicenseValidateSerializer
+    LicenseUsageSerializer, LicenseUsageHourlySerializer, LicenseUsageDailySerializer,
+    LicenseLogSerializer, LicenseActivateSerializer, LicenseValidateSerializer
 )
+from .bloom import license_key_filter
+from .cache import license_cache
+from .validation import validation_payload, record_checks, validate_batch, iter_ndjson_batches
+from .rollup import ROLLUP_MODELS
+from .writebehind import write_behind, last_check_updater
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
 
 # Create your views here.
 
@@ -30,10 +44,10 @@ class LicenseViewSet(viewsets.ModelViewSet):
         # 搜索功能
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(license_key__icontains=search) |
-                Q(customer__name__icontains=search) |
-                Q(deployment_domain__icontains=search)
+            # 授权码按前缀匹配（授权码均为大写）
+            queryset = search_queryset(
+                queryset, search, fields=['deployment_domain', 'customer__name'],
+                prefix_fields=['license_key'], normalize_prefix=str.upper,
             )
         
         # 状态过滤
@@ -126,74 +140,109 @@ class LicenseViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             license_key = serializer.validated_data['license_key']
             
-            try:
-                license_obj = License.objects.get(license_key=license_key)
-                
-                # 更新最后检查时间
-                license_obj.last_check = timezone.now()
-                license_obj.save()
-                
-                # 记录使用记录
-                LicenseUsage.objects.create(
-                    license=license_obj,
-                    current_users=serializer.validated_data.get('current_users', 0),
-                    current_companies=serializer.validated_data.get('current_companies', 0),
-                    current_storage_gb=serializer.validated_data.get('current_storage_gb', 0),
-                    access_ip=request.META.get('REMOTE_ADDR', ''),
-                    user_agent=request.META.get('HTTP_USER_AGENT', '')
-                )
-                
-                # 记录检查日志
-                LicenseLog.objects.create(
-                    license=license_obj,
-                    action='check',
-                    message='授权码验证成功',
-                    ip_address=request.META.get('REMOTE_ADDR')
-                )
-                
-                return Response({
-                    'valid': license_obj.is_valid,
-                    'license_type': license_obj.license_type,
-                    'max_users': license_obj.max_users,
-                    'max_companies': license_obj.max_companies,
-                    'max_storage_gb': license_obj.max_storage_gb,
-                    'modules_enabled': license_obj.modules_enabled,
-                    'valid_until': license_obj.valid_until,
-                    'days_remaining': license_obj.days_remaining
-                })
-                
-            except License.DoesNotExist:
+            snapshot = license_cache.get(license_key)
+            if snapshot is None:
                 return Response(
                     {'valid': False, 'error': '授权码不存在'}, 
                     status=status.HTTP_404_NOT_FOUND
                 )
+            
+            now = timezone.now()
+            
+            # 使用记录、检查日志和最后检查时间交给写后缓冲和合并器批量入库
+            record_checks(
+                [(snapshot['id'], serializer.validated_data)],
+                request.META.get('REMOTE_ADDR'),
+                request.META.get('HTTP_USER_AGENT', ''),
+                now
+            )
+            
+            return Response(validation_payload(snapshot, now, serializer.validated_data.get('lease_token')))
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'])
+    def validate_batch(self, request):
+        """批量验证授权码
+
+        JSON 请求体为 {"licenses": [...]}，每项与 validate_license 的参数相同，按请求顺序返回结果；
+        Content-Type 为 application/x-ndjson 时按行流式读取请求并流式返回每行结果，不受数量限制。
+        """
+        ip_address = request.META.get('REMOTE_ADDR')
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        options = settings.LICENSE_BATCH
+        
+        if request.content_type.startswith(NDJSON_CONTENT_TYPE):
+            encoder = JSONEncoder(ensure_ascii=False)
+            
+            def stream():
+                batches = iter_ndjson_batches(request._request, options['STREAM_CHUNK_SIZE'])
+                for batch in batches:
+                    for result in validate_batch(batch, ip_address, user_agent):
+                        yield encoder.encode(result) + '\n'
+            
+            return StreamingHttpResponse(stream(), content_type=NDJSON_CONTENT_TYPE)
+        
+        items = request.data.get('licenses') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list):
+            return Response(
+                {'error': 'licenses 必须是数组'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > options['MAX_SIZE']:
+            return Response(
+                {'error': f'单次最多验证{options["MAX_SIZE"]}个授权码，更大的批量请使用 NDJSON 流式模式'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({'results': validate_batch(items, ip_address, user_agent)})
+    
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """获取授权码统计信息"""
-        total_licenses = License.objects.count()
-        active_licenses = License.objects.filter(status='active').count()
-        expired_licenses = License.objects.filter(status='expired').count()
-        revoked_licenses = License.objects.filter(status='revoked').count()
-        pending_licenses = License.objects.filter(status='pending').count()
-        
+        return Response(stats_cache.get_or_compute('licenses', license_stats))
+
+    @action(detail=False, methods=['get'])
+    def validation_metrics(self, request):
+        """获取授权码验证缓存、负向过滤器和写后缓冲的统计"""
         return Response({
-            'total_licenses': total_licenses,
-            'active_licenses': active_licenses,
-            'expired_licenses': expired_licenses,
-            'revoked_licenses': revoked_licenses,
-            'pending_licenses': pending_licenses,
+            'cache': license_cache.stats(),
+            'key_filter': license_key_filter.stats(),
+            'write_behind': write_behind.stats(),
+            'last_check': last_check_updater.stats(),
         })
 
 class LicenseUsageViewSet(viewsets.ReadOnlyModelViewSet):
+    """授权使用记录，resolution=hour/day 时读取对应的汇总表"""
     queryset = LicenseUsage.objects.all()
     serializer_class = LicenseUsageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    rollup_serializers = {
+        'hour': LicenseUsageHourlySerializer,
+        'day': LicenseUsageDailySerializer,
+    }
+    
+    def get_resolution(self):
+        resolution = self.request.query_params.get('resolution', 'raw')
+        if resolution != 'raw' and resolution not in ROLLUP_MODELS:
+            raise ValidationError({'resolution': ['可选值为 raw、hour、day']})
+        return resolution
+    
+    def get_serializer_class(self):
+        return self.rollup_serializers.get(self.get_resolution(), LicenseUsageSerializer)
+    
+    def get_keyset_ordering(self):
+        if self.get_resolution() == 'raw':
+            return ('-checked_at', '-id')
+        return ('-bucket', '-id')
     
     def get_queryset(self):
-        queryset = LicenseUsage.objects.select_related('license', 'license__customer').all()
+        resolution = self.get_resolution()
+        if resolution == 'raw':
+            queryset = LicenseUsage.objects.select_related('license', 'license__customer').all()
+        else:
+            queryset = ROLLUP_MODELS[resolution].objects.select_related('license').all()
         
         # 按授权码过滤
         license_id = self.request.query_params.get('license', None)
@@ -206,6 +255,8 @@ class LicenseLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = LicenseLog.objects.all()
     serializer_class = LicenseLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         queryset = LicenseLog.objects.select_related('license', 'license__customer', 'created_by').all()
@@ -0,0 +1,525 @@
+"""
+验证路径的写后（write-behind）缓冲和 last_check 合并更新
+
+validate_license 产生的 LicenseUsage / LicenseLog 记录先放入内存队列，由后台线程
+按数量或时间阈值用 bulk_create 批量写入，验证接口的耗时不再取决于数据库写入耗时。
+
+- 内存有界：待写记录达到 MAX_PENDING 时由调用方同步刷新（背压）；
+  只有数据库持续不可用时才会丢弃最旧的记录（计入 dropped），落盘模式下同时重写 spool，
+  被丢弃的记录不会在恢复时再次导入
+- 进程退出时通过 atexit 刷新剩余记录
+- 配置 SPOOL_DIR 后启用落盘模式：记录先追加写入本进程的 spool 段文件，
+  批量写入成功后才删除对应段文件；进程崩溃遗留的段文件会在下一个进程启动时
+  重新导入（至少一次语义，崩溃发生在提交与删除之间时可能产生重复记录）
+- fork 后子进程关闭继承的段文件描述符并清空继承的状态（父进程的记录由父进程写入），
+  父进程崩溃后它的段文件可以立即被恢复
+
+License.last_check 由 LastCheckCoalescer 在内存中按授权码只保留最新时间，
+定期用一条 UPDATE ... CASE 批量写回，且跳过库中值仍在 GRANULARITY 秒内的授权码。
+两者共用同一个后台刷新线程。
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, DateTimeField, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# 需要按日期时间序列化的字段
+DATETIME_FIELDS = ('checked_at', 'created_at')
+
+
+def _encode(model_label, fields):
+    data = dict(fields)
+    for name in DATETIME_FIELDS:
+        if data.get(name) is not None:
+            data[name] = data[name].isoformat()
+    return json.dumps([model_label, data], ensure_ascii=False)
+
+
+def _decode(line):
+    model_label, data = json.loads(line)
+    for name in DATETIME_FIELDS:
+        if data.get(name) is not None:
+            data[name] = parse_datetime(data[name])
+    return model_label, data
+
+
+class SpoolSegment:
+    """持有排他锁的 spool 段文件"""
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.file = open(path, 'a', encoding='utf-8')
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def append(self, line):
+        self.file.write(line + '\n')
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self.file.close()
+
+    def close(self):
+        """只关闭文件描述符，不删除文件（fork 后的子进程使用）"""
+        self.file.close()
+
+
+class BackgroundFlusher:
+    """后台刷新线程，按各自的间隔调用已注册对象的 flush()"""
+
+    def __init__(self, tick=0.5):
+        self.tick = tick
+        self.targets = []
+        self._reset()
+
+    def _reset(self):
+        # fork 之后子进程需要重新创建线程
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopped = False
+
+    def register(self, target):
+        self.targets.append(target)
+        return target
+
+    def after_fork_in_child(self):
+        self._reset()
+        for target in self.targets:
+            target.after_fork_in_child()
+
+    def ensure_started(self):
+        if self._pid != os.getpid():
+            self._reset()
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='license-write-behind', daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def wakeup(self):
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped:
+            forced = self._wakeup.wait(self.tick)
+            self._wakeup.clear()
+            now = time.monotonic()
+            for target in self.targets:
+                if not target.autoflush:
+                    continue
+                if not forced and now - target.last_flush < target.flush_interval:
+                    continue
+                try:
+                    target.flush()
+                except Exception:
+                    logger.exception('后台刷新 %r 失败', target)
+                finally:
+                    target.last_flush = now
+            close_old_connections()
+
+    def shutdown(self):
+        """进程退出前刷新剩余记录"""
+        if self._pid != os.getpid():
+            return
+        self._stopped = True
+        self._wakeup.set()
+        for target in self.targets:
+            target.shutdown()
+
+
+flusher = BackgroundFlusher()
+
+
+class WriteBehindBuffer:
+    """LicenseUsage / LicenseLog 写后缓冲"""
+
+    def __init__(self, enabled=True, max_batch=500, flush_interval=2.0,
+                 max_pending=20000, spool_dir=None, spool_fsync=False):
+        self.enabled = enabled
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.spool_dir = spool_dir or None
+        self.spool_fsync = spool_fsync
+        # 为 False 时后台线程不自动刷新，只能显式调用 flush()
+        self.autoflush = True
+        self.last_flush = 0
+
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+        self._reset()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'LICENSE_WRITE_BEHIND', {})
+        return cls(
+            enabled=options.get('ENABLED', True),
+            max_batch=options.get('MAX_BATCH', 500),
+            flush_interval=options.get('FLUSH_INTERVAL', 2.0),
+            max_pending=options.get('MAX_PENDING', 20000),
+            spool_dir=options.get('SPOOL_DIR'),
+            spool_fsync=options.get('SPOOL_FSYNC', False),
+        )
+
+    def _reset(self):
+        # fork 之后子进程需要重新初始化锁和 spool 段
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = deque()
+        self._segment = None
+        self._closed_segments = []
+        self._started = False
+
+    def after_fork_in_child(self):
+        # 继承的段文件描述符与父进程共享同一个 flock，子进程不关闭时父进程崩溃后段文件无法恢复
+        for segment in [self._segment, *self._closed_segments]:
+            if segment is not None:
+                try:
+                    segment.close()
+                except OSError:
+                    pass
+        self._reset()
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            self._reset()
+        if not self._started:
+            with self._lock:
+                if not self._started:
+                    if self.spool_dir:
+                        os.makedirs(self.spool_dir, exist_ok=True)
+                        self._recover_spool()
+                        self._segment = self._open_segment()
+                    self._started = True
+        flusher.ensure_started()
+
+    def add(self, model, **fields):
+        """加入一条待写记录"""
+        self.add_many(model, [fields])
+
+    def add_many(self, model, rows, flush_when_full=True):
+        """加入多条同一模型的待写记录
+
+        flush_when_full 为 False 时，队列满了也不在调用方线程同步刷新，只唤醒后台线程
+        （队列可能短暂超过 MAX_PENDING），供 ASGI 事件循环中调用。
+        """
+        if not self.enabled:
+            model.objects.bulk_create([model(**fields) for fields in rows], batch_size=self.max_batch)
+            return
+
+        self._ensure_started()
+        model_label = model._meta.label
+        with self._lock:
+            for fields in rows:
+                if self._segment is not None:
+                    self._segment.append(_encode(model_label, fields))
+                self._pending.append((model_label, fields))
+            pending = len(self._pending)
+
+        if pending >= self.max_pending and flush_when_full:
+            self.flush()
+        elif pending >= self.max_batch:
+            flusher.wakeup()
+
+    def can_enqueue_nonblocking(self, count):
+        """入队 count 条记录时既不做文件 I/O 也不会触发同步刷新时返回 True
+
+        需要已启动（崩溃恢复已完成）、未启用落盘模式、且队列有空间。
+        """
+        return (
+            self.enabled
+            and self._started
+            and self._pid == os.getpid()
+            and self._segment is None
+            and len(self._pending) + count < self.max_pending
+        )
+
+    def flush(self):
+        """把当前所有待写记录批量写入数据库，返回写入条数"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                records = list(self._pending)
+                self._pending.clear()
+                segments = self._rotate_segment()
+
+            try:
+                self._write(records)
+            except Exception:
+                self.failures += 1
+                logger.exception('写后缓冲刷新失败，%d 条记录重新入队', len(records))
+                with self._lock:
+                    self._pending.extendleft(reversed(records))
+                    self._closed_segments = segments + self._closed_segments
+                    # 数据库持续不可用时丢弃最旧的记录，保证内存有界
+                    overflow = len(self._pending) - self.max_pending
+                    if overflow > 0:
+                        for _ in range(overflow):
+                            self._pending.popleft()
+                        self.dropped += overflow
+                        self._compact_spool()
+                return 0
+
+            for segment in segments:
+                segment.remove()
+            self.flushed += len(records)
+            self.flushes += 1
+            return len(records)
+
+    def _write(self, records):
+        grouped = {}
+        for model_label, fields in records:
+            grouped.setdefault(model_label, []).append(fields)
+        with transaction.atomic():
+            for model_label, rows in grouped.items():
+                model = apps.get_model(model_label)
+                model.objects.bulk_create(
+                    [model(**fields) for fields in rows], batch_size=self.max_batch
+                )
+
+    def _open_segment(self):
+        path = os.path.join(self.spool_dir, f'writebehind-{uuid.uuid4().hex}.jsonl')
+        return SpoolSegment(path, fsync=self.spool_fsync)
+
+    def _rotate_segment(self):
+        """关闭当前段文件并开启新段，返回本次刷新覆盖的全部段（调用方持有 _lock）"""
+        segments = self._closed_segments
+        self._closed_segments = []
+        if self._segment is not None:
+            segments.append(self._segment)
+            self._segment = self._open_segment()
+        return segments
+
+    def _compact_spool(self):
+        """丢弃记录后用剩余的待写记录重写 spool，删除包含已丢弃记录的段（调用方持有 _lock）"""
+        if self._segment is None:
+            return
+        segment = self._open_segment()
+        for model_label, fields in self._pending:
+            segment.append(_encode(model_label, fields))
+        for old in [*self._closed_segments, self._segment]:
+            old.remove()
+        self._closed_segments = []
+        self._segment = segment
+
+    def _recover_spool(self):
+        """导入崩溃进程遗留的段文件（能拿到排他锁即说明原进程已不存在）"""
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not (name.startswith('writebehind-') and name.endswith('.jsonl')):
+                continue
+            path = os.path.join(self.spool_dir, name)
+            try:
+                segment = SpoolSegment(path)
+            except (BlockingIOError, FileNotFoundError):
+                continue
+            records = []
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        records.append(_decode(line))
+                    except ValueError:
+                        # 崩溃时最后一行可能只写了一半
+                        logger.warning('spool 段文件 %s 存在损坏行，已跳过', path)
+            self._pending.extend(records)
+            self._closed_segments.append(segment)
+            logger.info('从 %s 恢复了 %d 条待写记录', path, len(records))
+
+    def discard(self):
+        """丢弃全部待写记录（用于基准测试），返回丢弃条数"""
+        with self._flush_lock, self._lock:
+            count = len(self._pending)
+            self._pending.clear()
+            for segment in self._rotate_segment():
+                segment.remove()
+            return count
+
+    def shutdown(self):
+        if self._pid != os.getpid():
+            return
+        self.flush()
+        with self._lock:
+            if self._segment is not None and not self._pending:
+                self._segment.remove()
+                self._segment = None
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'pending': len(self._pending),
+            'max_pending': self.max_pending,
+            'flushed': self.flushed,
+            'flushes': self.flushes,
+            'failures': self.failures,
+            'dropped': self.dropped,
+            'spool_dir': self.spool_dir,
+        }
+
+
+class LastCheckCoalescer:
+    """合并 License.last_check 更新"""
+
+    def __init__(self, enabled=True, flush_interval=5.0, granularity=60, chunk_size=500):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.granularity = timedelta(seconds=granularity)
+        self.chunk_size = chunk_size
+        self.autoflush = True
+        self.last_flush = 0
+
+        self.recorded = 0
+        self.coalesced = 0
+        self.updated = 0
+        self.flushes = 0
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._latest = {}
+        # 每个授权码最近一次写回的时间，用于在入队前跳过足够新的值
+        self._written = {}
+
+    def after_fork_in_child(self):
+        # 继承的检查时间由父进程写回，子进程从空状态开始，锁也需要重新创建
+        self._reset()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'LICENSE_LAST_CHECK', {})
+        return cls(
+            enabled=options.get('COALESCE', True),
+            flush_interval=options.get('FLUSH_INTERVAL', 5.0),
+            granularity=options.get('GRANULARITY', 60),
+        )
+
+    def record(self, license_id, checked_at):
+        """记录一次检查时间"""
+        from .models import License
+
+        if not self.enabled:
+            License.objects.filter(pk=license_id).update(last_check=checked_at)
+            return
+
+        with self._lock:
+            self.recorded += 1
+            written = self._written.get(license_id)
+            if written is not None and checked_at - written < self.granularity:
+                self.coalesced += 1
+                return
+            latest = self._latest.get(license_id)
+            if latest is not None:
+                self.coalesced += 1
+            if latest is None or checked_at > latest:
+                self._latest[license_id] = checked_at
+        flusher.ensure_started()
+
+    def flush(self):
+        """用 UPDATE ... CASE 批量写回，返回更新的行数"""
+        from .models import License
+
+        with self._flush_lock:
+            with self._lock:
+                if not self._latest:
+                    return 0
+                latest = self._latest
+                self._latest = {}
+
+            items = list(latest.items())
+            updated = 0
+            try:
+                for start in range(0, len(items), self.chunk_size):
+                    chunk = items[start:start + self.chunk_size]
+                    new_value = Case(
+                        *[When(pk=pk, then=Value(checked_at)) for pk, checked_at in chunk],
+                        output_field=DateTimeField(),
+                    )
+                    # 库中 last_check 已在粒度范围内的行不再重写
+                    fresh_before = Case(
+                        *[When(pk=pk, then=Value(checked_at - self.granularity))
+                          for pk, checked_at in chunk],
+                        output_field=DateTimeField(),
+                    )
+                    updated += License.objects.filter(
+                        Q(last_check__isnull=True) | Q(last_check__lt=fresh_before),
+                        pk__in=[pk for pk, _ in chunk],
+                    ).update(last_check=new_value)
+            except Exception:
+                logger.exception('last_check 批量更新失败，%d 个授权码重新入队', len(items))
+                with self._lock:
+                    for pk, checked_at in items:
+                        current = self._latest.get(pk)
+                        if current is None or checked_at > current:
+                            self._latest[pk] = checked_at
+                return 0
+
+            with self._lock:
+                self._written.update(latest)
+                # 超出粒度的写回时间不会再让任何检查跳过，及时清理，保证内存有界
+                stale_before = timezone.now() - self.granularity
+                self._written = {
+                    pk: written for pk, written in self._written.items() if written >= stale_before
+                }
+            self.updated += updated
+            self.flushes += 1
+            return updated
+
+    def discard(self):
+        """丢弃全部待写的检查时间（用于基准测试），返回丢弃条数"""
+        with self._flush_lock, self._lock:
+            count = len(self._latest)
+            self._latest = {}
+            return count
+
+    def shutdown(self):
+        self.flush()
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'pending': len(self._latest),
+            'granularity': self.granularity.total_seconds(),
+            'recorded': self.recorded,
+            'coalesced': self.coalesced,
+            'updated': self.updated,
+            'flushes': self.flushes,
+        }
+
+
+write_behind = flusher.register(WriteBehindBuffer.from_settings())
+last_check_updater = flusher.register(LastCheckCoalescer.from_settings())
+
+os.register_at_fork(after_in_child=flusher.after_fork_in_child)
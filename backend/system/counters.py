@@ -0,0 +1,186 @@
+"""
+平台计数器的增量维护与全量校准
+
+每个模型实例对若干计数器列各贡献 1（例如一个 active 的在线客户贡献 customers_total、
+customers_active、customers_online）。实例从数据库加载时记下影响计数的字段值（模型的
+tracked_fields，见 backend/tracking.py），保存后由原值和新值分别算出贡献，只把差值用 F() 表达式
+加到计数器行上；删除时减去加载时的贡献。
+
+计数器只包含不随时间变化的状态。绕过信号的批量写入（queryset.update()、bulk_create 等）
+由 reconcile_counters 命令定期全量校准（见 README 的定时任务）。
+"""
+from collections import Counter
+
+from django.db import models
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import PlatformCounters
+
+COUNTERS_PK = 1
+
+COUNTER_FIELDS = frozenset(
+    field.name for field in PlatformCounters._meta.concrete_fields
+    if isinstance(field, models.IntegerField) and not field.primary_key
+)
+
+
+def contributions(model, values):
+    """model 的实例在 values（tracked_fields 的值）下贡献的计数器列名列表"""
+    from customers.models import Customer, LicenseKey
+    from environments.models import Environment
+    from licenses.models import License
+
+    if model is Customer:
+        return ['customers_total', f'customers_{values["status"]}', f'customers_{values["deployment_type"]}']
+    if model is Environment:
+        return ['environments_total', f'environments_{values["status"]}']
+    if model is License:
+        return ['licenses_total', f'licenses_{values["status"]}', f'licenses_type_{values["license_type"]}']
+    if model is LicenseKey:
+        fields = ['license_keys_total']
+        if values['is_active']:
+            fields.append('license_keys_active')
+        return fields
+    return []
+
+
+def current_contributions(instance):
+    """实例当前字段值下的贡献"""
+    return contributions(type(instance), {name: getattr(instance, name) for name in instance.tracked_fields})
+
+
+def loaded_contributions(instance):
+    """实例从数据库加载时的贡献；不是从数据库加载的或延迟加载了计数字段时返回 None"""
+    values = getattr(instance, '_loaded_values', None)
+    if values is None or len(values) != len(instance.tracked_fields):
+        return None
+    return contributions(type(instance), values)
+
+
+def apply_delta(delta):
+    """把 {列名: 增量} 原子地加到计数器行上，计数器行不存在时全量重算"""
+    delta = {field: value for field, value in delta.items() if value and field in COUNTER_FIELDS}
+    if not delta:
+        return
+    updated = PlatformCounters.objects.filter(pk=COUNTERS_PK).update(
+        **{field: F(field) + value for field, value in delta.items()}
+    )
+    if not updated:
+        reconcile()
+
+
+def transition(old_fields, new_fields):
+    """实例从旧贡献变为新贡献时更新计数器"""
+    delta = Counter(new_fields)
+    delta.subtract(Counter(old_fields))
+    apply_delta(delta)
+
+
+def recount():
+    """全量统计各计数器的当前值"""
+    from customers.models import Customer, LicenseKey
+    from environments.models import Environment
+    from licenses.models import License
+
+    def count_by(prefix, field, choices):
+        return {
+            f'{prefix}{value}': Count('pk', filter=Q(**{field: value})) for value, _ in choices
+        }
+
+    # 每个模型一条聚合查询
+    values = {}
+    values.update(Customer.objects.aggregate(
+        customers_total=Count('pk'),
+        **count_by('customers_', 'status', Customer.STATUS_CHOICES),
+        **count_by('customers_', 'deployment_type', Customer.DEPLOYMENT_TYPES),
+    ))
+    values.update(Environment.objects.aggregate(
+        environments_total=Count('pk'),
+        **count_by('environments_', 'status', Environment.STATUS_CHOICES),
+    ))
+    values.update(License.objects.aggregate(
+        licenses_total=Count('pk'),
+        **count_by('licenses_', 'status', License.STATUS_CHOICES),
+        **count_by('licenses_type_', 'license_type', License.TYPE_CHOICES),
+    ))
+    values.update(LicenseKey.objects.aggregate(
+        license_keys_total=Count('pk'),
+        license_keys_active=Count('pk', filter=Q(is_active=True)),
+    ))
+    return {field: value for field, value in values.items() if field in COUNTER_FIELDS}
+
+
+def reconcile():
+    """全量重算并覆盖计数器行，返回 {列名: (旧值, 新值)} 形式的偏差"""
+    values = recount()
+    counters, _ = PlatformCounters.objects.get_or_create(pk=COUNTERS_PK)
+    drift = {
+        field: (getattr(counters, field), value)
+        for field, value in values.items()
+        if getattr(counters, field) != value
+    }
+    PlatformCounters.objects.filter(pk=COUNTERS_PK).update(reconciled_at=timezone.now(), **values)
+    return drift
+
+
+def get_counters():
+    """读取计数器行（单行主键查询），不存在时先全量重算"""
+    counters = PlatformCounters.objects.filter(pk=COUNTERS_PK).first()
+    if counters is None:
+        reconcile()
+        counters = PlatformCounters.objects.get(pk=COUNTERS_PK)
+    return counters
+
+
+def license_stats():
+    return _license_stats(get_counters())
+
+
+def _license_stats(counters):
+    return {
+        'total_licenses': counters.licenses_total,
+        'active_licenses': counters.licenses_active,
+        'expired_licenses': counters.licenses_expired,
+        'revoked_licenses': counters.licenses_revoked,
+        'pending_licenses': counters.licenses_pending,
+    }
+
+
+def environment_stats():
+    return _environment_stats(get_counters())
+
+
+def _environment_stats(counters):
+    return {
+        'total_environments': counters.environments_total,
+        'running_environments': counters.environments_running,
+        'stopped_environments': counters.environments_stopped,
+        'error_environments': counters.environments_error,
+        'pending_environments': counters.environments_pending,
+    }
+
+
+def customer_stats():
+    return _customer_stats(get_counters())
+
+
+def _customer_stats(counters):
+    return {
+        'total_customers': counters.customers_total,
+        'active_customers': counters.customers_active,
+        'online_customers': counters.customers_online,
+        'offline_customers': counters.customers_offline,
+        'trial_customers': counters.customers_trial,
+        'expired_customers': counters.customers_expired,
+    }
+
+
+def platform_stats():
+    """仪表盘使用的全部统计，一次读取计数器行"""
+    counters = get_counters()
+    return {
+        **_customer_stats(counters),
+        **_environment_stats(counters),
+        **_license_stats(counters),
+    }
@@ -0,0 +1,68 @@
+"""
+维护模式、上传大小限制和请求指标中间件的开销基准测试
+运行命令：python manage.py benchmark_middleware --iterations 100000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from system.metrics import request_metrics
+from system.middleware import MaintenanceModeMiddleware, MetricsMiddleware, UploadSizeLimitMiddleware
+from system.settings_cache import system_settings
+
+
+class Command(BaseCommand):
+    help = '测量维护模式、上传大小限制和请求指标中间件的单次请求开销（对比不经过中间件的空视图）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100000, help='每轮请求次数')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        response = HttpResponse()
+
+        def view(request):
+            return response
+
+        factory = RequestFactory()
+        requests = {
+            'GET': factory.get('/api/customers/'),
+            'POST': factory.post('/api/customers/', data=b'{}', content_type='application/json'),
+        }
+        chains = {
+            '维护模式+上传限制': MaintenanceModeMiddleware(UploadSizeLimitMiddleware(view)),
+            '请求指标': MetricsMiddleware(view),
+        }
+        # 预热设置快照，之后的请求不应查询数据库
+        system_settings.get()
+
+        baseline = {}
+        for method, request in requests.items():
+            baseline[method] = self.run(view, request, iterations)
+            self.report(f'{method} 无中间件', iterations, baseline[method])
+
+        for label, chain in chains.items():
+            for method, request in requests.items():
+                with CaptureQueriesContext(connection) as queries:
+                    elapsed = self.run(chain, request, iterations)
+                self.report(f'{method} 经过{label}中间件', iterations, elapsed)
+                overhead = (elapsed - baseline[method]) / iterations * 1e9
+                self.stdout.write(f'    每请求额外开销 {overhead:.0f}ns，数据库查询 {len(queries)} 次')
+        # 基准测试的请求不计入指标（配置了 METRICS_DIR 时本进程退出前会写入共享目录）
+        request_metrics.reset()
+
+    def run(self, handler, request, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            handler(request)
+        return time.perf_counter() - started
+
+    def report(self, label, iterations, elapsed):
+        self.stdout.write(
+            f'{label}: {iterations} 次，耗时 {elapsed:.3f}s，'
+            f'{iterations / elapsed:.0f} 次/秒，平均 {elapsed / iterations * 1e9:.0f}ns'
+        )
@@ -0,0 +1,41 @@
+"""
+按保留策略清理日志和使用记录
+运行命令：python manage.py purge_logs [--dry-run] [--table license_usage] [--days 30]
+建议由 cron 或 systemd timer 每天执行
+"""
+from django.core.management.base import BaseCommand
+
+from system.retention import TABLE_NAMES, purge
+
+
+class Command(BaseCommand):
+    help = '按系统设置中的保留天数分批清理日志和授权使用记录'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', action='append', choices=TABLE_NAMES, help='只清理指定的表，可重复')
+        parser.add_argument('--days', type=int, help='覆盖所有表的保留天数')
+        parser.add_argument('--batch-size', type=int, default=5000, help='每批删除的主键区间大小')
+        parser.add_argument('--pause', type=float, default=0.05, help='批之间暂停的秒数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计将被清理的行数')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 1:
+            self.stderr.write(self.style.ERROR('天数必须是大于0的整数'))
+            return
+
+        report = purge(
+            days=options['days'],
+            tables=options['table'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+
+        action = '将清理' if options['dry_run'] else '已清理'
+        for name, result in report.items():
+            self.stdout.write(
+                f"  {name}: 清理 {result['cutoff']:%Y-%m-%d %H:%M} 之前，{action} {result['deleted']} 行"
+                f"（{result['batches']} 批，耗时 {result['seconds']:.2f}s）"
+            )
+        total = sum(result['deleted'] for result in report.values())
+        self.stdout.write(self.style.SUCCESS(f'{action} {total} 行'))
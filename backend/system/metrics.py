@@ -0,0 +1,310 @@
+"""
+请求指标：按视图统计请求数、耗时分布、响应大小和数据库查询
+
+每个进程在内存中按 (method, view, status) 聚合，记录一次请求只在进程内的锁下做几次加法。
+配置了 DIR 时，后台线程每 FLUSH_INTERVAL 秒把本进程的累计值整体写入 DIR 下本进程专属的文件
+（先写临时文件再替换，读取方不会读到写了一半的内容），各进程只写自己的文件，互不加锁；
+/api/metrics 读取目录中全部文件，与本进程的实时数据相加后输出 Prometheus 文本格式。
+未配置 DIR 时只输出处理本次请求的进程的数据，适合单进程部署。
+
+进程正常退出时把自己的累计值并入 DIR 下的 metrics-archive.json（文件锁保护），再删除自己的文件，
+目录中的文件数不随进程重启增长，汇总的计数器仍然单调递增；被强制杀死的进程来不及归档，
+它最后一次写入的文件会保留。fork 出的子进程清空继承的数据、文件名和后台线程，从零开始统计。
+DIR 应在每次部署启动前清空。
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = 'odoo_saas'
+
+# 耗时（秒）和响应大小（字节）的直方图桶上界
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+# 每个序列的值：前 6 项如下，其后依次为耗时桶和大小桶（非累计）的计数
+COUNT, DURATION_SUM, SIZE_COUNT, SIZE_SUM, DB_QUERIES, DB_SECONDS = range(6)
+DURATION_OFFSET = 6
+SIZE_OFFSET = DURATION_OFFSET + len(DURATION_BUCKETS) + 1
+SERIES_LENGTH = SIZE_OFFSET + len(SIZE_BUCKETS) + 1
+
+LABEL_SEPARATOR = '\t'
+
+ARCHIVE_NAME = 'metrics-archive.json'
+
+
+def _bucket(buckets, value):
+    # 第一个上界不小于 value 的桶，超过全部上界时为 +Inf 桶
+    return bisect_left(buckets, value)
+
+
+class QueryCounter:
+    """connection.execute_wrapper 使用的查询计数器"""
+
+    __slots__ = ('queries', 'seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+class RequestMetrics:
+    """进程内的请求指标聚合，可选按进程写入共享目录"""
+
+    def __init__(self, enabled=True, directory='', flush_interval=5.0):
+        self.enabled = enabled
+        self.directory = directory or None
+        self.flush_interval = flush_interval
+        self.series = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty = False
+        self._flusher = None
+        self._filename = None
+        self._pid = os.getpid()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'METRICS', {})
+        return cls(
+            enabled=options.get('ENABLED', True),
+            directory=options.get('DIR', ''),
+            flush_interval=options.get('FLUSH_INTERVAL', 5.0),
+        )
+
+    @property
+    def path(self):
+        if self._filename is None:
+            # 进程号可能被复用，加随机后缀保证每个进程的文件不同
+            self._filename = f'metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+        return os.path.join(self.directory, self._filename)
+
+    def observe(self, method, view, status, duration, size=None, db_queries=0, db_seconds=0.0):
+        """记录一次请求；size 为 None（流式响应）时不计入响应大小"""
+        key = LABEL_SEPARATOR.join((method, view, str(status)))
+        duration_bucket = DURATION_OFFSET + _bucket(DURATION_BUCKETS, duration)
+        with self._lock:
+            values = self.series.get(key)
+            if values is None:
+                values = self.series[key] = [0] * SERIES_LENGTH
+            values[COUNT] += 1
+            values[DURATION_SUM] += duration
+            values[duration_bucket] += 1
+            if size is not None:
+                values[SIZE_COUNT] += 1
+                values[SIZE_SUM] += size
+                values[SIZE_OFFSET + _bucket(SIZE_BUCKETS, size)] += 1
+            values[DB_QUERIES] += db_queries
+            values[DB_SECONDS] += db_seconds
+            self._dirty = True
+        if self.directory and self._flusher is None:
+            self._start_flusher()
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(values) for key, values in self.series.items()}
+
+    def flush(self):
+        """把本进程的累计值写入共享目录"""
+        if not self.directory or not self._dirty:
+            return
+        with self._lock:
+            data = {key: list(values) for key, values in self.series.items()}
+            self._dirty = False
+        path = self.path
+        tmp_path = f'{path}.tmp'
+        with self._flush_lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(tmp_path, path)
+            except OSError:
+                self._dirty = True
+                logger.warning('写入请求指标文件失败: %s', path, exc_info=True)
+
+    def retire(self):
+        """进程退出时调用：把本进程的累计值并入归档文件，删除本进程的文件"""
+        if not self.directory or self._pid != os.getpid():
+            return
+        with self._lock:
+            data = {key: list(values) for key, values in self.series.items()}
+            self.series.clear()
+            self._dirty = False
+        path = self.path
+        archive_path = os.path.join(self.directory, ARCHIVE_NAME)
+        with self._flush_lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(f'{archive_path}.lock', 'a') as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    if data:
+                        _merge(data, _read_series(archive_path))
+                        tmp_path = f'{path}.tmp'
+                        with open(tmp_path, 'w') as f:
+                            json.dump(data, f, separators=(',', ':'))
+                        os.replace(tmp_path, archive_path)
+                    if os.path.exists(path):
+                        os.remove(path)
+            except OSError:
+                logger.warning('归档请求指标文件失败: %s', path, exc_info=True)
+
+    def after_fork_in_child(self):
+        """fork 后在子进程中调用：继承的数据属于父进程，子进程使用新的文件和后台线程"""
+        self.series = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty = False
+        self._flusher = None
+        self._filename = None
+        self._pid = os.getpid()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='request-metrics', daemon=True)
+        self._flusher.start()
+
+    def collect(self):
+        """全部进程的累计值：共享目录中其他进程的文件加上本进程的实时数据"""
+        merged = self.snapshot()
+        if not self.directory:
+            return merged
+        own = os.path.basename(self.path)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            lock = open(os.path.join(self.directory, f'{ARCHIVE_NAME}.lock'), 'a')
+        except OSError:
+            return merged
+        with lock:
+            # 共享锁：退出的进程归档（写归档文件、删除自己的文件）期间不读取，避免重复或遗漏
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                return merged
+            for name in names:
+                if name == own or not name.startswith('metrics-') or not name.endswith('.json'):
+                    continue
+                _merge(merged, _read_series(os.path.join(self.directory, name)))
+        return merged
+
+    def reset(self):
+        with self._lock:
+            self.series.clear()
+            self._dirty = True
+
+
+def _read_series(path):
+    """读取一个指标文件，不存在或内容不完整时返回空字典"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _merge(merged, data):
+    """把 data 中的各序列加到 merged 上"""
+    for key, values in data.items():
+        if len(values) != SERIES_LENGTH:
+            continue
+        current = merged.get(key)
+        if current is None:
+            merged[key] = values
+        else:
+            for i, value in enumerate(values):
+                current[i] += value
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(pairs):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def _histogram(lines, name, labels, values, buckets, offset, count, total):
+    cumulative = 0
+    for i, bound in enumerate(buckets):
+        cumulative += values[offset + i]
+        lines.append(f'{name}_bucket{_labels(labels + [("le", _format_number(float(bound)))])} {cumulative}')
+    lines.append(f'{name}_bucket{_labels(labels + [("le", "+Inf")])} {count}')
+    lines.append(f'{name}_sum{_labels(labels)} {_format_number(float(total))}')
+    lines.append(f'{name}_count{_labels(labels)} {count}')
+
+
+def render(series):
+    """按 Prometheus 文本格式（0.0.4）输出"""
+    rows = []
+    for key in sorted(series):
+        method, view, status = key.split(LABEL_SEPARATOR)
+        rows.append(([('method', method), ('view', view), ('status', status)], series[key]))
+
+    lines = []
+    metric = f'{NAMESPACE}_http_requests_total'
+    lines += [f'# HELP {metric} 请求数', f'# TYPE {metric} counter']
+    for labels, values in rows:
+        lines.append(f'{metric}{_labels(labels)} {values[COUNT]}')
+
+    metric = f'{NAMESPACE}_http_request_duration_seconds'
+    lines += [f'# HELP {metric} 请求耗时（秒）', f'# TYPE {metric} histogram']
+    for labels, values in rows:
+        _histogram(lines, metric, labels, values, DURATION_BUCKETS, DURATION_OFFSET,
+                   values[COUNT], values[DURATION_SUM])
+
+    metric = f'{NAMESPACE}_http_response_size_bytes'
+    lines += [f'# HELP {metric} 响应大小（字节），流式响应不计入', f'# TYPE {metric} histogram']
+    for labels, values in rows:
+        _histogram(lines, metric, labels, values, SIZE_BUCKETS, SIZE_OFFSET,
+                   values[SIZE_COUNT], values[SIZE_SUM])
+
+    metric = f'{NAMESPACE}_db_queries_total'
+    lines += [f'# HELP {metric} 处理请求时执行的数据库查询数', f'# TYPE {metric} counter']
+    for labels, values in rows:
+        lines.append(f'{metric}{_labels(labels)} {values[DB_QUERIES]}')
+
+    metric = f'{NAMESPACE}_db_query_duration_seconds_total'
+    lines += [f'# HELP {metric} 处理请求时数据库查询的总耗时（秒）', f'# TYPE {metric} counter']
+    for labels, values in rows:
+        lines.append(f'{metric}{_labels(labels)} {_format_number(float(values[DB_SECONDS]))}')
+
+    return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics.from_settings()
+
+atexit.register(request_metrics.retire)
+os.register_at_fork(after_in_child=request_metrics.after_fork_in_child)
@@ -0,0 +1,110 @@
+"""
+系统中间件
+
+维护模式和上传大小限制都读取进程内的系统设置快照（见 system/settings_cache.py），
+快照有效期内不查询数据库。两个中间件都放在会话、认证等中间件之前，被拒绝的请求不再做后续处理。
+请求指标中间件放在最前面，统计的耗时包含其他中间件（见 system/metrics.py）。
+"""
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import JsonResponse
+
+from .metrics import QueryCounter, request_metrics
+from .settings_cache import system_settings
+
+MAINTENANCE_MESSAGE = '系统维护中，请稍后再试'
+UPLOAD_TOO_LARGE_MESSAGE = '请求内容超过上传大小限制（{limit} MB）'
+
+
+class MaintenanceModeMiddleware:
+    """维护模式下返回 503 和 Retry-After
+
+    授权码验证、健康检查和请求指标不受影响；登录、系统设置接口和 Django admin 也放行，
+    以便管理员关闭维护模式。放行的路径前缀见 settings.MAINTENANCE_MODE['EXEMPT_PATHS']。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        options = settings.MAINTENANCE_MODE
+        self.exempt_paths = tuple(options['EXEMPT_PATHS'])
+        self.retry_after = str(options['RETRY_AFTER'])
+
+    def __call__(self, request):
+        if system_settings.get().maintenance_mode and not request.path_info.startswith(self.exempt_paths):
+            response = JsonResponse({'detail': MAINTENANCE_MESSAGE}, status=503)
+            response['Retry-After'] = self.retry_after
+            return response
+        return self.get_response(request)
+
+
+class UploadSizeLimitMiddleware:
+    """请求体超过 max_upload_size（MB）时直接返回 413，max_upload_size 不大于 0 时不限制
+
+    先检查 Content-Length 请求头，在 DRF 解析（读取、缓冲请求体）之前拒绝。请求头缺失或与实际不符时：
+    WSGI 下 Django 读取请求体的流本身以 Content-Length 为上限，多出的内容读不到；
+    ASGI 下请求体在进入中间件前已整体读入临时文件，这里按文件的实际大小再判断一次。
+    ASGI 缓冲阶段无法在 Django 内中止，需要由前端代理（如 nginx client_max_body_size）限制。
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        limit = system_settings.get().max_upload_size
+        if limit > 0:
+            limit_bytes = limit * 1024 * 1024
+            try:
+                length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            if length > limit_bytes or _buffered_body_size(request) > limit_bytes:
+                return JsonResponse({'detail': UPLOAD_TOO_LARGE_MESSAGE.format(limit=limit)}, status=413)
+        return self.get_response(request)
+
+
+def _buffered_body_size(request):
+    """ASGI 请求已缓冲的请求体大小（不读取内容）；WSGI 的输入流不可定位，返回 0"""
+    stream = getattr(request, '_stream', None)
+    if not isinstance(stream, tempfile.SpooledTemporaryFile):
+        return 0
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size
+
+
+class MetricsMiddleware:
+    """按视图记录请求数、耗时、响应大小和数据库查询数/耗时"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request_metrics.enabled:
+            return self.get_response(request)
+        counter = QueryCounter()
+        # 与 connection.execute_wrapper() 相同，但只查找一次线程本地的连接对象
+        db = connections[DEFAULT_DB_ALIAS]
+        db.execute_wrappers.append(counter)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            db.execute_wrappers.pop()
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+        request_metrics.observe(
+            request.method, view, response.status_code, duration,
+            size=size, db_queries=counter.queries, db_seconds=counter.seconds,
+        )
+        return response
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformCounters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('customers_total', models.IntegerField(default=0, verbose_name='客户总数')),
+                ('customers_active', models.IntegerField(default=0, verbose_name='活跃客户数')),
+                ('customers_suspended', models.IntegerField(default=0, verbose_name='暂停客户数')),
+                ('customers_expired', models.IntegerField(default=0, verbose_name='过期客户数')),
+                ('customers_trial', models.IntegerField(default=0, verbose_name='试用客户数')),
+                ('customers_online', models.IntegerField(default=0, verbose_name='在线部署客户数')),
+                ('customers_offline', models.IntegerField(default=0, verbose_name='离线部署客户数')),
+                ('environments_total', models.IntegerField(default=0, verbose_name='环境总数')),
+                ('environments_running', models.IntegerField(default=0, verbose_name='运行中环境数')),
+                ('environments_stopped', models.IntegerField(default=0, verbose_name='已停止环境数')),
+                ('environments_error', models.IntegerField(default=0, verbose_name='错误环境数')),
+                ('environments_pending', models.IntegerField(default=0, verbose_name='部署中环境数')),
+                ('environments_unknown', models.IntegerField(default=0, verbose_name='未知状态环境数')),
+                ('licenses_total', models.IntegerField(default=0, verbose_name='授权码总数')),
+                ('licenses_active', models.IntegerField(default=0, verbose_name='有效授权码数')),
+                ('licenses_expired', models.IntegerField(default=0, verbose_name='已过期授权码数')),
+                ('licenses_revoked', models.IntegerField(default=0, verbose_name='已撤销授权码数')),
+                ('licenses_pending', models.IntegerField(default=0, verbose_name='待激活授权码数')),
+                ('licenses_type_trial', models.IntegerField(default=0, verbose_name='试用版授权码数')),
+                ('licenses_type_standard', models.IntegerField(default=0, verbose_name='标准版授权码数')),
+                ('licenses_type_professional', models.IntegerField(default=0, verbose_name='专业版授权码数')),
+                ('licenses_type_enterprise', models.IntegerField(default=0, verbose_name='企业版授权码数')),
+                ('license_keys_total', models.IntegerField(default=0, verbose_name='离线授权码总数')),
+                ('license_keys_active', models.IntegerField(default=0, verbose_name='已激活离线授权码数')),
+                ('license_keys_valid', models.IntegerField(default=0, verbose_name='可用离线授权码数')),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True, verbose_name='最后校准时间')),
+            ],
+            options={
+                'verbose_name': '平台计数器',
+                'verbose_name_plural': '平台计数器',
+            },
+        ),
+    ]
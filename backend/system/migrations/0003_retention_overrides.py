@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0002_platform_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemsettings',
+            name='activity_log_retention_days',
+            field=models.IntegerField(blank=True, null=True, verbose_name='用户活动日志保留天数'),
+        ),
+        migrations.AddField(
+            model_name='systemsettings',
+            name='environment_log_retention_days',
+            field=models.IntegerField(blank=True, null=True, verbose_name='环境日志保留天数'),
+        ),
+        migrations.AddField(
+            model_name='systemsettings',
+            name='license_log_retention_days',
+            field=models.IntegerField(blank=True, null=True, verbose_name='授权日志保留天数'),
+        ),
+        migrations.AddField(
+            model_name='systemsettings',
+            name='license_usage_retention_days',
+            field=models.IntegerField(blank=True, null=True, verbose_name='授权使用记录保留天数'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0003_retention_overrides'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemsettings',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='版本号'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0004_settings_version'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='platformcounters',
+            name='license_keys_valid',
+        ),
+    ]
@@ -1,3 +1,4 @@
+import copy
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -28,6 +29,11 @@ class SystemSettings(models.Model):
     
     # 日志设置
     log_retention_days = models.IntegerField(default=90, verbose_name='日志保留天数')
+    # 各表单独的保留天数，为空时使用 log_retention_days
+    license_usage_retention_days = models.IntegerField(blank=True, null=True, verbose_name='授权使用记录保留天数')
+    license_log_retention_days = models.IntegerField(blank=True, null=True, verbose_name='授权日志保留天数')
+    environment_log_retention_days = models.IntegerField(blank=True, null=True, verbose_name='环境日志保留天数')
+    activity_log_retention_days = models.IntegerField(blank=True, null=True, verbose_name='用户活动日志保留天数')
     
     # 邮件设置
     email_notifications = models.BooleanField(default=False, verbose_name='启用邮件通知')
@@ -38,6 +44,8 @@ class SystemSettings(models.Model):
     smtp_password = models.CharField(max_length=100, blank=True, verbose_name='SMTP密码')
     
     # 元数据
+    # 每次保存加一，各进程据此判断缓存的设置快照是否过期（见 system/settings_cache.py）
+    version = models.PositiveIntegerField(default=1, editable=False, verbose_name='版本号')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     updated_by = models.ForeignKey(
         User, 
@@ -54,9 +62,18 @@ class SystemSettings(models.Model):
     def __str__(self):
         return f"系统设置 - {self.site_name}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            # 在数据库中原子加一，并发保存不会得到相同的版本号；保存后由 publish_system_settings 读回
+            self.version = models.F('version') + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'version'}
+        super().save(*args, **kwargs)
+
     @classmethod
-    def get_settings(cls):
-        """获取系统设置（单例模式）"""
+    def load(cls):
+        """从数据库读取系统设置（单例模式），修改设置时使用"""
         settings, created = cls.objects.get_or_create(
             pk=1,
             defaults={
@@ -64,3 +81,52 @@ class SystemSettings(models.Model):
             }
         )
         return settings
+
+    @classmethod
+    def get_settings(cls):
+        """获取系统设置：进程内快照的副本，版本号变化时才重新读取"""
+        from .settings_cache import system_settings
+        return copy.copy(system_settings.get())
+
+class PlatformCounters(models.Model):
+    """平台计数器（单行表）
+
+    由 system/signals.py 在模型保存、删除时增量维护，统计接口只需读取这一行；
+    reconcile_counters 命令定期全量重算以修正绕过信号的写入造成的偏差。
+    """
+    customers_total = models.IntegerField(default=0, verbose_name='客户总数')
+    customers_active = models.IntegerField(default=0, verbose_name='活跃客户数')
+    customers_suspended = models.IntegerField(default=0, verbose_name='暂停客户数')
+    customers_expired = models.IntegerField(default=0, verbose_name='过期客户数')
+    customers_trial = models.IntegerField(default=0, verbose_name='试用客户数')
+    customers_online = models.IntegerField(default=0, verbose_name='在线部署客户数')
+    customers_offline = models.IntegerField(default=0, verbose_name='离线部署客户数')
+
+    environments_total = models.IntegerField(default=0, verbose_name='环境总数')
+    environments_running = models.IntegerField(default=0, verbose_name='运行中环境数')
+    environments_stopped = models.IntegerField(default=0, verbose_name='已停止环境数')
+    environments_error = models.IntegerField(default=0, verbose_name='错误环境数')
+    environments_pending = models.IntegerField(default=0, verbose_name='部署中环境数')
+    environments_unknown = models.IntegerField(default=0, verbose_name='未知状态环境数')
+
+    licenses_total = models.IntegerField(default=0, verbose_name='授权码总数')
+    licenses_active = models.IntegerField(default=0, verbose_name='有效授权码数')
+    licenses_expired = models.IntegerField(default=0, verbose_name='已过期授权码数')
+    licenses_revoked = models.IntegerField(default=0, verbose_name='已撤销授权码数')
+    licenses_pending = models.IntegerField(default=0, verbose_name='待激活授权码数')
+    licenses_type_trial = models.IntegerField(default=0, verbose_name='试用版授权码数')
+    licenses_type_standard = models.IntegerField(default=0, verbose_name='标准版授权码数')
+    licenses_type_professional = models.IntegerField(default=0, verbose_name='专业版授权码数')
+    licenses_type_enterprise = models.IntegerField(default=0, verbose_name='企业版授权码数')
+
+    license_keys_total = models.IntegerField(default=0, verbose_name='离线授权码总数')
+    license_keys_active = models.IntegerField(default=0, verbose_name='已激活离线授权码数')
+
+    reconciled_at = models.DateTimeField(blank=True, null=True, verbose_name='最后校准时间')
+
+    class Meta:
+        verbose_name = '平台计数器'
+        verbose_name_plural = '平台计数器'
+
+    def __str__(self):
+        return '平台计数器'
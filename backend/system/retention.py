@@ -0,0 +1,103 @@
+"""
+日志与使用记录保留策略
+
+按 SystemSettings.log_retention_days 和各表单独的保留天数清理过期数据。
+每张表按主键区间分批执行 DELETE ... WHERE id >= %s AND id < %s AND 时间 < 截止时间，
+不经过 Django 的级联收集（这些表没有被其他表引用），每批单独提交并在批之间暂停，
+避免长时间持有锁。启用使用记录汇总后，已汇总的原始使用记录按
+LICENSE_USAGE_ROLLUP_RAW_RETENTION_DAYS 提前清理。
+"""
+import time
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from environments.models import EnvironmentLog
+from licenses.models import LicenseUsage, LicenseLog
+from licenses.rollup import early_purge_cutoff
+from users.models import UserActivityLog
+from .models import SystemSettings
+
+# (表名, 模型, 时间字段, SystemSettings 中的单独保留天数字段)
+RETENTION_TABLES = [
+    ('license_usage', LicenseUsage, 'checked_at', 'license_usage_retention_days'),
+    ('license_logs', LicenseLog, 'created_at', 'license_log_retention_days'),
+    ('environment_logs', EnvironmentLog, 'created_at', 'environment_log_retention_days'),
+    ('activity_logs', UserActivityLog, 'created_at', 'activity_log_retention_days'),
+]
+TABLE_NAMES = [name for name, _, _, _ in RETENTION_TABLES]
+
+
+def retention_days(settings, override_field):
+    value = getattr(settings, override_field)
+    return value if value is not None else settings.log_retention_days
+
+
+def purge_table(model, time_field, cutoff, batch_size=5000, pause=0.05, dry_run=False, max_batches=None):
+    """清理一张表中早于 cutoff 的行，返回 {'deleted', 'batches', 'more', 'seconds'}
+
+    max_batches 不为空时最多执行这么多批，还有未处理的主键区间时 more 为 True，
+    再次调用会从剩余过期行的最小主键继续。
+    """
+    started = time.perf_counter()
+    result = {'deleted': 0, 'batches': 0, 'more': False, 'seconds': 0.0}
+
+    expired = model.objects.order_by().filter(**{f'{time_field}__lt': cutoff})
+    if dry_run:
+        result['deleted'] = expired.count()
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    bounds = expired.aggregate(lo=Min('pk'), hi=Max('pk'))
+    if bounds['lo'] is None:
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    quote = connection.ops.quote_name
+    sql = 'DELETE FROM {table} WHERE {pk} >= %s AND {pk} < %s AND {column} < %s'.format(
+        table=quote(model._meta.db_table),
+        pk=quote(model._meta.pk.column),
+        column=quote(model._meta.get_field(time_field).column),
+    )
+    cutoff_param = connection.ops.adapt_datetimefield_value(cutoff)
+    for start in range(bounds['lo'], bounds['hi'] + 1, batch_size):
+        if max_batches is not None and result['batches'] >= max_batches:
+            result['more'] = True
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [start, start + batch_size, cutoff_param])
+            result['deleted'] += cursor.rowcount
+        result['batches'] += 1
+        if pause:
+            time.sleep(pause)
+
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def purge(days=None, tables=None, batch_size=5000, pause=0.05, dry_run=False, max_batches=None):
+    """按保留策略清理各表，返回 {表名: {'retention_days', 'deleted', 'batches', 'more', 'seconds'}}
+
+    days 不为空时所有表都使用该保留天数（手动清理），否则使用系统设置。
+    max_batches 为每张表最多执行的批数（见 purge_table）。
+    """
+    settings = SystemSettings.get_settings()
+    now = timezone.now()
+    report = {}
+    for name, model, time_field, override_field in RETENTION_TABLES:
+        if tables and name not in tables:
+            continue
+        keep_days = days if days is not None else retention_days(settings, override_field)
+        cutoff = now - timezone.timedelta(days=keep_days)
+        if model is LicenseUsage and days is None:
+            # 已汇总的原始使用记录可以提前清理，但不越过汇总进度
+            early_cutoff = early_purge_cutoff(now)
+            if early_cutoff is not None and early_cutoff > cutoff:
+                cutoff = early_cutoff
+        result = purge_table(
+            model, time_field, cutoff,
+            batch_size=batch_size, pause=pause, dry_run=dry_run, max_batches=max_batches,
+        )
+        report[name] = {'retention_days': keep_days, 'cutoff': cutoff, **result}
+    return report
@@ -0,0 +1,342 @@
+"""
+全局搜索的进程内倒排索引
+
+把客户、环境、授权码、离线授权码和用户的可搜索字段规范化（小写）后切成 n-gram，
+建立 n-gram -> 文档 的倒排表。查询时取搜索词中最少见的 n-gram 的倒排表作为候选文档，
+再逐个确认搜索词确实是某个字段的子串，按 完全匹配 > 前缀匹配 > 包含匹配 和字段权重打分。
+
+索引在进程内首次使用时构建，按 REBUILD_INTERVAL 在后台定期重建；本进程内的保存和删除
+通过 post_save / post_delete 信号即时更新索引（见 system/signals.py），没有改动可搜索字段的
+保存（如登录时只更新 last_login）不更新索引。其他进程的修改要等本进程下一次重建才可见。
+"""
+import logging
+import sys
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# 字段权重：标题字段高于辅助字段
+TITLE_WEIGHT = 2.0
+FIELD_WEIGHT = 1.0
+
+MATCH_EXACT = 100
+MATCH_PREFIX = 50
+MATCH_CONTAINS = 10
+
+Document = namedtuple('Document', 'type id title subtitle fields')
+
+
+def normalize(value):
+    return str(value).strip().lower() if value is not None else ''
+
+
+def ngrams(text, n):
+    """text 的全部 n-gram，短于 n 的文本整体作为一个 gram"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SearchSource:
+    """一种可搜索实体：模型、读取的字段、标题/副标题字段和参与搜索的字段"""
+
+    def __init__(self, type, model_path, title, subtitle, fields):
+        self.type = type
+        self.model_path = model_path
+        self.title = title
+        self.subtitle = subtitle
+        self.fields = fields
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_path)
+
+    @property
+    def columns(self):
+        return list(dict.fromkeys(['pk', self.title, self.subtitle, *self.fields]))
+
+    def document(self, values):
+        fields = []
+        for name in self.fields:
+            value = normalize(values.get(name))
+            if value:
+                weight = TITLE_WEIGHT if name == self.title else FIELD_WEIGHT
+                fields.append((name, value, weight))
+        return Document(
+            self.type, values['pk'],
+            values.get(self.title) or '', values.get(self.subtitle) or '',
+            tuple(fields),
+        )
+
+    def document_for(self, instance):
+        return self.document({name: getattr(instance, name) for name in self.columns})
+
+
+SEARCH_SOURCES = [
+    SearchSource('customer', 'customers.Customer', 'name', 'customer_id',
+                 ['customer_id', 'name', 'company', 'contact_email']),
+    SearchSource('environment', 'environments.Environment', 'release_name', 'domain',
+                 ['release_name', 'namespace', 'domain']),
+    SearchSource('license', 'licenses.License', 'license_key', 'deployment_domain',
+                 ['license_key', 'deployment_domain']),
+    SearchSource('license_key', 'customers.LicenseKey', 'license_code', 'expire_date',
+                 ['license_code']),
+    SearchSource('user', 'auth.User', 'username', 'email',
+                 ['username', 'email', 'first_name', 'last_name']),
+]
+SOURCE_TYPES = [source.type for source in SEARCH_SOURCES]
+# 含离线授权码、用户名和邮箱的类型只对管理员返回（见 system/views.py global_search）
+ADMIN_ONLY_TYPES = frozenset({'license_key', 'user'})
+
+
+class InvertedIndex:
+    """n-gram 倒排表
+
+    文档以 (类型, 主键) 为键，内部编号为整数，倒排表用 array('I') 保存文档编号以节省内存。
+    删除和更新只移除文档本身（O(1)），倒排表中留下的旧编号在查询时跳过，下次重建时清除；
+    编号不复用，旧编号不会指向新文档。
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self.documents = {}
+        self.doc_ids = {}
+        self.postings = {}
+        self._next_id = 0
+        # 倒排表中已失效的编号数，重建时归零
+        self.stale = 0
+
+    def _grams(self, document):
+        grams = set()
+        for _, value, _ in document.fields:
+            grams |= ngrams(value, self.n)
+        return grams
+
+    def add(self, document):
+        key = (document.type, document.id)
+        doc_id = self.doc_ids.get(key)
+        if doc_id is not None and self.documents[doc_id] == document:
+            return
+        self.remove(key)
+        doc_id = self._next_id
+        self._next_id += 1
+        self.doc_ids[key] = doc_id
+        self.documents[doc_id] = document
+        for gram in self._grams(document):
+            postings = self.postings.get(gram)
+            if postings is None:
+                postings = self.postings[gram] = array('I')
+            postings.append(doc_id)
+
+    def remove(self, key):
+        doc_id = self.doc_ids.pop(key, None)
+        if doc_id is None:
+            return
+        del self.documents[doc_id]
+        self.stale += 1
+
+    def candidates(self, query):
+        """包含搜索词中最少见 n-gram 的文档编号，由 search() 逐个确认子串"""
+        grams = ngrams(query, self.n)
+        if not grams:
+            return ()
+        return min((self.postings.get(gram, ()) for gram in grams), key=len)
+
+    def search(self, query, types=None):
+        """返回 [(分数, 匹配字段, 文档)]，未排序"""
+        hits = []
+        documents = self.documents
+        for doc_id in self.candidates(query):
+            document = documents.get(doc_id)
+            if document is None or (types and document.type not in types):
+                continue
+            best = None
+            for name, value, weight in document.fields:
+                if value == query:
+                    match = MATCH_EXACT
+                elif value.startswith(query):
+                    match = MATCH_PREFIX
+                elif query in value:
+                    match = MATCH_CONTAINS
+                else:
+                    continue
+                # 搜索词占字段长度的比例越高越相关
+                score = match * weight + len(query) / len(value)
+                if best is None or score > best[0]:
+                    best = (score, name)
+            if best is not None:
+                hits.append((best[0], best[1], document))
+        return hits
+
+    def memory_bytes(self):
+        """倒排表和文档占用内存的估算值"""
+        size = sys.getsizeof(self.postings) + sys.getsizeof(self.documents) + sys.getsizeof(self.doc_ids)
+        for gram, postings in self.postings.items():
+            size += sys.getsizeof(gram) + sys.getsizeof(postings)
+        for key in self.doc_ids:
+            size += sys.getsizeof(key)
+        for document in self.documents.values():
+            size += sys.getsizeof(document)
+            for name, value, _ in document.fields:
+                size += sys.getsizeof(value)
+        return size
+
+
+class GlobalSearchIndex:
+    """全局搜索索引：首次使用时构建，后台定期重建，信号即时更新"""
+
+    def __init__(self, enabled=True, n=3, rebuild_interval=900, max_results=50):
+        self.enabled = enabled
+        self.n = n
+        self.rebuild_interval = rebuild_interval
+        self.max_results = max_results
+
+        self.index = None
+        self.built_at = None
+        self.build_seconds = None
+        self.memory_bytes = None
+        self.rebuilds = 0
+        self.updates = 0
+        self.queries = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._building = False
+        # 构建期间的增量更新，构建完成后在新索引上重放
+        self._pending = None
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'SEARCH_INDEX', {})
+        return cls(
+            enabled=options.get('ENABLED', True),
+            n=options.get('NGRAM', 3),
+            rebuild_interval=options.get('REBUILD_INTERVAL', 900),
+            max_results=options.get('MAX_RESULTS', 50),
+        )
+
+    def rebuild(self):
+        """从数据库重建索引"""
+        started = time.perf_counter()
+        with self._lock:
+            self._pending = []
+        index = InvertedIndex(self.n)
+        for source in SEARCH_SOURCES:
+            rows = source.model._default_manager.order_by().values(*source.columns)
+            for values in rows.iterator(chunk_size=2000):
+                index.add(source.document(values))
+        memory_bytes = index.memory_bytes()
+        with self._lock:
+            for op, value in self._pending:
+                if op == 'add':
+                    index.add(value)
+                else:
+                    index.remove(value)
+            self._pending = None
+            self.index = index
+            self.built_at = time.time()
+            self.build_seconds = time.perf_counter() - started
+            self.memory_bytes = memory_bytes
+            self.rebuilds += 1
+        return index
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('全局搜索索引重建失败')
+        finally:
+            self._building = False
+            close_old_connections()
+
+    def _ensure_fresh(self):
+        if self.index is None:
+            # 首次使用时同步构建，并发请求等待同一次构建
+            with self._build_lock:
+                if self.index is None:
+                    self.rebuild()
+            return
+        if time.time() - self.built_at <= self.rebuild_interval or self._building:
+            return
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(
+            target=self._rebuild_in_background, name='global-search-index', daemon=True
+        ).start()
+
+    def _apply(self, op, value):
+        if self.index is None and self._pending is None:
+            return
+        with self._lock:
+            if self.index is not None:
+                getattr(self.index, op)(value)
+            if self._pending is not None:
+                self._pending.append((op, value))
+            self.updates += 1
+
+    def update(self, source, instance):
+        """保存后更新实例对应的文档"""
+        if self.index is None and self._pending is None:
+            return
+        self._apply('add', source.document_for(instance))
+
+    def remove(self, source, pk):
+        """删除后移除实例对应的文档"""
+        self._apply('remove', (source.type, pk))
+
+    def search(self, query, types=None, limit=20):
+        """返回 (按分数排序的前 limit 条命中, 各类型命中数)"""
+        self._ensure_fresh()
+        query = normalize(query)
+        with self._lock:
+            hits = self.index.search(query, types)
+            self.queries += 1
+        hits.sort(key=lambda hit: (-hit[0], hit[2].type, hit[2].id))
+        counts = dict.fromkeys(types or SOURCE_TYPES, 0)
+        for _, _, document in hits:
+            counts[document.type] += 1
+        results = [
+            {
+                'type': document.type,
+                'id': document.id,
+                'title': document.title,
+                'subtitle': document.subtitle,
+                'matched_field': field,
+                'score': round(score, 3),
+            }
+            for score, field, document in hits[:limit]
+        ]
+        return results, counts
+
+    def stats(self):
+        index = self.index
+        stats = {
+            'enabled': self.enabled,
+            'built': index is not None,
+            'ngram': self.n,
+            'rebuilds': self.rebuilds,
+            'rebuild_interval': self.rebuild_interval,
+            'built_at': self.built_at,
+            'build_seconds': self.build_seconds,
+            'memory_bytes': self.memory_bytes,
+            'updates': self.updates,
+            'queries': self.queries,
+        }
+        if index is not None:
+            stats.update({
+                'documents': len(index.documents),
+                'grams': len(index.postings),
+                'stale_postings': index.stale,
+            })
+        return stats
+
+
+search_index = GlobalSearchIndex.from_settings()
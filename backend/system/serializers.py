@@ -10,10 +10,12 @@ class SystemSettingsSerializer(serializers.ModelSerializer):
             'id', 'site_name', 'site_description', 'admin_email',
             'maintenance_mode', 'max_upload_size', 'session_timeout',
             'backup_enabled', 'backup_frequency', 'log_retention_days',
+            'license_usage_retention_days', 'license_log_retention_days',
+            'environment_log_retention_days', 'activity_log_retention_days',
             'email_notifications', 'smtp_host', 'smtp_port', 'smtp_use_tls',
-            'smtp_username', 'smtp_password', 'updated_at', 'updated_by_name'
+            'smtp_username', 'smtp_password', 'version', 'updated_at', 'updated_by_name'
         ]
-        read_only_fields = ['updated_at', 'updated_by_name']
+        read_only_fields = ['version', 'updated_at', 'updated_by_name']
 
 class SystemSettingsUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -22,6 +24,8 @@ class SystemSettingsUpdateSerializer(serializers.ModelSerializer):
             'site_name', 'site_description', 'admin_email',
             'maintenance_mode', 'max_upload_size', 'session_timeout',
             'backup_enabled', 'backup_frequency', 'log_retention_days',
+            'license_usage_retention_days', 'license_log_retention_days',
+            'environment_log_retention_days', 'activity_log_retention_days',
             'email_notifications', 'smtp_host', 'smtp_port', 'smtp_use_tls',
             'smtp_username', 'smtp_password'
         ]
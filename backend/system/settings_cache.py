@@ -0,0 +1,180 @@
+"""
+系统设置的进程内快照
+
+SystemSettings 是单行表，中间件每个请求都要读取维护模式、上传大小等设置，这里在进程内缓存
+这一行的快照，按版本号判断是否过期：每次保存 version 加一（见 SystemSettings.save），
+提交后把新版本号发布到共享位置——配置了 BACKEND（CACHES 中的别名）时写入共享缓存的版本键，
+否则写入版本文件（VERSION_FILE，留空时为临时目录下按数据库区分的文件）。
+
+版本文件只能通知能看到同一个文件的进程：默认的临时目录只适用于单主机部署，
+多主机（或各自有独立 /tmp 的容器）部署时必须配置 BACKEND 或把 VERSION_FILE 放在共享路径上，
+否则其他主机上的修改要等快照超过 MAX_AGE 后才生效。
+
+各进程最多每 CHECK_INTERVAL 秒读一次共享版本号（版本文件只在 mtime 变化时才读取内容），
+版本号与快照不同时才重新读取设置行；共享版本号丢失（缓存被清空、文件被删除）时，
+快照最迟 MAX_AGE 秒后重新读取。本进程内的保存立即生效。
+"""
+import copy
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+def _default_version_file():
+    name = str(settings.DATABASES['default'].get('NAME', ''))
+    digest = hashlib.sha1(name.encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f'odoo-saas-system-settings-{digest}.version')
+
+
+class SystemSettingsCache:
+    """SystemSettings 单行的进程内快照，按共享版本号失效"""
+
+    version_key = 'system:settings:version'
+
+    def __init__(self, enabled=True, check_interval=1.0, max_age=300, backend=None, version_file=None):
+        self.enabled = enabled
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.backend_alias = backend or None
+        self._version_file = version_file or None
+
+        self.loads = 0
+        self.checks = 0
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._next_check = 0.0
+        # 上次检查时的共享版本号，与它不同才重新读取（不与快照比较，版本文件与数据库不一致时不会反复读取）
+        self._seen_version = None
+        # 版本文件上次的 (mtime, 版本号)，mtime 不变时不读取文件内容
+        self._file_state = (None, None)
+        # 可重入：首次读取时创建设置行会触发保存信号，在同一线程内调用 publish()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'SYSTEM_SETTINGS_CACHE', {})
+        return cls(
+            enabled=options.get('ENABLED', True),
+            check_interval=options.get('CHECK_INTERVAL', 1.0),
+            max_age=options.get('MAX_AGE', 300),
+            backend=options.get('BACKEND'),
+            version_file=options.get('VERSION_FILE'),
+        )
+
+    @property
+    def backend(self):
+        if self.backend_alias:
+            return caches[self.backend_alias]
+        return None
+
+    @property
+    def version_file(self):
+        if self._version_file is None:
+            self._version_file = _default_version_file()
+        return self._version_file
+
+    def _load(self):
+        from .models import SystemSettings
+        instance = SystemSettings.load()
+        self.loads += 1
+        return instance
+
+    def _shared_version(self):
+        """共享位置上的最新版本号，读取失败或尚未发布时返回 None"""
+        self.checks += 1
+        backend = self.backend
+        if backend is not None:
+            try:
+                return backend.get(self.version_key)
+            except Exception:
+                logger.warning('读取系统设置版本号失败', exc_info=True)
+                return None
+        try:
+            mtime = os.stat(self.version_file).st_mtime_ns
+        except OSError:
+            return None
+        if mtime == self._file_state[0]:
+            return self._file_state[1]
+        try:
+            with open(self.version_file) as f:
+                version = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return None
+        self._file_state = (mtime, version)
+        return version
+
+    def get(self):
+        """当前设置的只读快照；调用方不要修改或保存，需要修改时使用 SystemSettings.load()"""
+        if not self.enabled:
+            return self._load()
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now < self._next_check:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and now < self._next_check:
+                return snapshot
+            # 先读版本号再读设置行，两者之间发布的新版本下次检查时会被发现
+            shared = self._shared_version()
+            stale = (
+                snapshot is None
+                or now - self._loaded_at > self.max_age
+                or (shared is not None and shared != self._seen_version)
+            )
+            if stale:
+                snapshot = self._snapshot = self._load()
+                self._loaded_at = now
+            self._seen_version = shared
+            self._next_check = now + self.check_interval
+            return snapshot
+
+    def publish(self, instance):
+        """保存提交后调用：本进程直接换成新快照，并发布版本号通知其他进程"""
+        with self._lock:
+            self._snapshot = copy.copy(instance)
+            self._seen_version = instance.version
+            self._loaded_at = self._next_check = time.monotonic()
+        backend = self.backend
+        if backend is not None:
+            try:
+                backend.set(self.version_key, instance.version, timeout=None)
+            except Exception:
+                logger.warning('发布系统设置版本号失败', exc_info=True)
+            return
+        path = self.version_file
+        try:
+            # 先写临时文件再替换，读取方不会读到写了一半的内容
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(str(instance.version))
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning('写入系统设置版本文件失败: %s', path, exc_info=True)
+
+    def invalidate(self):
+        """丢弃本进程快照，下次读取时重新查询"""
+        with self._lock:
+            self._snapshot = None
+            self._next_check = 0.0
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'enabled': self.enabled,
+            'version': snapshot.version if snapshot is not None else None,
+            'loads': self.loads,
+            'checks': self.checks,
+            'backend': self.backend_alias or 'file',
+        }
+
+
+system_settings = SystemSettingsCache.from_settings()
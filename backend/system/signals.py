@@ -0,0 +1,75 @@
+import copy
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from customers.models import Customer, LicenseKey
+from environments.models import Environment
+from licenses.models import License
+from .counters import current_contributions, loaded_contributions, transition
+from .models import SystemSettings
+from .search_index import SEARCH_SOURCES, search_index
+from .settings_cache import system_settings
+
+# 维护平台计数器的模型，影响计数的字段见各模型的 tracked_fields
+COUNTED_MODELS = [Customer, Environment, License, LicenseKey]
+
+
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    """保存后按加载时/当前贡献之差增量更新计数器"""
+    if raw:
+        return
+    old_fields = [] if created else loaded_contributions(instance)
+    if old_fields is None:
+        # 未从数据库加载或延迟加载了计数字段，这类保存由定期校准修正
+        return
+    transition(old_fields, current_contributions(instance))
+    instance.remember_loaded_values()
+
+
+def update_counters_on_delete(sender, instance, **kwargs):
+    """删除后减去实例的贡献（级联删除的对象同样会触发）"""
+    old_fields = loaded_contributions(instance)
+    if old_fields is None:
+        old_fields = current_contributions(instance)
+    transition(old_fields, [])
+
+
+for model in COUNTED_MODELS:
+    post_save.connect(update_counters_on_save, sender=model)
+    post_delete.connect(update_counters_on_delete, sender=model)
+
+
+def index_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """保存后更新全局搜索索引中的文档，只保存了不参与搜索的字段时跳过"""
+    if raw:
+        return
+    source = SEARCH_SOURCE_BY_MODEL[sender]
+    if update_fields is not None and update_fields.isdisjoint(source.columns):
+        return
+    search_index.update(source, instance)
+
+
+def index_on_delete(sender, instance, **kwargs):
+    """删除后从全局搜索索引中移除文档"""
+    search_index.remove(SEARCH_SOURCE_BY_MODEL[sender], instance.pk)
+
+
+SEARCH_SOURCE_BY_MODEL = {source.model: source for source in SEARCH_SOURCES}
+
+for model in SEARCH_SOURCE_BY_MODEL:
+    post_save.connect(index_on_save, sender=model)
+    post_delete.connect(index_on_delete, sender=model)
+
+
+def publish_system_settings(sender, instance, raw=False, **kwargs):
+    """系统设置提交后替换本进程快照，并发布新版本号通知其他进程"""
+    if raw:
+        return
+    if hasattr(instance.version, 'resolve_expression'):
+        # 版本号以 F() 表达式保存，发布前读回数据库中的值
+        instance.refresh_from_db(fields=['version'])
+    snapshot = copy.copy(instance)
+    transaction.on_commit(lambda: system_settings.publish(snapshot))
+
+
+post_save.connect(publish_system_settings, sender=SystemSettings)
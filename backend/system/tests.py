@@ -1,3 +1,297 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from customers.models import Customer, LicenseKey
+from environments.models import Environment
+from licenses.models import License
+from users.models import UserActivityLog, UserProfile
+from .counters import get_counters, reconcile, recount
+from .middleware import UploadSizeLimitMiddleware
+from .models import SystemSettings
+from .retention import purge_table
+from .search_index import ADMIN_ONLY_TYPES, search_index
+from .settings_cache import SystemSettingsCache, system_settings
+
+
+class PlatformCounterTests(TestCase):
+    """通过 ORM 保存、修改和删除后，增量维护的计数器与全量统计一致"""
+
+    def setUp(self):
+        reconcile()
+
+    def assertCountersMatch(self):
+        counters = get_counters()
+        for field, value in recount().items():
+            self.assertEqual(getattr(counters, field), value, field)
+
+    def test_incremental_updates(self):
+        customer = Customer.objects.create(customer_id='C1', name='客户', contact_email='c@example.com')
+        environment = Environment.objects.create(customer=customer, release_name='odoo-1', admin_password='admin')
+        license = License.objects.create(
+            customer=customer, license_type='standard',
+            valid_from=timezone.now(), valid_until=timezone.now() + timedelta(days=30),
+        )
+        key = LicenseKey.objects.create(customer=customer, license_code='KEY-1', expire_date=timezone.now().date())
+        self.assertCountersMatch()
+
+        # 从数据库加载后修改
+        customer = Customer.objects.get(pk=customer.pk)
+        customer.status = 'active'
+        customer.save()
+        environment = Environment.objects.get(pk=environment.pk)
+        environment.status = 'running'
+        environment.save()
+        License.objects.get(pk=license.pk).revoke()
+        key.is_active = False
+        key.save()
+        # 只保存与计数无关的字段
+        key.usage_count = 1
+        key.save(update_fields=['usage_count'])
+        self.assertCountersMatch()
+
+        # 级联删除
+        Customer.objects.get(pk=customer.pk).delete()
+        self.assertCountersMatch()
+        self.assertEqual(get_counters().customers_total, 0)
+
+
+class GlobalSearchPermissionTests(TestCase):
+    """离线授权码和用户只出现在管理员的搜索结果中"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('acme-operator', email='operator@acme.example')
+        cls.admin = User.objects.create_user('acme-admin', email='admin@acme.example')
+        UserProfile.objects.create(user=cls.admin, role='admin')
+        customer = Customer.objects.create(customer_id='ACME1', name='acme', contact_email='it@acme.example')
+        LicenseKey.objects.create(customer=customer, license_code='ACME-SECRET-KEY', expire_date=timezone.now().date())
+
+    def setUp(self):
+        search_index.rebuild()
+        system_settings.get()
+        self.client = APIClient()
+
+    def search(self, user, **params):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/search/', {'q': 'acme', **params})
+
+    def test_non_admin_gets_no_admin_only_hits(self):
+        response = self.search(self.user)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'])
+        self.assertFalse({hit['type'] for hit in response.data['results']} & ADMIN_ONLY_TYPES)
+        self.assertFalse(set(response.data['counts']) & ADMIN_ONLY_TYPES)
+        self.assertEqual(self.search(self.user, types='license_key').status_code, 403)
+        self.assertEqual(self.search(self.user, types='customer,user').status_code, 403)
+
+    def test_admin_sees_all_types(self):
+        response = self.search(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(ADMIN_ONLY_TYPES <= {hit['type'] for hit in response.data['results']})
+
+
+class CleanLogsTests(TestCase):
+    """清理日志接口每次请求最多删除 CLEAN_LOGS_MAX_BATCHES 批，没删完时返回 has_more"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='admin')
+        UserActivityLog.objects.bulk_create([
+            UserActivityLog(user=self.admin, action='login', description=f'log {i}') for i in range(7)
+        ])
+        UserActivityLog.objects.update(created_at=timezone.now() - timedelta(days=60))
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        system_settings.get()
+
+    def test_batches_capped(self):
+        cutoff = timezone.now() - timedelta(days=30)
+        result = purge_table(UserActivityLog, 'created_at', cutoff, batch_size=2, pause=0, max_batches=2)
+        self.assertEqual((result['deleted'], result['batches'], result['more']), (4, 2, True))
+        # 再次调用从剩余过期行继续
+        result = purge_table(UserActivityLog, 'created_at', cutoff, batch_size=2, pause=0, max_batches=2)
+        self.assertEqual((result['deleted'], result['more']), (3, False))
+        self.assertFalse(UserActivityLog.objects.exists())
+
+    def test_clean_logs(self):
+        response = self.client.post('/api/system/clean-logs/', {'days': 30}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['deleted_count'], 7)
+        self.assertFalse(response.data['has_more'])
+        # 只剩本次清理写入的操作日志
+        self.assertEqual(list(UserActivityLog.objects.values_list('action', flat=True)), ['clean_logs'])
+
+
+class SystemSettingsMixin:
+    """通过保存 SystemSettings 修改设置并执行提交后的发布，测试结束后丢弃本进程快照"""
+
+    def tearDown(self):
+        super().tearDown()
+        # 数据库随测试事务回滚，快照需要重新读取
+        system_settings.invalidate()
+
+    def update_system_settings(self, **fields):
+        instance = SystemSettings.load()
+        for name, value in fields.items():
+            setattr(instance, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+        return instance
+
+
+class SystemSettingsCacheTests(SystemSettingsMixin, TestCase):
+    """设置保存后版本号加一；其他进程通过版本文件或共享缓存发现新版本并重新读取"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.version_file = os.path.join(directory.name, 'settings.version')
+
+    def test_version_bump(self):
+        version = SystemSettings.load().version
+        instance = self.update_system_settings(site_name='新名称')
+        self.assertEqual(instance.version, version + 1)
+        self.assertEqual(SystemSettings.load().version, version + 1)
+        # 本进程的快照在提交后直接替换，不查询数据库
+        with self.assertNumQueries(0):
+            snapshot = system_settings.get()
+        self.assertEqual((snapshot.version, snapshot.site_name), (version + 1, '新名称'))
+
+    def assertInvalidatedAcrossProcesses(self, **options):
+        # 两个缓存实例模拟两个进程：writer 保存并发布，reader 按共享版本号发现变化
+        writer = SystemSettingsCache(check_interval=0, **options)
+        reader = SystemSettingsCache(check_interval=0, **options)
+        self.assertFalse(reader.get().maintenance_mode)
+        with self.assertNumQueries(0):
+            reader.get()
+
+        instance = SystemSettings.load()
+        instance.maintenance_mode = True
+        instance.save()
+        instance.refresh_from_db()
+        writer.publish(instance)
+
+        self.assertTrue(reader.get().maintenance_mode)
+        self.assertEqual(reader.loads, 2)
+        with self.assertNumQueries(0):
+            reader.get()
+
+    def test_invalidation_via_version_file(self):
+        self.assertInvalidatedAcrossProcesses(version_file=self.version_file)
+
+    def test_invalidation_via_shared_cache(self):
+        self.assertInvalidatedAcrossProcesses(backend='default')
+
+    def test_max_age(self):
+        reader = SystemSettingsCache(check_interval=0, max_age=0, version_file=self.version_file)
+        reader.get()
+        reader.get()
+        # 没有共享版本号时快照超过 MAX_AGE 就重新读取
+        self.assertEqual(reader.loads, 2)
+
+
+class MaintenanceModeTests(SystemSettingsMixin, TestCase):
+    """维护模式下返回 503 和 Retry-After，放行的路径不受影响"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='admin'))
+        self.update_system_settings(maintenance_mode=True)
+
+    def test_blocked(self):
+        response = self.client.get('/api/customers/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(settings.MAINTENANCE_MODE['RETRY_AFTER']))
+
+    @override_settings(DEBUG=True)
+    def test_exempt_paths(self):
+        self.assertEqual(self.client.get('/api/health/').status_code, 200)
+        self.assertEqual(self.client.get('/api/system/settings/').status_code, 200)
+        self.assertNotEqual(self.client.get('/api/metrics').status_code, 503)
+        self.assertNotEqual(self.client.post('/api/login/', {}).status_code, 503)
+
+    def test_turned_off(self):
+        self.update_system_settings(maintenance_mode=False)
+        self.assertEqual(self.client.get('/api/customers/').status_code, 200)
+
+
+class UploadSizeLimitTests(SystemSettingsMixin, TestCase):
+    """请求体超过 max_upload_size 时返回 413：按 Content-Length 判断，ASGI 下再按已缓冲的实际大小判断"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', password='admin'))
+        self.update_system_settings(max_upload_size=1)
+        self.limit = 1024 * 1024
+
+    def test_content_length(self):
+        response = self.client.generic('POST', '/api/customers/', b'x' * (self.limit + 1), 'application/octet-stream')
+        self.assertEqual(response.status_code, 413)
+
+    def test_declared_content_length(self):
+        # 声明的长度超限即拒绝，不读取请求体
+        response = self.client.generic(
+            'POST', '/api/customers/', b'{}', 'application/json', CONTENT_LENGTH=str(self.limit + 1),
+        )
+        self.assertEqual(response.status_code, 413)
+
+    def test_within_limit(self):
+        response = self.client.post('/api/customers/', {}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def asgi_request(self, size, content_length=None):
+        body = tempfile.SpooledTemporaryFile(max_size=self.limit)
+        self.addCleanup(body.close)
+        body.write(b'x' * size)
+        body.seek(0)
+        headers = [(b'content-type', b'application/octet-stream')]
+        if content_length is not None:
+            headers.append((b'content-length', str(content_length).encode()))
+        scope = {'type': 'http', 'method': 'POST', 'path': '/api/customers/', 'headers': headers}
+        return ASGIRequest(scope, body)
+
+    def test_buffered_body(self):
+        middleware = UploadSizeLimitMiddleware(lambda request: HttpResponse())
+        # 分块传输没有 Content-Length，或声明的长度小于实际内容
+        self.assertEqual(middleware(self.asgi_request(self.limit + 1)).status_code, 413)
+        self.assertEqual(middleware(self.asgi_request(self.limit + 1, content_length=10)).status_code, 413)
+        self.assertEqual(middleware(self.asgi_request(self.limit)).status_code, 200)
+
+
+class MetricsEndpointTests(TestCase):
+    """/api/metrics 的访问控制：配置了 METRICS_TOKEN 时需要 Bearer Token，未配置时只在 DEBUG 下开放"""
+
+    def setUp(self):
+        system_settings.get()
+
+    def metrics_settings(self, token):
+        return override_settings(METRICS={**settings.METRICS, 'TOKEN': token})
+
+    @override_settings(DEBUG=False)
+    def test_token_not_configured(self):
+        with self.metrics_settings(''):
+            self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+
+    @override_settings(DEBUG=True)
+    def test_token_not_configured_debug(self):
+        with self.metrics_settings(''):
+            self.assertEqual(self.client.get('/api/metrics').status_code, 200)
+
+    @override_settings(DEBUG=False)
+    def test_token_required(self):
+        with self.metrics_settings('secret'):
+            self.assertEqual(self.client.get('/api/metrics').status_code, 401)
+            self.assertEqual(
+                self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401,
+            )
+            response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['Content-Type'].startswith('text/plain'))
@@ -2,15 +2,43 @@ from django.shortcuts import render
 from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from django.conf import settings as django_settings
+from backend.caching import stats_cache
+from .counters import platform_stats
+from .metrics import render as render_metrics, request_metrics
 from .models import SystemSettings
+from .retention import purge
+from .search_index import ADMIN_ONLY_TYPES, SOURCE_TYPES, search_index
 from .serializers import SystemSettingsSerializer, SystemSettingsUpdateSerializer
+from environments.models import EnvironmentLog
+from environments.serializers import EnvironmentLogSerializer
+from licenses.models import LicenseLog
+from licenses.serializers import LicenseLogSerializer
 from users.models import UserActivityLog
+from users.serializers import UserActivityLogSerializer
+import hashlib
+import hmac
+import json
 import subprocess
 import os
 
+DASHBOARD_RECENT_LOGS = 10
+DASHBOARD_MAX_RECENT_LOGS = 50
+SEARCH_DEFAULT_LIMIT = 20
+
 # Create your views here.
 
+def is_platform_admin(user):
+    """超级用户或角色为管理员的用户"""
+    if user.is_superuser:
+        return True
+    return hasattr(user, 'userprofile') and user.userprofile.is_admin
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_settings(request):
@@ -31,7 +59,7 @@ def update_settings(request):
                 status=status.HTTP_403_FORBIDDEN
             )
     
-    settings = SystemSettings.get_settings()
+    settings = SystemSettings.load()
     serializer = SystemSettingsUpdateSerializer(
         settings, 
         data=request.data, 
@@ -135,12 +163,15 @@ def clean_logs(request):
         return Response({'error': '天数必须是大于0的整数'}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # 计算截止日期
-        cutoff_date = timezone.now() - timezone.timedelta(days=days)
-        
-        # 清理用户活动日志
-        deleted_count = UserActivityLog.objects.filter(created_at__lt=cutoff_date).count()
-        UserActivityLog.objects.filter(created_at__lt=cutoff_date).delete()
+        # 与原来一样只清理用户活动日志；授权使用记录、授权日志和环境日志数据量大，
+        # 由定时任务 python manage.py purge_logs 按保留策略清理，不在请求中同步执行。
+        # 每次请求最多删除 CLEAN_LOGS_MAX_BATCHES 批且批之间不暂停，没删完时 has_more 为 true，由客户端再次请求
+        report = purge(
+            days=days, tables=['activity_logs'], pause=0,
+            max_batches=django_settings.CLEAN_LOGS_MAX_BATCHES,
+        )
+        deleted_count = sum(result['deleted'] for result in report.values())
+        has_more = any(result['more'] for result in report.values())
         
         # 记录操作日志
         UserActivityLog.objects.create(
@@ -155,7 +186,102 @@ def clean_logs(request):
         
         return Response({
             'message': f'成功清理了{deleted_count}条历史日志',
-            'deleted_count': deleted_count
+            'deleted_count': deleted_count,
+            'has_more': has_more,
+            'tables': report,
         })
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def dashboard_summary(request):
+    """仪表盘汇总：全部统计和最近日志，固定 4 次查询（统计缓存命中时 3 次）
+
+    响应带 ETag，内容未变化时对 If-None-Match 返回 304。
+    """
+    try:
+        limit = int(request.query_params.get('limit', DASHBOARD_RECENT_LOGS))
+    except ValueError:
+        return Response({'error': 'limit必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(limit, 0), DASHBOARD_MAX_RECENT_LOGS)
+    
+    environment_logs = EnvironmentLog.objects.select_related('environment', 'created_by').order_by('-created_at')[:limit]
+    license_logs = LicenseLog.objects.select_related('license__customer', 'created_by').order_by('-created_at')[:limit]
+    activity_logs = UserActivityLog.objects.select_related('user').order_by('-created_at')[:limit]
+    
+    data = {
+        'stats': stats_cache.get_or_compute('dashboard', platform_stats),
+        'recent_environment_logs': EnvironmentLogSerializer(environment_logs, many=True).data,
+        'recent_license_logs': LicenseLogSerializer(license_logs, many=True).data,
+        'recent_activity_logs': UserActivityLogSerializer(activity_logs, many=True).data,
+    }
+    
+    content = json.dumps(data, cls=JSONEncoder, sort_keys=True, ensure_ascii=False)
+    etag = '"%s"' % hashlib.sha1(content.encode()).hexdigest()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = Response(data)
+    response['ETag'] = etag
+    # 浏览器每次都要重新验证，由 ETag 决定是否返回 304
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def global_search(request):
+    """全局搜索：在客户、环境、授权码、离线授权码和用户中按 q 查找，返回按相关度排序的命中
+
+    可选参数 types=customer,environment 限定类型，limit 限定条数。
+    离线授权码和用户只对管理员返回，其他用户请求这两种类型时返回 403。
+    """
+    if not search_index.enabled:
+        return Response({'error': '全局搜索未启用'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    query = request.query_params.get('q', '').strip()
+    if len(query) < search_index.n:
+        return Response({'error': f'搜索词至少需要{search_index.n}个字符'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    types = [name for name in request.query_params.get('types', '').split(',') if name]
+    unknown = sorted(set(types) - set(SOURCE_TYPES))
+    if unknown:
+        return Response({'error': f"未知类型: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+    if not is_platform_admin(request.user):
+        if ADMIN_ONLY_TYPES.intersection(types):
+            return Response({'error': '没有权限搜索离线授权码和用户'}, status=status.HTTP_403_FORBIDDEN)
+        types = types or [name for name in SOURCE_TYPES if name not in ADMIN_ONLY_TYPES]
+    
+    try:
+        limit = int(request.query_params.get('limit', SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return Response({'error': 'limit必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(limit, 1), search_index.max_results)
+    
+    results, counts = search_index.search(query, types=types or None, limit=limit)
+    return Response({
+        'query': query,
+        'count': sum(counts.values()),
+        'counts': counts,
+        'results': results,
+        'index': search_index.stats(),
+    })
+
+@require_GET
+def metrics(request):
+    """Prometheus 文本格式的请求指标，需要 Authorization: Bearer <METRICS_TOKEN>
+
+    未配置 METRICS_TOKEN 时只在 DEBUG 下开放，生产环境返回 403。
+    """
+    token = django_settings.METRICS['TOKEN']
+    if token:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain; charset=utf-8')
+    elif not django_settings.DEBUG:
+        return HttpResponse('METRICS_TOKEN not configured\n', status=403, content_type='text/plain; charset=utf-8')
+    if not request_metrics.enabled:
+        return HttpResponse('metrics disabled\n', status=503, content_type='text/plain; charset=utf-8')
+    return HttpResponse(
+        render_metrics(request_metrics.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import UserProfile, UserActivityLog
+from .models import AuthToken, UserProfile, UserActivityLog
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -21,3 +21,10 @@ class UserActivityLogAdmin(admin.ModelAdmin):
     list_filter = ['action', 'created_at']
     search_fields = ['user__username', 'description', 'target_id']
     readonly_fields = ['created_at']
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ['user', 'client', 'created_at', 'last_used_at', 'expires_at']
+    list_filter = ['expires_at']
+    search_fields = ['user__username', 'client']
+    readonly_fields = ['key', 'created_at', 'last_used_at']
@@ -0,0 +1,211 @@
+"""
+带缓存的 Token 认证
+
+Token（users.AuthToken）解析为只读的身份快照（Principal：Token 过期时间、用户和用户资料的
+字段值），放在进程内 LRU+TTL 缓存中，每个请求由快照构造新的 User / UserProfile 实例
+（互相填好一对一缓存），命中缓存时认证和 request.user.userprofile 的权限判断都不查询数据库。
+
+过期判断直接比较快照中的 expires_at；Token 在使用中滑动续期，但每个 Token 最多每
+RENEW_INTERVAL 秒写一次数据库。未命中缓存时按 Token 主键查询，PostgreSQL 上由
+(key) INCLUDE (user_id, expires_at) 索引只扫索引完成 Token 部分。
+
+以下变更通过信号立即失效本进程缓存（见 users/signals.py）：Token 删除（登出）或新建、
+用户保存（停用、改权限等，仅更新 last_login 除外）、用户资料保存或删除。
+其他进程最迟一个 TTL 后生效。ASGI 快速通道（licenses/asgi.py）共用同一份缓存。
+"""
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from backend.caching import LRUTTLCache
+from .models import AuthToken, UserProfile
+
+INVALID_TOKEN = _('Invalid token.')
+INACTIVE_USER = _('User inactive or deleted.')
+EXPIRED_TOKEN = '登录已过期，请重新登录'
+
+# 可重入：持有锁写缓存时，被淘汰条目的 _forget_key 回调在同一线程内再次加锁
+_lock = threading.RLock()
+# 用户 -> 已缓存的 Token，用户或资料变更时据此失效；条目离开缓存时同步移除（见 _forget_key）
+_keys_by_user = {}
+# 每次失效加一；查询期间发生过失效时不写缓存，避免写回旧快照
+_generation = 0
+
+
+def _forget_key(key, principal):
+    """Token 被淘汰、过期或删除后从 _keys_by_user 中移除，映射大小不超过缓存容量"""
+    if not principal:
+        return
+    with _lock:
+        keys = _keys_by_user.get(principal.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del _keys_by_user[principal.user_id]
+
+
+# 不存在的 Token 以 False 缓存，避免无效 Token 反复查询
+token_cache = LRUTTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE['MAXSIZE'],
+    ttl=settings.AUTH_TOKEN_CACHE['TTL'],
+    on_remove=_forget_key,
+)
+
+
+def _field_state(instance):
+    return tuple((field.attname, getattr(instance, field.attname)) for field in instance._meta.concrete_fields)
+
+
+def _from_state(model, state):
+    names, values = zip(*state)
+    return model.from_db(DEFAULT_DB_ALIAS, list(names), list(values))
+
+
+class Principal(namedtuple('Principal', 'token_key expires_at user_id is_active role user_state profile_state')):
+    """Token 对应的只读身份快照"""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_user(cls, token_key, expires_at, user):
+        profile = getattr(user, 'userprofile', None)
+        return cls(
+            token_key=token_key,
+            expires_at=expires_at,
+            user_id=user.pk,
+            is_active=user.is_active,
+            role=profile.role if profile is not None else None,
+            user_state=_field_state(user),
+            profile_state=_field_state(profile) if profile is not None else None,
+        )
+
+    def build(self):
+        """构造本请求使用的 (user, token)，不查询数据库"""
+        user = _from_state(User, self.user_state)
+        profile = None
+        if self.profile_state is not None:
+            profile = _from_state(UserProfile, self.profile_state)
+            UserProfile.user.field.set_cached_value(profile, user)
+        # 没有资料时缓存 None，hasattr(user, 'userprofile') 为 False 且不查询
+        User.userprofile.related.set_cached_value(user, profile)
+        token = AuthToken.from_db(
+            DEFAULT_DB_ALIAS, ['key', 'user_id', 'expires_at'],
+            [self.token_key, self.user_id, self.expires_at],
+        )
+        AuthToken.user.field.set_cached_value(token, user)
+        return user, token
+
+
+def resolve_token(key):
+    """返回 Token 对应的 Principal（不判断是否过期），Token 不存在时返回 None"""
+    enabled = settings.AUTH_TOKEN_CACHE['ENABLED']
+    if enabled:
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached or None
+
+    generation = _generation
+    # 从用户一侧查询，Token 表只用到 key、user_id、expires_at 三列
+    user = (
+        User.objects.select_related('userprofile')
+        .filter(auth_tokens__key=key)
+        .annotate(token_expires_at=F('auth_tokens__expires_at'))
+        .first()
+    )
+    principal = Principal.from_user(key, user.token_expires_at, user) if user is not None else None
+    if enabled:
+        with _lock:
+            if generation == _generation:
+                token_cache.set(key, principal or False)
+                if principal is not None:
+                    _keys_by_user.setdefault(principal.user_id, set()).add(key)
+    return principal
+
+
+def _needs_renewal(principal, now):
+    # 距上次续期超过 RENEW_INTERVAL 时续期
+    options = settings.AUTH_TOKEN
+    remaining = (principal.expires_at - now).total_seconds()
+    return remaining < options['TTL'] - options['RENEW_INTERVAL']
+
+
+def _renew(principal, now):
+    expires_at = now + timezone.timedelta(seconds=settings.AUTH_TOKEN['TTL'])
+    updated = AuthToken.objects.filter(pk=principal.token_key).update(expires_at=expires_at, last_used_at=now)
+    if not updated:
+        invalidate_token(principal.token_key)
+        return None
+    principal = principal._replace(expires_at=expires_at)
+    if settings.AUTH_TOKEN_CACHE['ENABLED']:
+        with _lock:
+            if token_cache.get(principal.token_key) is not None:
+                token_cache.set(principal.token_key, principal)
+    return principal
+
+
+def cached_principal(key, now=None):
+    """缓存中可以直接使用的 Principal（存在、未停用、未过期、无需续期），否则返回 None"""
+    principal = token_cache.get(key)
+    if not principal or not principal.is_active:
+        return None
+    now = now or timezone.now()
+    if principal.expires_at <= now or _needs_renewal(principal, now):
+        return None
+    return principal
+
+
+def check_token(key, now=None):
+    """校验 Token 并在需要时续期，返回 (Principal, 错误信息)"""
+    now = now or timezone.now()
+    principal = resolve_token(key)
+    if principal is not None and principal.expires_at <= now:
+        # 缓存中的过期时间可能已被其他进程续期，以数据库为准再读一次
+        invalidate_token(key)
+        principal = resolve_token(key)
+    if principal is None:
+        return None, INVALID_TOKEN
+    if not principal.is_active:
+        return None, INACTIVE_USER
+    if principal.expires_at <= now:
+        return None, EXPIRED_TOKEN
+    if _needs_renewal(principal, now):
+        principal = _renew(principal, now)
+        if principal is None:
+            return None, INVALID_TOKEN
+    return principal, None
+
+
+def invalidate_token(key):
+    global _generation
+    with _lock:
+        _generation += 1
+        token_cache.delete(key)
+
+
+def invalidate_user(user_id):
+    """失效某个用户的全部已缓存 Token"""
+    global _generation
+    with _lock:
+        _generation += 1
+        for key in _keys_by_user.pop(user_id, ()):
+            token_cache.delete(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """基于 AuthToken 的 Token 认证：带缓存、过期和滑动续期，其余判断与 DRF 一致"""
+
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        principal, error = check_token(key)
+        if error is not None:
+            raise AuthenticationFailed(error)
+        return principal.build()
@@ -0,0 +1,30 @@
+"""
+清理过期的登录 Token
+运行命令：python manage.py purge_auth_tokens [--dry-run] [--batch-size 5000]
+建议由 cron 或 systemd timer 每小时执行
+"""
+from django.core.management.base import BaseCommand
+
+from users.tokens import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = '按 expires_at 索引分批删除已过期的登录 Token'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='每批删除的 Token 数')
+        parser.add_argument('--pause', type=float, default=0.05, help='批之间暂停的秒数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计已过期的 Token 数')
+
+    def handle(self, *args, **options):
+        result = purge_expired_tokens(
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+
+        action = '将清理' if options['dry_run'] else '已清理'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {result['deleted']} 个过期 Token"
+            f"（{result['batches']} 批，耗时 {result['seconds']:.2f}s）"
+        ))
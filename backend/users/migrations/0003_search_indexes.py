@@ -0,0 +1,20 @@
+"""
+PostgreSQL 上为 search= 用到的列创建 pg_trgm GIN 索引，其他数据库为空操作
+"""
+from django.db import migrations
+
+from backend.search import trigram_indexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY 不能在事务中执行
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_keyset_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        trigram_indexes('auth_user', ['username', 'email', 'first_name', 'last_name']),
+    ]
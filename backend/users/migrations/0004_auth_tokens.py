@@ -0,0 +1,61 @@
+# Generated by Django 5.2.3 on 2026-10-17 04:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def copy_drf_tokens(apps, schema_editor):
+    """沿用已有的 DRF Token，避免升级后所有用户被登出"""
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('users', 'AuthToken')
+    expires_at = timezone.now() + timezone.timedelta(seconds=settings.AUTH_TOKEN['TTL'])
+    AuthToken.objects.bulk_create([
+        AuthToken(key=token.key, user_id=token.user_id, client='迁移自旧 Token', expires_at=expires_at)
+        for token in Token.objects.iterator()
+    ], batch_size=1000)
+
+
+def create_lookup_index(apps, schema_editor):
+    """PostgreSQL 上认证查询用的覆盖索引，其他数据库使用主键索引"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS "auth_token_lookup_idx" '
+            'ON "users_authtoken" ("key") INCLUDE ("user_id", "expires_at")'
+        )
+
+
+def drop_lookup_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS "auth_token_lookup_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_search_indexes'),
+        ('authtoken', '0004_alter_tokenproxy_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False, verbose_name='Token')),
+                ('client', models.CharField(blank=True, max_length=200, verbose_name='客户端')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('last_used_at', models.DateTimeField(blank=True, null=True, verbose_name='最后续期时间')),
+                ('expires_at', models.DateTimeField(verbose_name='过期时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '登录Token',
+                'verbose_name_plural': '登录Token',
+                'indexes': [models.Index(fields=['expires_at'], name='auth_token_expires_idx'), models.Index(fields=['user', 'created_at'], name='auth_token_user_created_idx')],
+            },
+        ),
+        migrations.RunPython(create_lookup_index, drop_lookup_index),
+        migrations.RunPython(copy_drf_tokens, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,6 @@
+import binascii
+import os
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -78,6 +81,37 @@ class UserActivityLog(models.Model):
         verbose_name = '操作日志'
         verbose_name_plural = '操作日志'
         ordering = ['-created_at']
+        indexes = [
+            # 键集分页
+            models.Index(fields=['created_at', 'id'], name='activity_log_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.get_action_display()}"
+
+class AuthToken(models.Model):
+    """按客户端签发的登录 Token，带过期时间，使用中滑动续期（见 users/authentication.py）"""
+    key = models.CharField(max_length=40, primary_key=True, verbose_name='Token')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='auth_tokens', verbose_name='用户')
+    client = models.CharField(max_length=200, blank=True, verbose_name='客户端')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    last_used_at = models.DateTimeField(blank=True, null=True, verbose_name='最后续期时间')
+    expires_at = models.DateTimeField(verbose_name='过期时间')
+
+    class Meta:
+        verbose_name = '登录Token'
+        verbose_name_plural = '登录Token'
+        # PostgreSQL 上另有 (key) INCLUDE (user_id, expires_at) 覆盖索引，认证查询只扫索引，
+        # 见迁移 0004_auth_tokens
+        indexes = [
+            # 过期 Token 批量清理
+            models.Index(fields=['expires_at'], name='auth_token_expires_idx'),
+            models.Index(fields=['user', 'created_at'], name='auth_token_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.client or '未知客户端'}"
+
+    @staticmethod
+    def generate_key():
+        return binascii.hexlify(os.urandom(20)).decode()
@@ -1,3 +1,111 @@
+import io
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from system.settings_cache import system_settings
+from .authentication import EXPIRED_TOKEN, check_token, token_cache
+from .models import AuthToken, UserProfile
+from .tokens import issue_token
+
+
+class AuthTokenTests(TestCase):
+    """登录 Token：过期、滑动续期、登出和停用后的缓存失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tester', password='tester')
+        UserProfile.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.token = issue_token(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        system_settings.get()
+
+    def me(self):
+        return self.client.get('/api/users/me/')
+
+    def set_expires_at(self, expires_at):
+        # update() 不发送信号，与其他进程修改数据库的情形相同
+        AuthToken.objects.filter(pk=self.token.pk).update(expires_at=expires_at)
+
+    def test_login_issues_token_per_client(self):
+        response = APIClient().post('/api/login/', {'username': 'tester', 'password': 'tester', 'client': 'cli'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 2)
+
+    def test_expired(self):
+        self.set_expires_at(timezone.now() - timedelta(seconds=1))
+        response = self.me()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'], EXPIRED_TOKEN)
+
+    def test_expiry_read_from_database(self):
+        # 缓存中的过期时间已过，但其他进程已经续期：以数据库为准
+        self.assertEqual(self.me().status_code, 200)
+        principal = token_cache.get(self.token.key)
+        token_cache.set(self.token.key, principal._replace(expires_at=timezone.now() - timedelta(seconds=1)))
+        self.assertEqual(self.me().status_code, 200)
+
+    def test_sliding_renewal(self):
+        options = settings.AUTH_TOKEN
+        stale = timezone.now() + timedelta(seconds=options['TTL'] - options['RENEW_INTERVAL'] - 60)
+        self.set_expires_at(stale)
+        self.assertEqual(self.me().status_code, 200)
+        renewed = AuthToken.objects.get(pk=self.token.pk)
+        self.assertGreater(renewed.expires_at, stale + timedelta(seconds=options['RENEW_INTERVAL']))
+
+        # RENEW_INTERVAL 内再次使用不写数据库
+        self.assertEqual(self.me().status_code, 200)
+        self.assertEqual(AuthToken.objects.get(pk=self.token.pk).last_used_at, renewed.last_used_at)
+
+    def test_logout_invalidates_cache(self):
+        self.assertEqual(self.me().status_code, 200)
+        self.assertIsNotNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.post('/api/logout/').status_code, 200)
+        self.assertFalse(AuthToken.objects.filter(pk=self.token.pk).exists())
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_deactivation_invalidates_cache(self):
+        self.assertEqual(self.me().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_cache_hit_skips_queries(self):
+        self.assertEqual(self.me().status_code, 200)
+        with self.assertNumQueries(0):
+            principal, error = check_token(self.token.key)
+            user, _ = principal.build()
+            self.assertEqual(user.userprofile.role, 'viewer')
+        self.assertIsNone(error)
+
+
+class PurgeAuthTokensTests(TestCase):
+    """purge_auth_tokens 只删除已过期的 Token"""
+
+    def setUp(self):
+        user = User.objects.create_user('tester', password='tester')
+        now = timezone.now()
+        self.valid = issue_token(user)
+        expired = [issue_token(user) for _ in range(3)]
+        AuthToken.objects.filter(pk__in=[token.pk for token in expired]).update(expires_at=now - timedelta(days=1))
+
+    def purge(self, *args):
+        out = io.StringIO()
+        call_command('purge_auth_tokens', '--pause', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run(self):
+        self.assertIn('将清理 3 个过期 Token', self.purge('--dry-run'))
+        self.assertEqual(AuthToken.objects.count(), 4)
 
-# Create your tests here.
+    def test_purge(self):
+        self.assertIn('已清理 3 个过期 Token（2 批', self.purge('--batch-size', '2'))
+        self.assertEqual(list(AuthToken.objects.values_list('pk', flat=True)), [self.valid.pk])
@@ -2,7 +2,8 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from django.db.models import Q
+from backend.pagination import KeysetPagination
+from backend.search import search_queryset
 from .models import UserProfile, UserActivityLog
 from .serializers import (
     UserSerializer, UserProfileSerializer, UserActivityLogSerializer,
@@ -20,11 +21,8 @@ class UserViewSet(viewsets.ModelViewSet):
         # 搜索功能
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(username__icontains=search) |
-                Q(email__icontains=search) |
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search)
+            queryset = search_queryset(
+                queryset, search, fields=['username', 'email', 'first_name', 'last_name'],
             )
         
         # 角色过滤
@@ -65,6 +63,8 @@ class UserActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = UserActivityLog.objects.all()
     serializer_class = UserActivityLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         queryset = UserActivityLog.objects.select_related('user').all()
@@ -4,7 +4,7 @@ import { Card } from '../components/ui/Card';
 import { Badge } from '../components/ui/Badge';
 import { Loading } from '../components/ui/Loading';
 import { systemApi } from '../services/api';
-import type { Stats } from '../types';
+import type { DashboardSummary } from '../types';
 import {
   UserGroupIcon,
   ServerIcon,
@@ -15,7 +15,7 @@ import {
 } from '@heroicons/react/24/outline';
 
 export function Dashboard() {
-  const [stats, setStats] = useState<Stats | null>(null);
+  const [summary, setSummary] = useState<DashboardSummary | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -26,8 +26,8 @@ export function Dashboard() {
   const loadStats = async () => {
     try {
       setIsLoading(true);
-      const data = await systemApi.getOverallStats();
-      setStats(data);
+      const response = await systemApi.getDashboardSummary();
+      setSummary(response.data);
       setError(null);
     } catch (err) {
       setError('获取统计数据失败');
@@ -57,6 +57,21 @@ export function Dashboard() {
     );
   }
 
+  const stats = summary?.stats;
+  const recentLogs = [
+    ...(summary?.recent_activity_logs || []).map((log) => ({
+      key: `activity-${log.id}`, time: log.created_at, source: log.user_name, message: log.description
+    })),
+    ...(summary?.recent_environment_logs || []).map((log) => ({
+      key: `environment-${log.id}`, time: log.created_at, source: log.environment_name, message: log.message
+    })),
+    ...(summary?.recent_license_logs || []).map((log) => ({
+      key: `license-${log.id}`, time: log.created_at, source: log.customer_name, message: log.message
+    }))
+  ]
+    .sort((a, b) => b.time.localeCompare(a.time))
+    .slice(0, 10);
+
   const overviewCards = [
     {
       title: '总客户数',
@@ -229,6 +244,31 @@ export function Dashboard() {
           </div>
         </div>
       </Card>
+
+      {/* 最近动态 */}
+      <Card>
+        <div className="flex items-center mb-4">
+          <ClockIcon className="h-5 w-5 text-gray-500 mr-2" />
+          <h3 className="text-lg font-medium text-gray-900">最近动态</h3>
+        </div>
+        {recentLogs.length === 0 ? (
+          <p className="text-sm text-gray-500">暂无动态</p>
+        ) : (
+          <ul className="divide-y divide-gray-100">
+            {recentLogs.map((log) => (
+              <li key={log.key} className="flex items-center justify-between py-2">
+                <div className="min-w-0">
+                  <p className="text-sm text-gray-900 truncate">{log.message}</p>
+                  <p className="text-xs text-gray-500">{log.source}</p>
+                </div>
+                <span className="ml-4 text-xs text-gray-500 whitespace-nowrap">
+                  {new Date(log.time).toLocaleString('zh-CN')}
+                </span>
+              </li>
+            ))}
+          </ul>
+        )}
+      </Card>
     </div>
   );
 }
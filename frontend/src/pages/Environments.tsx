@@ -7,7 +7,7 @@ import { TableLoading } from '../components/ui/Loading';
 import { EnvironmentDetail } from '../components/environments/EnvironmentDetail';
 import { EnvironmentForm } from '../components/environments/EnvironmentForm';
 import { environmentApi } from '../services/api';
-import type { Environment, EnvironmentFormData } from '../types';
+import type { Environment, EnvironmentListItem, EnvironmentFormData } from '../types';
 import {
   PlusIcon,
   MagnifyingGlassIcon,
@@ -21,7 +21,7 @@ import {
 } from '@heroicons/react/24/outline';
 
 export function Environments() {
-  const [environments, setEnvironments] = useState<Environment[]>([]);
+  const [environments, setEnvironments] = useState<EnvironmentListItem[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [searchTerm, setSearchTerm] = useState('');
@@ -113,15 +113,24 @@ export function Environments() {
     }
   };
 
-  const handleView = (environment: Environment) => {
-    setSelectedEnvironment(environment);
-    setCurrentView('detail');
+  // 列表只包含精简字段，查看和编辑前获取完整的环境信息
+  const openEnvironment = async (environmentId: number, view: 'detail' | 'edit') => {
+    try {
+      setActionLoading(environmentId);
+      const response = await environmentApi.getEnvironment(environmentId);
+      setSelectedEnvironment(response.data);
+      setCurrentView(view);
+    } catch (err) {
+      alert('获取环境详情失败');
+      console.error('Error loading environment:', err);
+    } finally {
+      setActionLoading(null);
+    }
   };
 
-  const handleEdit = (environment: Environment) => {
-    setSelectedEnvironment(environment);
-    setCurrentView('edit');
-  };
+  const handleView = (environment: EnvironmentListItem) => openEnvironment(environment.id, 'detail');
+
+  const handleEdit = (environment: EnvironmentListItem) => openEnvironment(environment.id, 'edit');
 
   const handleCreate = () => {
     setSelectedEnvironment(null);
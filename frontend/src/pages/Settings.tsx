@@ -85,8 +85,15 @@ export function Settings() {
     }
 
     try {
-      await systemSettingsApi.cleanLogs(daysNum);
-      alert('日志清理已完成');
+      // 每次请求只删除一部分，has_more 为 true 时继续请求
+      let deletedCount = 0;
+      let hasMore = true;
+      while (hasMore) {
+        const response = await systemSettingsApi.cleanLogs(daysNum);
+        deletedCount += response.data.deleted_count;
+        hasMore = response.data.has_more;
+      }
+      alert(`日志清理已完成，共清理${deletedCount}条`);
     } catch (err) {
       alert('日志清理失败');
       console.error('Error cleaning logs:', err);
@@ -1,7 +1,7 @@
 import axios from 'axios';
 import type {
-  Customer, Environment, License, User, Stats, ActivityLog, SystemSettings,
-  ApiResponse, CustomerFormData, EnvironmentFormData, LicenseFormData, 
+  Customer, Environment, EnvironmentListItem, License, User, Stats, ActivityLog, SystemSettings, DashboardSummary, GlobalSearchResponse,
+  ApiResponse, CursorResponse, CustomerFormData, EnvironmentFormData, LicenseFormData, 
   UserFormData, SystemSettingsFormData
 } from '../types';
 
@@ -67,7 +67,9 @@ export const environmentApi = {
     status?: string;
     customer?: number;
     page?: number;
-  }) => api.get<ApiResponse<Environment>>('/environments/', { params }),
+    fields?: string;
+    omit?: string;
+  }) => api.get<ApiResponse<EnvironmentListItem>>('/environments/', { params }),
 
   // 获取环境详情
   getEnvironment: (id: number) => api.get<Environment>(`/environments/${id}/`),
@@ -197,8 +199,9 @@ export const activityLogApi = {
     target_type?: string;
     start_date?: string;
     end_date?: string;
-    page?: number;
-  }) => api.get<ApiResponse<ActivityLog>>('/user-activity-logs/', { params }),
+    cursor?: string;
+    page_size?: number;
+  }) => api.get<CursorResponse<ActivityLog>>('/user-activity-logs/', { params }),
 
   // 获取日志详情
   getLog: (id: number) => api.get<ActivityLog>(`/user-activity-logs/${id}/`),
@@ -238,19 +241,19 @@ export const systemApi = {
   // 健康检查
   healthCheck: () => api.get('/health/'),
 
+  // 获取仪表盘汇总（统计和最近日志，一次请求）
+  getDashboardSummary: (params?: { limit?: number }) =>
+    api.get<DashboardSummary>('/dashboard/summary/', { params }),
+
   // 获取综合统计
-  getOverallStats: async () => {
-    const [customerStats, environmentStats, licenseStats] = await Promise.all([
-      customerApi.getStats(),
-      environmentApi.getStats(),
-      licenseApi.getStats()
-    ]);
-    return {
-      ...customerStats.data,
-      ...environmentStats.data,
-      ...licenseStats.data
-    };
+  getOverallStats: async (): Promise<Stats> => {
+    const response = await systemApi.getDashboardSummary({ limit: 0 });
+    return response.data.stats;
   },
+
+  // 全局搜索（客户、环境、授权码、离线授权码、用户）
+  search: (params: { q: string; types?: string; limit?: number }) =>
+    api.get<GlobalSearchResponse>('/search/', { params }),
 };
 
 export default api;
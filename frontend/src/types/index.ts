@@ -14,6 +14,8 @@ export interface Customer {
   created_at: string;
   updated_at: string;
   environments_count: number;
+  licenses_count: number;
+  active_license_keys_count: number;
   is_active: boolean;
 }
 
@@ -148,6 +150,13 @@ export interface Environment {
   helm_values: any;
 }
 
+// 环境列表只返回列表页展示的字段，完整信息通过详情接口获取
+export type EnvironmentListItem = Pick<Environment,
+  'id' | 'customer' | 'customer_name' | 'release_name' | 'namespace' | 'domain' | 'odoo_version' |
+  'cpu_limit' | 'memory_limit' | 'storage_size' | 'status' | 'last_health_check' |
+  'created_at' | 'updated_at' | 'is_running' | 'access_url'
+>;
+
 export interface GitRepository {
   name: string;
   repository: string;
@@ -231,6 +240,10 @@ export interface SystemSettings {
   backup_enabled: boolean;
   backup_frequency: 'daily' | 'weekly' | 'monthly';
   log_retention_days: number;
+  license_usage_retention_days?: number | null;
+  license_log_retention_days?: number | null;
+  environment_log_retention_days?: number | null;
+  activity_log_retention_days?: number | null;
   email_notifications: boolean;
   smtp_host: string;
   smtp_port: number;
@@ -249,6 +262,13 @@ export interface ApiResponse<T> {
   results: T[];
 }
 
+// 日志和使用记录接口的游标分页响应（没有总数）
+export interface CursorResponse<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 export interface Stats {
   // 客户统计
   total_customers: number;
@@ -273,6 +293,40 @@ export interface Stats {
   pending_licenses: number;
 }
 
+// 仪表盘汇总
+export interface DashboardSummary {
+  stats: Stats;
+  recent_environment_logs: EnvironmentLog[];
+  recent_license_logs: LicenseLog[];
+  recent_activity_logs: ActivityLog[];
+}
+
+// 全局搜索
+export type SearchResultType = 'customer' | 'environment' | 'license' | 'license_key' | 'user';
+
+export interface SearchResult {
+  type: SearchResultType;
+  id: number;
+  title: string;
+  subtitle: string;
+  matched_field: string;
+  score: number;
+}
+
+export interface GlobalSearchResponse {
+  query: string;
+  count: number;
+  counts: Record<SearchResultType, number>;
+  results: SearchResult[];
+  index: {
+    built: boolean;
+    build_seconds: number | null;
+    memory_bytes: number | null;
+    documents?: number;
+    grams?: number;
+  };
+}
+
 // 表单类型
 export interface CustomerFormData {
   customer_id: string;
@@ -394,6 +448,10 @@ export interface SystemSettingsFormData {
   backup_enabled: boolean;
   backup_frequency: 'daily' | 'weekly' | 'monthly';
   log_retention_days: number;
+  license_usage_retention_days?: number | null;
+  license_log_retention_days?: number | null;
+  environment_log_retention_days?: number | null;
+  activity_log_retention_days?: number | null;
   email_notifications: boolean;
   smtp_host: string;
   smtp_port: number;